@@ -0,0 +1,134 @@
+# async_api.py
+# asyncio counterparts of the hide/extract entry points for services that embed logic.
+# The blocking work runs on an executor thread (NumPy, zlib and AES release the GIL) and
+# streams its files from there. Cancelling the awaiting task stops the job at its next
+# block or chunk: the progress callback the job reports through raises JobCancelled.
+# Outputs are written under a temporary name and only moved into place on success, so a
+# cancelled or failed job leaves no partial files behind. A JobLimiter bounds how many
+# jobs run at once in this process.
+#
+#   result = await hide_data_async("cover.wav", "secret.pdf", "secret.pdf", "out.wav", "pw", "auto", True)
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import logic
+
+class JobCancelled(Exception):
+    """Raised inside a job's worker thread once its task has been cancelled."""
+
+class JobLimiter:
+    """At most max_jobs jobs run at once; the others wait their turn (FIFO)."""
+    def __init__(self, max_jobs=None):
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+        self._semaphore = None
+
+    async def __aenter__(self):
+        # Created on first use, inside the running loop
+        if self._semaphore is None: self._semaphore = asyncio.Semaphore(self.max_jobs)
+        await self._semaphore.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+default_limiter = JobLimiter()
+
+def set_max_jobs(max_jobs):
+    # Replaces the process-wide limit; jobs already waiting keep the old limiter
+    global default_limiter
+    default_limiter = JobLimiter(max_jobs)
+
+async def _run(job, progress, executor, limiter):
+    # job(progress_callback) runs on the executor; progress(message, value) is called on the loop
+    loop = asyncio.get_running_loop()
+    cancelled = threading.Event()
+
+    def callback(message, value):
+        if cancelled.is_set(): raise JobCancelled()
+        if progress: loop.call_soon_threadsafe(progress, message, value)
+
+    async with (limiter or default_limiter):
+        future = loop.run_in_executor(executor, job, callback)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancelled.set()
+            # Hold the slot until the worker has stopped and cleaned up
+            while not future.done():
+                try:
+                    await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    continue
+                except Exception:
+                    break
+            raise
+
+def _temp_path(path):
+    # Same directory as path, so os.replace() is a rename
+    directory, name = os.path.split(os.path.abspath(path))
+    temp = os.path.join(directory, f".{name}.{os.urandom(6).hex()}.part")
+    # Created with open() rather than mkstemp() so the published file has the umask-based mode, not 0600
+    open(temp, 'xb').close()
+    return temp
+
+def _publish(write, output_path):
+    # Runs write(temp_path) and moves the result to output_path; nothing is left behind on failure
+    temp = _temp_path(output_path)
+    try:
+        result = write(temp)
+        os.replace(temp, output_path)
+        return result
+    finally:
+        if os.path.exists(temp): os.remove(temp)
+
+# --- Hide ---
+async def hide_data_async(cover_path, secret_data, secret_filename, output_path, password, compress, use_encryption,
+                          progress=None, executor=None, limiter=None, **options):
+    # options: as for logic.hide_data (kdf, workers, bits_per_sample, metrics, ...). Returns the CompressionReport.
+    def job(callback):
+        return _publish(lambda temp: logic.hide_data(cover_path, secret_data, secret_filename, temp, password, compress,
+                                                     use_encryption, callback, **options), output_path)
+    return await _run(job, progress, executor, limiter)
+
+async def hide_files_async(cover_path, files, output_path, password, compress, use_encryption, progress=None,
+                           executor=None, limiter=None, **options):
+    def job(callback):
+        return _publish(lambda temp: logic.hide_files(cover_path, files, temp, password, compress, use_encryption,
+                                                      callback, **options), output_path)
+    return await _run(job, progress, executor, limiter)
+
+# --- Extract ---
+async def extract_data_async(stego_path, password, progress=None, output_path=None, executor=None, limiter=None,
+                             **options):
+    # Returns (data, filename), or (output_path, filename) when the data is streamed to output_path
+    def job(callback):
+        if output_path is None: return logic.extract_data(stego_path, password, callback, **options)
+        return output_path, logic.extract_to(stego_path, output_path, password, callback, **options)
+    return await _run(job, progress, executor, limiter)
+
+async def extract_entry_async(stego_path, entry, password, progress=None, output_path=None, executor=None,
+                              limiter=None, **options):
+    def job(callback):
+        if output_path is None: return logic.extract_entry(stego_path, entry, password, callback, **options)
+        return output_path, logic.extract_to(stego_path, output_path, password, callback, entry, **options)
+    return await _run(job, progress, executor, limiter)
+
+async def extract_all_async(stego_path, output_dir, password, progress=None, executor=None, limiter=None, **options):
+    # Extracts into a hidden staging folder inside output_dir, then moves the files into place
+    def job(callback):
+        root = os.path.abspath(output_dir)
+        os.makedirs(root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".prostego-", dir=root)
+        try:
+            paths = []
+            for path in logic.extract_all(stego_path, staging, password, callback, **options):
+                target = os.path.join(root, os.path.relpath(path, staging))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(path, target)
+                paths.append(target)
+            return paths
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    return await _run(job, progress, executor, limiter)
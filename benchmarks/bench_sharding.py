@@ -0,0 +1,59 @@
+# benchmarks/bench_sharding.py
+# Scaling of sharded (multi-process, shared-memory) embedding/extraction across worker counts.
+# Run from the repo root:  python -m benchmarks.bench_sharding [--payload-mb 64] [--workers 1 2 4 8]
+import argparse
+import os
+import time
+import numpy as np
+from lsb import embed_lsb, extract_lsb
+from sharding import ShardPool
+
+def run(payload_mb, worker_counts):
+    size = int(payload_mb * (1 << 20))
+    payload = os.urandom(size)
+    cover = np.random.randint(0, 256, size * 8, dtype=np.uint8).tobytes()
+
+    # Single-threaded reference
+    expected = bytearray(cover)
+    start = time.perf_counter()
+    embed_lsb(expected, payload)
+    base_embed = time.perf_counter() - start
+    start = time.perf_counter()
+    extract_lsb(expected, size)
+    base_extract = time.perf_counter() - start
+
+    rows = []
+    for workers in worker_counts:
+        if workers <= 1:
+            rows.append((1, base_embed, base_extract, True))
+            continue
+        with ShardPool(workers) as shards:
+            shards.pool.submit(int).result()  # start the workers outside the timed region
+            frames = shards.frames(len(cover))
+            frames[:] = cover
+            start = time.perf_counter()
+            shards.embed(payload)
+            embed_time = time.perf_counter() - start
+            start = time.perf_counter()
+            extracted = shards.extract(size)
+            extract_time = time.perf_counter() - start
+            identical = frames == expected and extracted == payload
+            frames.release()
+        rows.append((workers, embed_time, extract_time, identical))
+    return size, base_embed, base_extract, rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded LSB scaling")
+    parser.add_argument("--payload-mb", type=float, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    size, base_embed, base_extract, rows = run(args.payload_mb, args.workers)
+    print(f"payload {size} bytes, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'embed s':>9} {'speedup':>8} {'extract s':>10} {'speedup':>8} {'identical':>10}")
+    for workers, embed_time, extract_time, identical in rows:
+        print(f"{workers:>8} {embed_time:>9.3f} {base_embed / embed_time:>8.2f} "
+              f"{extract_time:>10.3f} {base_extract / extract_time:>8.2f} {str(identical):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# benchmarks/bench_suite.py
+# End-to-end benchmark matrix: hide_data / extract_data over synthetic covers (channels,
+# sample width, duration) x payloads (size, entropy) x flags, plus encrypt_file /
+# decrypt_file and derive_key on their own. Covers and payloads come from fixed seeds, so
+# every run times the same bytes. Results are JSON; --baseline flags regressions.
+# Run from the repo root:
+#   python -m benchmarks.bench_suite --out base.json                  # quick matrix
+#   python -m benchmarks.bench_suite --preset full --out base.json
+#   python -m benchmarks.bench_suite --baseline base.json --out new.json   # exit 1 on regressions
+#   python -m benchmarks.bench_suite --results new.json --baseline base.json   # compare only
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from collections import namedtuple
+import numpy as np
+import logic
+import security
+from utils.riff import read_wav_info
+
+RATE = 44100
+SEED = 1234
+PASSWORD = "benchmark"
+# Frames generated per write when building covers (multi-hour covers never sit in memory)
+GEN_BLOCK_FRAMES = 1 << 20
+
+CoverSpec = namedtuple("CoverSpec", "channels sampwidth seconds")
+PayloadSpec = namedtuple("PayloadSpec", "entropy size")
+
+KB, MB = 1 << 10, 1 << 20
+
+# flags: (compress, use_encryption); compress as accepted by logic.hide_data
+PRESETS = {
+    "quick": {
+        "covers": [CoverSpec(2, 2, 30)],
+        "payloads": [PayloadSpec("text", 256 * KB), PayloadSpec("random", 256 * KB)],
+        "flags": [(False, False), ("auto", True)],
+        "crypto_sizes": [4 * MB],
+        "kdfs": ["pbkdf2"],
+    },
+    "full": {
+        "covers": [CoverSpec(1, 1, 60), CoverSpec(1, 2, 60), CoverSpec(2, 2, 60), CoverSpec(2, 3, 60),
+                   CoverSpec(2, 2, 600)],
+        "payloads": [PayloadSpec(entropy, size) for size in (64 * KB, 1 * MB, 8 * MB)
+                     for entropy in ("zeros", "text", "mixed", "random")],
+        "flags": [(False, False), (True, False), ("auto", False), (False, True), ("auto", True)],
+        "crypto_sizes": [1 * MB, 16 * MB, 64 * MB],
+        "kdfs": ["pbkdf2", "scrypt", "argon2id"],
+    },
+    "long": {
+        "covers": [CoverSpec(2, 2, 2 * 3600)],
+        "payloads": [PayloadSpec("text", 64 * MB), PayloadSpec("random", 64 * MB)],
+        "flags": [(False, False), ("auto", True)],
+        "crypto_sizes": [256 * MB],
+        "kdfs": [],
+    },
+}
+
+# --- Synthetic inputs ---
+def cover_name(spec):
+    return f"{spec.channels}ch-{spec.sampwidth * 8}bit-{spec.seconds}s"
+
+def make_cover(path, spec):
+    # Seeded noise; LSB work does not depend on what the samples sound like
+    rng = np.random.default_rng((SEED, spec.channels, spec.sampwidth))
+    frame_bytes = spec.channels * spec.sampwidth
+    remaining = spec.seconds * RATE
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(spec.channels)
+        w.setsampwidth(spec.sampwidth)
+        w.setframerate(RATE)
+        while remaining:
+            n = min(remaining, GEN_BLOCK_FRAMES)
+            w.writeframesraw(rng.integers(0, 256, n * frame_bytes, dtype=np.uint8).tobytes())
+            remaining -= n
+
+def cached_cover(workdir, spec):
+    path = os.path.join(workdir, f"cover-{cover_name(spec)}.wav")
+    try:
+        info = read_wav_info(path)
+        if info.nframes == spec.seconds * RATE: return path
+    except (OSError, ValueError):
+        pass
+    make_cover(path, spec)
+    return path
+
+_WORDS = [b"the", b"audio", b"secret", b"payload", b"of", b"and", b"header", b"sample", b"frame",
+          b"stego", b"a", b"to", b"bits", b"cover", b"data", b"is"]
+
+def make_payload(spec):
+    # zeros ~0 bits/byte, text ~4, mixed ~6 (alternating text and random blocks), random 8
+    rng = np.random.default_rng((SEED, spec.size))
+    if spec.entropy == "zeros": return bytes(spec.size)
+    if spec.entropy == "random": return rng.bytes(spec.size)
+    text = bytearray()
+    while len(text) < spec.size:
+        text += b" ".join(_WORDS[i] for i in rng.integers(0, len(_WORDS), 4096)) + b".\n"
+    if spec.entropy == "text": return bytes(text[:spec.size])
+    if spec.entropy == "mixed":
+        data = np.frombuffer(bytes(text[:spec.size]), dtype=np.uint8).copy()
+        block = 4 * KB
+        for start in range(block, spec.size, 2 * block):
+            end = min(start + block, spec.size)
+            data[start:end] = rng.integers(0, 256, end - start, dtype=np.uint8)
+        return data.tobytes()
+    raise ValueError(f"Unknown payload entropy: {spec.entropy}")
+
+def payload_name(spec):
+    size = f"{spec.size // MB}M" if spec.size >= MB else f"{spec.size // KB}K"
+    return f"{spec.entropy}-{size}"
+
+def flags_name(compress, use_encryption):
+    codec = {False: "store", True: "zlib-9"}.get(compress, compress)
+    return codec + ("+aes" if use_encryption else "")
+
+# --- Timing ---
+def timed(fn, repeat, setup=None):
+    runs = []
+    for _ in range(repeat):
+        if setup: setup()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+def result(name, runs, nbytes=None, **extra):
+    median = statistics.median(runs)
+    entry = {"name": name, "seconds": median, "min": min(runs), "runs": runs}
+    if nbytes is not None:
+        entry["bytes"] = nbytes
+        entry["mb_per_s"] = nbytes / MB / median if median else None
+    entry.update(extra)
+    return entry
+
+def _silent(*args):
+    pass
+
+def _fresh_keys():
+    # Repeats must pay for the KDF again instead of hitting the in-process key cache
+    security.key_cache.clear()
+
+# --- Benchmarks ---
+def bench_stego(workdir, preset, repeat, only=None):
+    results = []
+    out = os.path.join(workdir, "stego.wav")
+    for cover_spec in preset["covers"]:
+        cover = cached_cover(workdir, cover_spec)
+        for payload_spec in preset["payloads"]:
+            payload = make_payload(payload_spec)
+            for compress, use_encryption in preset["flags"]:
+                case = f"{cover_name(cover_spec)}/{payload_name(payload_spec)}/{flags_name(compress, use_encryption)}"
+                if only and only not in f"hide/{case}" and only not in f"extract/{case}": continue
+                if not logic.plan_capacity(cover, payload, compress, use_encryption).fits:
+                    print(f"skip {case}: payload does not fit the cover")
+                    continue
+                hide = lambda: logic.hide_data(cover, payload, "payload.bin", out, PASSWORD, compress,
+                                               use_encryption, _silent)
+                results.append(result(f"hide/{case}", timed(hide, repeat, _fresh_keys), len(payload)))
+                extracted = []
+                extract = lambda: extracted.append(logic.extract_data(out, PASSWORD, _silent)[0])
+                runs = timed(extract, repeat, _fresh_keys)
+                results.append(result(f"extract/{case}", runs, len(payload), ok=extracted[-1] == payload))
+                print_result(results[-2]); print_result(results[-1])
+    return results
+
+def bench_crypto(workdir, preset, repeat, only=None):
+    results = []
+    plain = os.path.join(workdir, "plain.bin")
+    sealed = os.path.join(workdir, "sealed.bin")
+    opened = os.path.join(workdir, "opened.bin")
+    for size in preset["crypto_sizes"]:
+        label = payload_name(PayloadSpec("random", size))
+        if only and only not in f"encrypt_file/{label}" and only not in f"decrypt_file/{label}": continue
+        with open(plain, 'wb') as f:
+            f.write(make_payload(PayloadSpec("random", size)))
+        # Both include one key derivation, like real use; derive_key/* below isolates it
+        runs = timed(lambda: security.encrypt_file(plain, sealed, PASSWORD), repeat, _fresh_keys)
+        results.append(result(f"encrypt_file/{label}", runs, size))
+        runs = timed(lambda: security.decrypt_file(sealed, opened, PASSWORD), repeat, _fresh_keys)
+        with open(plain, 'rb') as a, open(opened, 'rb') as b:
+            ok = a.read() == b.read()
+        results.append(result(f"decrypt_file/{label}", runs, size, ok=ok))
+        print_result(results[-2]); print_result(results[-1])
+    for algorithm in preset["kdfs"]:
+        name = f"derive_key/{algorithm}"
+        if only and only not in name: continue
+        if algorithm == "argon2id" and not security.ARGON2_AVAILABLE:
+            print(f"skip {name}: argon2-cffi is not installed")
+            continue
+        kdf = security.DEFAULT_KDFS[algorithm]
+        salt = bytes(security.SALT_SIZE)
+        runs = timed(lambda: security.derive_key(PASSWORD, salt, kdf), repeat, _fresh_keys)
+        results.append(result(name, runs, kdf=list(kdf)))
+        print_result(results[-1])
+    return results
+
+def print_result(entry):
+    rate = f"{entry['mb_per_s']:>9.1f} MB/s" if entry.get("mb_per_s") else ""
+    flag = "" if entry.get("ok", True) else "  MISMATCH"
+    print(f"{entry['name']:<58} {entry['seconds']:>9.4f} s {rate}{flag}")
+
+# --- Environment ---
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+def environment(preset_name, repeat):
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "preset": preset_name,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "git": _git_revision(),
+    }
+
+# --- Baseline comparison ---
+def compare(current, baseline, threshold, min_delta=0.005):
+    # Regression: slower by more than threshold (relative) and min_delta seconds (absolute noise floor)
+    base = {entry["name"]: entry for entry in baseline["results"]}
+    rows, regressions = [], 0
+    for entry in current["results"]:
+        old = base.pop(entry["name"], None)
+        if old is None:
+            rows.append((entry["name"], None, entry["seconds"], None, "new"))
+            continue
+        change = entry["seconds"] / old["seconds"] - 1 if old["seconds"] else 0.0
+        if change > threshold and entry["seconds"] - old["seconds"] > min_delta:
+            status = "REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((entry["name"], old["seconds"], entry["seconds"], change, status))
+    rows += [(name, old["seconds"], None, None, "missing") for name, old in base.items()]
+
+    print(f"\n{'benchmark':<58} {'baseline s':>11} {'current s':>10} {'change':>8}  status")
+    for name, old, new, change, status in rows:
+        old = f"{old:>11.4f}" if old is not None else f"{'-':>11}"
+        new = f"{new:>10.4f}" if new is not None else f"{'-':>10}"
+        change = f"{change * 100:>+7.1f}%" if change is not None else f"{'':>8}"
+        print(f"{name:<58} {old} {new} {change}  {status}")
+    print(f"{regressions} regression(s) above {threshold * 100:.0f}%")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Hide/extract/crypto benchmark matrix")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (the median is reported)")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this text")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous results file; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown counted as a regression")
+    parser.add_argument("--results", help="compare this results file instead of running the benchmarks")
+    parser.add_argument("--workdir", help="keep generated covers here and reuse them (default: temporary)")
+    args = parser.parse_args()
+
+    if args.results:
+        if not args.baseline: parser.error("--results needs --baseline")
+        with open(args.results, encoding='utf-8') as f:
+            current = json.load(f)
+    else:
+        preset = PRESETS[args.preset]
+        workdir = args.workdir or tempfile.mkdtemp(prefix="prostego-bench-")
+        os.makedirs(workdir, exist_ok=True)
+        try:
+            results = bench_stego(workdir, preset, args.repeat, args.only)
+            results += bench_crypto(workdir, preset, args.repeat, args.only)
+        finally:
+            if not args.workdir: shutil.rmtree(workdir, ignore_errors=True)
+        current = {"environment": environment(args.preset, args.repeat), "results": results}
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                json.dump(current, f, indent=1)
+        if not all(entry.get("ok", True) for entry in results):
+            print("round trip mismatch")
+            sys.exit(2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold): sys.exit(1)
+
+if __name__ == "__main__":
+    main()
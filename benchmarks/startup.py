@@ -0,0 +1,75 @@
+# benchmarks/startup.py
+# Cold-start import cost of the GUI: runs `python -X importtime -c "import main"` in fresh
+# interpreters and reports the median time per top-level package, plus which of the heavy
+# dependencies (that should only load on first use) were imported at startup anyway.
+# Results use the bench_suite format, so releases can be compared the same way:
+#   python -m benchmarks.startup --out startup.json
+#   python -m benchmarks.startup --baseline startup.json            # exit 1 on regressions
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.bench_suite import compare, environment
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Imported only by a preview, playback or the first hide/extract (customtkinter itself still
+# pulls in PIL for CTkImage)
+HEAVY = ("numpy", "PIL", "pygame", "pydub", "matplotlib", "Crypto", "argon2", "logic")
+
+def import_times(module):
+    # {top-level package: exclusive microseconds} and the total, for one fresh interpreter
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                         capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(f"import {module} failed:\n{out.stderr.strip().splitlines()[-1]}")
+    packages, total = {}, 0
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:"): continue
+        own, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not own.isdigit(): continue  # column header
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + int(own)
+        total += int(own)
+    return packages, total
+
+def measure(module, repeat):
+    import_times(module)  # warm-up: writes .pyc files and fills the OS cache
+    runs = [import_times(module) for _ in range(repeat)]
+    totals = [total for _, total in runs]
+    names = set().union(*(packages for packages, _ in runs))
+    packages = {name: statistics.median(packages.get(name, 0) for packages, _ in runs) for name in names}
+    return packages, statistics.median(totals)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time breakdown of the GUI startup")
+    parser.add_argument("--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters (the median is reported)")
+    parser.add_argument("--top", type=int, default=15, help="packages listed")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous results file; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    packages, total = measure(args.module, args.repeat)
+    ranked = sorted(packages.items(), key=lambda item: -item[1])
+    print(f"import {args.module}: {total / 1000:.1f} ms (median of {args.repeat})")
+    for name, us in ranked[:args.top]:
+        print(f"  {name:<24} {us / 1000:>8.1f} ms {us / total * 100:>5.1f}%")
+    loaded = [name for name in HEAVY if name in packages]
+    print(f"heavy packages at startup: {', '.join(loaded) if loaded else 'none'}")
+
+    results = [{"name": f"import {args.module}", "seconds": round(total / 1e6, 6), "heavy": loaded}]
+    results += [{"name": f"package {name}", "seconds": round(us / 1e6, 6)} for name, us in ranked[:args.top]]
+    current = {"environment": dict(environment("startup", args.repeat), module=args.module), "results": results}
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=1)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold): sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# compression.py
+# Payload codecs (stdlib only) and the "auto" choice between them. A codec spec is a
+# name from CODECS; only its id is recorded in the carrier, since decompression does
+# not depend on the level.
+import bz2
+import lzma
+import zlib
+from collections import namedtuple
+
+CODEC_STORE = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODEC_BZ2 = 3
+
+Codec = namedtuple("Codec", "name codec_id level")
+CODECS = {
+    "store": Codec("store", CODEC_STORE, 0),
+    "zlib-1": Codec("zlib-1", CODEC_ZLIB, 1),
+    "zlib-6": Codec("zlib-6", CODEC_ZLIB, 6),
+    "zlib-9": Codec("zlib-9", CODEC_ZLIB, 9),
+    "lzma": Codec("lzma", CODEC_LZMA, 6),
+    "bz2": Codec("bz2", CODEC_BZ2, 9),
+}
+LEGACY_CODEC = "zlib-9"  # what compress=True has always meant
+AUTO = "auto"
+
+# Every error a corrupted stream can raise from one of the decompressors
+DECOMPRESS_ERRORS = (zlib.error, lzma.LZMAError, OSError, EOFError)
+
+def resolve_codec(compress):
+    # compress: False / True / a codec name / "auto" (auto needs choose_codec)
+    if compress is False or compress is None or compress == 0: return CODECS["store"]
+    if compress is True or compress == 1: return CODECS[LEGACY_CODEC]
+    if compress not in CODECS: raise ValueError(f"Unknown codec: {compress}")
+    return CODECS[compress]
+
+# --- Text options (batch manifests, HTTP form fields) ---
+TRUE_VALUES = {"1", "true", "yes", "y", "on"}
+
+def parse_flag(value, default):
+    # Empty/missing -> default; "1", "true", "yes", "y", "on" (any case) -> True; anything else False
+    if value is None or value == "": return default
+    if isinstance(value, bool): return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+def parse_compress_arg(value):
+    # A codec name or "auto" is passed through; anything else is a true/false flag (default: compress)
+    name = str(value).strip().lower() if isinstance(value, str) else None
+    if name == AUTO or name in CODECS: return name
+    return parse_flag(value, True)
+
+def compressor(codec):
+    if codec.codec_id == CODEC_ZLIB: return zlib.compressobj(codec.level)
+    if codec.codec_id == CODEC_LZMA: return lzma.LZMACompressor(preset=codec.level)
+    if codec.codec_id == CODEC_BZ2: return bz2.BZ2Compressor(codec.level)
+    raise ValueError(f"Codec {codec.name} does not compress.")
+
+def decompressor(codec_id):
+    if codec_id == CODEC_ZLIB: return zlib.decompressobj()
+    if codec_id == CODEC_LZMA: return lzma.LZMADecompressor()
+    if codec_id == CODEC_BZ2: return bz2.BZ2Decompressor()
+    raise ValueError("Unknown compression codec (Data corrupted).")
+
+def compressed_size(codec, samples):
+    # Size of the samples compressed as one stream
+    if codec.codec_id == CODEC_STORE: return sum(len(sample) for sample in samples)
+    comp = compressor(codec)
+    return sum(len(comp.compress(sample)) for sample in samples) + len(comp.flush())
+
+# --- Auto selection ---
+# Above this many bits per byte the payload is already compressed or encrypted
+STORE_ENTROPY = 7.9
+# A quick zlib-1 trial on the samples decides between store, the fast level and a normal one
+STORE_RATIO = 0.97
+FAST_RATIO = 0.85
+
+def byte_entropy(samples):
+    # NumPy is imported here so that the GUI can list the codecs without loading it at startup
+    import numpy as np
+    counts = np.zeros(256, dtype=np.int64)
+    for sample in samples:
+        counts += np.bincount(np.frombuffer(sample, dtype=np.uint8), minlength=256)
+    total = counts.sum()
+    if not total: return 0.0
+    p = counts[counts > 0] / total
+    return float(-(p * np.log2(p)).sum())
+
+def choose_codec(samples):
+    # Returns (codec, entropy) for payload samples (see logic._payload_samples)
+    entropy = byte_entropy(samples)
+    total = sum(len(sample) for sample in samples)
+    if not total or entropy >= STORE_ENTROPY:
+        return CODECS["store"], entropy
+    ratio = compressed_size(CODECS["zlib-1"], samples) / total
+    if ratio >= STORE_RATIO: return CODECS["store"], entropy
+    if ratio >= FAST_RATIO: return CODECS["zlib-1"], entropy
+    return CODECS["zlib-6"], entropy
+
+class CompressionReport:
+    """What the codec layer chose and how it did; filled in while the payload streams."""
+    def __init__(self, codec, entropy=None):
+        self.codec = codec
+        self.entropy = entropy
+        self.input_size = 0
+        self.output_size = 0
+        self.seconds = 0.0
+
+    @property
+    def ratio(self):
+        return self.output_size / self.input_size if self.input_size else 1.0
+
+    @property
+    def throughput(self):
+        # MB/s of input through the compressor
+        return self.input_size / (1 << 20) / self.seconds if self.seconds else float('inf')
+
+    def __str__(self):
+        chosen = f"{self.codec.name} (auto, entropy {self.entropy:.2f} bits/byte)" if self.entropy is not None else self.codec.name
+        if self.codec.codec_id == CODEC_STORE: return f"Compression: {chosen}, payload stored as is"
+        return (f"Compression: {chosen}, {self.input_size:,} -> {self.output_size:,} bytes ({self.ratio * 100:.1f}%), "
+                f"{self.throughput:.1f} MB/s")
@@ -0,0 +1,239 @@
+# header.py
+# Stego header formats. The header sits at the start of the frame data, one bit per frame
+# byte (in sample mode: one bit in the low byte of each sample, so 16/24/32-bit samples keep
+# their upper bytes); the payload region follows it.
+#   v1: flags(1) + filename zero-padded to 255 + original size(4) + payload size(4) = 264 bytes
+#   v2: "PSG2" + version(1) + flags(1) [+ codec(1)] + varint original size + varint payload size
+#       + varint name length + name + CRC32(4) over everything before it
+import zlib
+from collections import namedtuple
+from lsb import BYTE_REGION, Region, region_end, sample_region
+from compression import CODEC_STORE, CODEC_ZLIB
+
+HEADER_SIZE = 264  # v1
+MAGIC_V2 = b"PSG2"
+HEADER_VERSION = 2
+# Streaming hides reserve padded varints of this width and back-patch them (up to 4 TiB)
+SIZE_FIELD_WIDTH = 6
+MAX_NAME_BYTES = 1024
+# Longest fixed part of a v2 header: magic, version, flags, codec and three 10-byte varints
+_V2_PREFIX = len(MAGIC_V2) + 3 + 3 * 10
+
+# Flag bits: 0 compressed, 1 encrypted, 2-4 bits per sample - 1, 5 sample mode,
+# 6 container, 7 codec byte follows the flags (v2 only; without it compressed means zlib)
+FLAG_COMPRESSED = 1
+FLAG_ENCRYPTED = 2
+FLAG_SAMPLE_MODE = 1 << 5
+FLAG_CONTAINER = 1 << 6
+FLAG_CODEC = 1 << 7
+KNOWN_FLAGS_V1 = 0x3F
+
+NOT_STEGO = "No hidden data found (not a stego file)."
+
+Header = namedtuple("Header", "filename original_size payload_size flags size region codec")
+
+def sample_flags(bits_per_sample):
+    # None keeps the original layout (1 bit in every frame byte)
+    if bits_per_sample is None: return 0
+    if not 1 <= bits_per_sample <= 8:
+        raise ValueError(f"Bits per sample must be between 1 and 8, not {bits_per_sample}.")
+    return FLAG_SAMPLE_MODE | (bits_per_sample - 1) << 2
+
+def header_region(flags, sampwidth):
+    # Layout of the (v2) header itself
+    if flags & FLAG_SAMPLE_MODE: return Region(0, 1, sampwidth)
+    return BYTE_REGION
+
+def payload_region(flags, sampwidth, header_size=HEADER_SIZE, header=BYTE_REGION):
+    # The payload follows the header (laid out as header) in the layout the flags select.
+    # Sample-mode carriers written before the header moved to the sample layout use BYTE_REGION.
+    if not flags & FLAG_SAMPLE_MODE:
+        return Region(header_size * 8, 1, 1)
+    return sample_region(region_end(header, header_size), sampwidth, (flags >> 2 & 7) + 1)
+
+# --- Varints (LEB128; padded forms keep a fixed width for back-patching) ---
+def encode_varint(value, width=None):
+    out = bytearray()
+    while True:
+        out.append(value & 0x7F)
+        value >>= 7
+        if not value and (width is None or len(out) >= width): break
+        out[-1] |= 0x80
+    if width is not None and len(out) > width:
+        raise ValueError("Payload is too large for the header.")
+    return bytes(out)
+
+def decode_varint(data, pos):
+    value = shift = 0
+    for i in range(pos, min(pos + 10, len(data))):
+        value |= (data[i] & 0x7F) << shift
+        shift += 7
+        if not data[i] & 0x80: return value, i + 1
+    raise ValueError("Invalid header.")
+
+# --- Codec field ---
+def codec_flags(flags, codec_id):
+    # Flags and codec bytes for a payload compressed with codec_id; zlib needs no codec byte
+    flags &= ~(FLAG_COMPRESSED | FLAG_CODEC)
+    if codec_id == CODEC_STORE: return bytes([flags])
+    if codec_id == CODEC_ZLIB: return bytes([flags | FLAG_COMPRESSED])
+    return bytes([flags | FLAG_COMPRESSED | FLAG_CODEC, codec_id])
+
+def _read_codec(flags, data, pos):
+    # Returns (codec id, next pos)
+    if flags & FLAG_CODEC: return data[pos], pos + 1
+    return (CODEC_ZLIB if flags & FLAG_COMPRESSED else CODEC_STORE), pos
+
+# --- Writing ---
+def create_header(secret_filename, original_size, final_payload_size, flags):
+    filename_bytes = secret_filename.encode('utf-8')
+    header = flags.to_bytes(1, 'big')
+    header += filename_bytes.ljust(255, b'\0')
+    header += original_size.to_bytes(4, 'big')
+    header += final_payload_size.to_bytes(4, 'big')
+    return header
+
+def create_header_v2(secret_filename, original_size, final_payload_size, flags, size_width=None, codec=None):
+    # codec: compression codec id (None: zlib if flags say compressed)
+    name = secret_filename.encode('utf-8')
+    if len(name) > MAX_NAME_BYTES:
+        raise ValueError("Filename is too long.")
+    if codec is None: codec = _read_codec(flags, b"", 0)[0]
+    header = bytearray(MAGIC_V2)
+    header += bytes([HEADER_VERSION]) + codec_flags(flags, codec)
+    header += encode_varint(original_size, size_width)
+    header += encode_varint(final_payload_size, size_width)
+    header += encode_varint(len(name)) + name
+    header += zlib.crc32(header).to_bytes(4, 'big')
+    return bytes(header)
+
+def header_v2_size(secret_filename, size_width=SIZE_FIELD_WIDTH, codec=CODEC_STORE):
+    return len(create_header_v2(secret_filename, 0, 0, 0, size_width, codec))
+
+# --- Reading ---
+def read_header(read, capacity=None, sampwidth=1):
+    """Decodes the header of a carrier. read(nbytes, pos[, region]) returns header bytes from the
+    carrier start (region only has to be supported when sampwidth > 1).
+
+    v2 is recognised from its magic (32 frame bytes, then 32 samples for a sample-mode
+    header); anything else must pass the v1 sanity checks, so non-carriers are rejected
+    instead of decoding noise. capacity is the carrier size in frame bytes (None skips the
+    size checks).
+    """
+    if not _fits(BYTE_REGION, len(MAGIC_V2), capacity):
+        raise ValueError("Stego file is too small.")
+    data = bytes(read(len(MAGIC_V2), 0))
+    if data == MAGIC_V2:
+        return _read_v2(read, capacity, sampwidth, BYTE_REGION)
+    layout = header_region(FLAG_SAMPLE_MODE, sampwidth)
+    if sampwidth > 1 and _fits(layout, len(MAGIC_V2), capacity):
+        sample_read = lambda n, pos: read(n, pos, layout)
+        if bytes(sample_read(len(MAGIC_V2), 0)) == MAGIC_V2:
+            return _read_v2(sample_read, capacity, sampwidth, layout)
+    return _read_v1(read, capacity, sampwidth, data[0])
+
+def _read_v2(read, capacity, sampwidth, layout):
+    # layout: where the header was found (see header_region)
+    limit = _V2_PREFIX if capacity is None else min(_V2_PREFIX, capacity // (8 * layout.stride))
+    data = bytes(read(limit, 0))
+    if len(data) < len(MAGIC_V2) + 2: raise ValueError("Invalid header.")
+    version, flags = data[4], data[5]
+    if version != HEADER_VERSION:
+        raise ValueError(f"Unsupported header version {version}.")
+    if layout != BYTE_REGION and layout != header_region(flags, sampwidth): raise ValueError("Invalid header.")
+    codec, pos = _read_codec(flags, data, 6)
+    original_size, pos = decode_varint(data, pos)
+    payload_size, pos = decode_varint(data, pos)
+    name_len, pos = decode_varint(data, pos)
+    if name_len > MAX_NAME_BYTES: raise ValueError("Invalid header.")
+    size = pos + name_len + 4
+    if not _fits(layout, size, capacity): raise ValueError("Invalid header.")
+    if size > len(data): data += bytes(read(size - len(data), len(data)))
+    if len(data) < size: raise ValueError("Invalid header.")
+    if zlib.crc32(data[:size - 4]) != int.from_bytes(data[size - 4:size], 'big'):
+        raise ValueError("Header checksum mismatch (not a stego file or data corrupted).")
+    try:
+        filename = data[pos:pos + name_len].decode('utf-8')
+    except UnicodeDecodeError:
+        raise ValueError("Invalid header.")
+    region = payload_region(flags, sampwidth, size, layout)
+    if not _fits(region, payload_size, capacity):
+        raise ValueError("File corrupted.")
+    return Header(filename, original_size, payload_size, flags, size, region, codec)
+
+def _read_v1(read, capacity, sampwidth, flags):
+    # Fixed layout without magic or checksum: require what a real v1 writer always produced
+    if flags & ~KNOWN_FLAGS_V1: raise ValueError(NOT_STEGO)
+    if not _fits(Region(0, 1, 1), HEADER_SIZE, capacity):
+        raise ValueError("Stego file is too small.")
+    raw = bytes(read(HEADER_SIZE, 0))
+    if len(raw) < HEADER_SIZE: raise ValueError("Stego file is too small.")
+    name, _, padding = raw[1:256].partition(b'\0')
+    if padding.strip(b'\0'): raise ValueError(NOT_STEGO)
+    try:
+        filename = name.decode('utf-8')
+    except UnicodeDecodeError:
+        raise ValueError(NOT_STEGO)
+    original_size = int.from_bytes(raw[256:260], 'big')
+    payload_size = int.from_bytes(raw[260:264], 'big')
+    if not flags & (FLAG_COMPRESSED | FLAG_ENCRYPTED) and original_size != payload_size:
+        raise ValueError(NOT_STEGO)
+    try:
+        region = payload_region(flags, sampwidth)
+    except ValueError:
+        raise ValueError(NOT_STEGO)
+    if not _fits(region, payload_size, capacity): raise ValueError(NOT_STEGO)
+    return Header(filename, original_size, payload_size, flags, HEADER_SIZE, region,
+                  CODEC_ZLIB if flags & FLAG_COMPRESSED else CODEC_STORE)
+
+def _fits(region, nbytes, capacity):
+    return capacity is None or region_end(region, nbytes) <= capacity
+
+def decode_header(header_bytes):
+    # Header bytes from the start of the carrier (v1: exactly 264, v2: at least the header)
+    header_bytes = bytes(header_bytes)
+    header = read_header(lambda n, pos: header_bytes[pos:pos + n])
+    return (header.filename, header.original_size, header.payload_size,
+            bool(header.flags & FLAG_COMPRESSED), bool(header.flags & FLAG_ENCRYPTED))
+
+# --- Container table of contents ---
+# At the start of a container's payload region: length(4) + varint count + per entry
+# (varint name length, name, flags(1) [+ codec(1)], offset, original size, payload size
+# as padded varints) + CRC32(4). Offsets are payload-region bytes, so an entry can be
+# read without touching the others.
+Entry = namedtuple("Entry", "name flags offset original_size payload_size codec", defaults=(None,))
+
+def create_toc(entries):
+    body = bytearray(encode_varint(len(entries)))
+    for entry in entries:
+        name = entry.name.encode('utf-8')
+        if len(name) > MAX_NAME_BYTES:
+            raise ValueError("Filename is too long.")
+        codec = _read_codec(entry.flags, b"", 0)[0] if entry.codec is None else entry.codec
+        body += encode_varint(len(name)) + name + codec_flags(entry.flags, codec)
+        for value in (entry.offset, entry.original_size, entry.payload_size):
+            body += encode_varint(value, SIZE_FIELD_WIDTH)
+    toc = len(body).to_bytes(4, 'big') + body
+    return toc + zlib.crc32(toc).to_bytes(4, 'big')
+
+def read_toc(read, payload_size):
+    # read(nbytes, pos) returns bytes from the start of the payload region
+    if payload_size < 8: raise ValueError("Invalid table of contents.")
+    length = int.from_bytes(read(4, 0), 'big')
+    if length + 8 > payload_size: raise ValueError("Invalid table of contents.")
+    toc = bytes(read(length + 8, 0))
+    if zlib.crc32(toc[:-4]) != int.from_bytes(toc[-4:], 'big'):
+        raise ValueError("Table of contents checksum mismatch (data corrupted).")
+    count, pos = decode_varint(toc, 4)
+    entries = []
+    for _ in range(count):
+        name_len, pos = decode_varint(toc, pos)
+        name = toc[pos:pos + name_len].decode('utf-8')
+        flags = toc[pos + name_len]
+        codec, pos = _read_codec(flags, toc, pos + name_len + 1)
+        offset, pos = decode_varint(toc, pos)
+        original_size, pos = decode_varint(toc, pos)
+        size, pos = decode_varint(toc, pos)
+        if offset + size > payload_size: raise ValueError("File corrupted.")
+        entries.append(Entry(name, flags, offset, original_size, size, codec))
+    return entries
@@ -1,151 +1,566 @@
 # logic.py
-import wave
-import zlib
+import io
 import os
-import tempfile
-from security import encrypt_file, decrypt_file
-
-def create_header(secret_filename, original_size, final_payload_size, flags):
-    filename_bytes = secret_filename.encode('utf-8')
-    header = flags.to_bytes(1, 'big')
-    header += filename_bytes.ljust(255, b'\0')
-    header += original_size.to_bytes(4, 'big')
-    header += final_payload_size.to_bytes(4, 'big')
-    return header
-
-def parse_header(stego_frames):
-    header_bytes_to_read = 264
-    if len(stego_frames) < header_bytes_to_read * 8:
-        raise ValueError("Stego file is too small.")
-    header_bits = ''.join(str(frame & 1) for frame in stego_frames[:header_bytes_to_read * 8])
-    header_bytes = bytearray(int(header_bits[i:i+8], 2) for i in range(0, len(header_bits), 8))
-    
-    flags = header_bytes[0]
-    is_compressed = (flags & 1) == 1
-    is_encrypted = (flags & 2) == 2
-    filename = header_bytes[1:256].rstrip(b'\0').decode('utf-8')
-    original_size = int.from_bytes(header_bytes[256:260], 'big')
-    final_payload_size = int.from_bytes(header_bytes[260:264], 'big')
-    return filename, original_size, final_payload_size, is_compressed, is_encrypted
-
-def hide_data(cover_path, secret_data, secret_filename, output_path, password, compress, use_encryption, progress_callback):
-    temp_in_path, temp_out_path = None, None
-    try:
-        progress_callback("Processing secret data...", 0.1)
-        original_size = len(secret_data)
-        flags = 0
-        
-        with tempfile.NamedTemporaryFile(delete=False) as temp_in_file:
-            temp_in_path = temp_in_file.name
-            if compress:
-                progress_callback("Compressing data...", 0.2)
-                secret_data = zlib.compress(secret_data, level=9)
-                flags |= 1
-            temp_in_file.write(secret_data)
-
-        if use_encryption:
-            progress_callback("Encrypting data (Auto-AES)...", 0.3)
-            with tempfile.NamedTemporaryFile(delete=False) as temp_out_file:
-                temp_out_path = temp_out_file.name
-            # Use the provided internal password
-            encrypt_file(temp_in_path, temp_out_path, password)
-            file_to_hide_path = temp_out_path
-            flags |= 2
+from collections import namedtuple
+from contextlib import ExitStack, contextmanager
+from security import SegmentedEncryptor, SegmentedReader, Decryptor, SALT_SIZE, encrypted_size
+from lsb import extract_lsb, patch_lsb, LSBWriter, LSBReader, DEFAULT_BLOCK_FRAMES, BYTE_REGION, group_size, slot_offset
+from utils.riff import read_wav_info
+from header import (HEADER_SIZE, SIZE_FIELD_WIDTH, FLAG_COMPRESSED, FLAG_ENCRYPTED, FLAG_CONTAINER, Entry,
+                    sample_flags, header_region, payload_region, create_header, create_header_v2, header_v2_size, read_header,
+                    decode_header, create_toc, read_toc)
+from sharding import ShardPool
+from compression import (AUTO, CODECS, CODEC_STORE, CODEC_ZLIB, DECOMPRESS_ERRORS, CompressionReport, choose_codec,
+                         compressed_size, resolve_codec)
+from pipeline import (CHUNK_SIZE, read_source, ByteCounter, compress_stage, encrypt_stage, embed_stage,
+                      read_payload, decrypt_stage, decompress_stage, limit_stage)
+from metrics import collect, measure, measure_stage, timed
+
+def parse_header(stego_frames, sampwidth=1):
+    # Header of an in-memory frame buffer (see LSBReader for files)
+    return read_header(lambda n, pos, region=BYTE_REGION: extract_lsb(stego_frames, n, slot_offset(region, pos),
+                                                                      region.bits, region.stride),
+                       len(stego_frames), sampwidth)
+
+# --- Capacity planning (RIFF header + a payload sample; nothing is embedded) ---
+CapacityPlan = namedtuple("CapacityPlan", "capacity payload_size estimated_size exact fits codec")
+PLAN_SAMPLES = 8
+PLAN_SAMPLE_SIZE = 64 * 1024
+
+def cover_capacity(cover_path, bits_per_sample=None, secret_filename="", codec_id=CODEC_STORE):
+    # Payload bytes the cover can carry behind the header, read from the WAV header alone
+    info = read_wav_info(cover_path)
+    frame_bytes = info.nframes * info.channels * info.sampwidth
+    header_size = header_v2_size(secret_filename, codec=codec_id)
+    flags = sample_flags(bits_per_sample)
+    region = payload_region(flags, info.sampwidth, header_size, header_region(flags, info.sampwidth))
+    if frame_bytes <= region.start: return 0
+    gbytes, gslots = group_size(region.bits)
+    slots = (frame_bytes - region.start - 1) // region.stride + 1
+    return slots // gslots * gbytes
+
+def _payload_samples(secret_data):
+    # (total size, list of evenly spaced samples); the whole payload when it is small
+    if isinstance(secret_data, (str, os.PathLike)):
+        with open(secret_data, 'rb') as f:
+            return _payload_samples(f)
+    if hasattr(secret_data, 'read'):
+        start = secret_data.tell()
+        size = secret_data.seek(0, os.SEEK_END) - start
+        samples = []
+        try:
+            for offset in _sample_offsets(size):
+                secret_data.seek(start + offset)
+                samples.append(secret_data.read(min(PLAN_SAMPLE_SIZE, size)))
+        finally:
+            secret_data.seek(start)
+        return size, samples
+    view = memoryview(secret_data).cast('B')
+    return len(view), [view[o:o + min(PLAN_SAMPLE_SIZE, len(view))] for o in _sample_offsets(len(view))]
+
+def _sample_offsets(size):
+    if size <= PLAN_SAMPLES * PLAN_SAMPLE_SIZE:
+        return range(0, size, PLAN_SAMPLE_SIZE)
+    span = size - PLAN_SAMPLE_SIZE
+    return [span * i // (PLAN_SAMPLES - 1) for i in range(PLAN_SAMPLES)]
+
+def estimate_payload_size(secret_data, compress, use_encryption, kdf=None):
+    # Returns (raw size, embedded size, exact, codec). Large payloads are compressed only
+    # in samples and the ratio extrapolated, so this stays in the milliseconds range.
+    size, samples = _payload_samples(secret_data)
+    exact = size <= PLAN_SAMPLES * PLAN_SAMPLE_SIZE
+    estimate, codec = _estimate_from_samples(size, samples, exact, compress, use_encryption, kdf)
+    return size, estimate, exact, codec
+
+def _estimate_from_samples(size, samples, exact, compress, use_encryption, kdf):
+    # exact: samples are the whole payload, in order
+    codec = choose_codec(samples)[0] if compress == AUTO else resolve_codec(compress)
+    estimate = size
+    if codec.codec_id != CODEC_STORE:
+        if exact:
+            estimate = compressed_size(codec, samples)
         else:
-            file_to_hide_path = temp_in_path
-
-        with open(file_to_hide_path, 'rb') as f:
-            final_payload_data = f.read()
-        final_payload_size = len(final_payload_data)
-
-        if os.path.exists(temp_in_path): os.remove(temp_in_path)
-        if use_encryption and temp_out_path and os.path.exists(temp_out_path): 
-            os.remove(temp_out_path)
-            
-        progress_callback("Creating header...", 0.4)
-        header = create_header(secret_filename, original_size, final_payload_size, flags)
-        data_to_hide = header + final_payload_data
-        
-        progress_callback("Reading cover audio...", 0.5)
-        with wave.open(cover_path, 'rb') as cover_audio:
-            params = cover_audio.getparams()
-            cover_frames = bytearray(cover_audio.readframes(cover_audio.getnframes()))
-        
-        if len(data_to_hide) * 8 > len(cover_frames):
-            raise ValueError("Cover audio is too small.")
-            
-        progress_callback("Hiding data...", 0.6)
-        bits_to_hide = ''.join(format(byte, '08b') for byte in data_to_hide)
-        
-        for i, bit in enumerate(bits_to_hide):
-            cover_frames[i] = (cover_frames[i] & 0b11111110) | int(bit)
-            if i % 50000 == 0:
-                progress_callback(f"Hiding... {int((i/len(bits_to_hide))*100)}%", 0.6 + 0.3 * (i / len(bits_to_hide)))
+            sampled = sum(len(sample) for sample in samples)
+            packed = sum(compressed_size(codec, [sample]) for sample in samples)
+            estimate = -(-size * packed // sampled) if sampled else 0
+    if use_encryption:
+        estimate = encrypted_size(estimate, kdf)
+    return estimate, codec
+
+def plan_capacity(cover_path, secret_data, compress, use_encryption, bits_per_sample=None, kdf=None, secret_filename=""):
+    # Fits / doesn't-fit verdict without touching the cover's audio data
+    size, estimate, exact, codec = estimate_payload_size(secret_data, compress, use_encryption, kdf)
+    capacity = cover_capacity(cover_path, bits_per_sample, secret_filename, codec.codec_id)
+    return CapacityPlan(capacity, size, estimate, exact, estimate <= capacity, codec)
+
+def plan_capacity_sampled(cover_path, size, samples, compress, use_encryption, bits_per_sample=None, kdf=None,
+                          secret_filename=""):
+    # For payloads only read in samples (e.g. a long text in the GUI): size is the (estimated)
+    # payload size and the plan is always approximate
+    estimate, codec = _estimate_from_samples(size, samples, False, compress, use_encryption, kdf)
+    capacity = cover_capacity(cover_path, bits_per_sample, secret_filename, codec.codec_id)
+    return CapacityPlan(capacity, size, estimate, False, estimate <= capacity, codec)
+
+def select_codec(secret_data, compress):
+    # (codec, entropy): compress is False / True / a codec name / "auto". Auto samples the
+    # payload (entropy + a quick trial); unseekable streams get zlib-6.
+    if compress != AUTO: return resolve_codec(compress), None
+    try:
+        _, samples = _payload_samples(secret_data)
+    except (OSError, AttributeError):
+        return CODECS["zlib-6"], None
+    return choose_codec(samples)
+
+# Below this, a process pool costs more than it saves
+SHARD_MIN_PAYLOAD = 4 * 1024 * 1024
+
+@contextmanager
+def _shard_pool(workers):
+    if workers <= 1:
+        yield None
+        return
+    with ShardPool(workers) as shards:
+        yield shards
 
+PreparedPayload = namedtuple("PreparedPayload", "path original_size payload_size flags codec")
+
+def _payload_stream(secret_data, password, compress, use_encryption, kdf, progress_callback, bits_per_sample=None,
+                    salt=None, choice=None):
+    # secret_data may be bytes or a binary file object; it is streamed through
+    # compress -> encrypt without ever being held whole in memory. choice: a (codec, entropy)
+    # pair from select_codec() made earlier. Returns (source, stream, flags, report).
+    source = ByteCounter(measure("read", read_source(secret_data)))
+    stream = source
+    flags = sample_flags(bits_per_sample)
+
+    if choice is None:
+        with timed("analyze"):
+            choice = select_codec(secret_data, compress)
+    report = CompressionReport(*choice)
+    if report.codec.codec_id != CODEC_STORE:
+        stream = measure_stage("compress", compress_stage, stream, report.codec, report)
+        flags |= FLAG_COMPRESSED
+
+    if use_encryption:
+        progress_callback("Deriving key (Auto-AES)...", 0.08)
+        # Use the provided internal password; segmented (AESGCMS1) so extraction can verify
+        # segment by segment, decrypt in parallel and read ranges
+        stream = measure_stage("encrypt", encrypt_stage, stream, SegmentedEncryptor(password, kdf, salt))
+        flags |= FLAG_ENCRYPTED
+    return source, stream, flags, report
+
+@contextmanager
+def _carrier_writer(cover_path, output_path, secret_filename, flags, progress_callback, block_frames, workers,
+                    codec_id=None):
+    # Yields (writer, region) with a placeholder header already written; sizes are not known
+    # until the payload has been streamed, so the header is back-patched afterwards
+    with _shard_pool(workers) as shards, \
+         LSBWriter(cover_path, output_path, block_frames * max(workers, 1),
+                   progress_callback=lambda msg, done: progress_callback(msg, 0.1 + 0.8 * done),
+                   shards=shards) as writer:
+        header = create_header_v2(secret_filename, 0, 0, flags, SIZE_FIELD_WIDTH, codec_id)
+        layout = header_region(flags, writer.params.sampwidth)
+        writer.set_region(layout)
+        writer.write(header)
+        region = payload_region(flags, writer.params.sampwidth, len(header), layout)
+        writer.set_region(region)
+        yield writer, region
         progress_callback("Writing output file...", 0.9)
-        with wave.open(output_path, 'wb') as stego_audio:
-            stego_audio.setparams(params)
-            stego_audio.writeframes(bytes(cover_frames))
-        progress_callback("Done!", 1.0)
 
-    except Exception as e:
-        if temp_in_path and os.path.exists(temp_in_path): os.remove(temp_in_path)
-        if temp_out_path and os.path.exists(temp_out_path): os.remove(temp_out_path)
-        raise e
+def _embed(stream, writer):
+    with timed("embed") as span:
+        size = embed_stage(stream, writer)
+        span.bytes_in += size
+    return size
+
+def _back_patch(output_path, patches):
+    # patches: (data, pos, region) triples rewritten in place; a failed patch leaves no output behind
+    try:
+        with timed("patch_header"):
+            for data, pos, region in patches:
+                patch_lsb(output_path, data, pos, region)
+    except Exception:
+        if os.path.exists(output_path): os.remove(output_path)
+        raise
+
+def _embed_stream(cover_path, stream, secret_filename, output_path, flags, original_size, progress_callback, block_frames,
+                  workers=1, codec_id=None):
+    # original_size may be a callable, evaluated once the stream has been drained
+    progress_callback("Hiding data...", 0.1)
+    with _carrier_writer(cover_path, output_path, secret_filename, flags, progress_callback, block_frames,
+                         workers, codec_id) as (writer, region):
+        final_payload_size = _embed(stream, writer)
+
+    progress_callback("Finalizing header...", 0.95)
+    if callable(original_size): original_size = original_size()
+    header = create_header_v2(secret_filename, original_size, final_payload_size, flags, SIZE_FIELD_WIDTH, codec_id)
+    _back_patch(output_path, [(header, 0, header_region(flags, writer.params.sampwidth))])
+    progress_callback("Done!", 1.0)
+
+def hide_data(cover_path, secret_data, secret_filename, output_path, password, compress, use_encryption, progress_callback,
+              block_frames=DEFAULT_BLOCK_FRAMES, kdf=None, workers=1, bits_per_sample=None, metrics=None):
+    # bits_per_sample: embed k bits in the low byte of every sample instead of 1 bit per frame byte.
+    # compress: False / True (zlib-9) / a codec name / "auto". Returns the CompressionReport.
+    # metrics: optional metrics.Metrics, filled with per-stage times and byte counts.
+    progress_callback("Processing secret data...", 0.05)
+    with collect(metrics, "hide") as run:
+        source, stream, flags, report = _payload_stream(secret_data, password, compress, use_encryption, kdf,
+                                                        progress_callback, bits_per_sample)
+        run.labels["codec"] = report.codec.name
+        _embed_stream(cover_path, stream, secret_filename, output_path, flags, lambda: source.count,
+                      progress_callback, block_frames, workers, report.codec.codec_id)
+    return report
+
+# --- Prepare once, embed many (one payload fanned out to several covers) ---
+def prepare_payload(secret_data, spool_path, password, compress, use_encryption, kdf=None, bits_per_sample=None):
+    # Runs compression/encryption once and spools the result to disk.
+    source, stream, flags, report = _payload_stream(secret_data, password, compress, use_encryption, kdf,
+                                                    lambda *a: None, bits_per_sample)
+    payload_size = 0
+    with open(spool_path, 'wb') as f:
+        for chunk in stream:
+            f.write(chunk)
+            payload_size += len(chunk)
+    return PreparedPayload(spool_path, source.count, payload_size, flags, report.codec.codec_id)
 
-def extract_data(stego_path, password, progress_callback):
-    temp_in_path, temp_out_path = None, None
+def hide_prepared(cover_path, prepared, secret_filename, output_path, progress_callback, block_frames=DEFAULT_BLOCK_FRAMES,
+                  workers=1, metrics=None):
+    with collect(metrics, "hide"), open(prepared.path, 'rb') as f:
+        _embed_stream(cover_path, measure("read", read_source(f)), secret_filename, output_path, prepared.flags,
+                      prepared.original_size, progress_callback, block_frames, workers, prepared.codec)
+
+def _payload_chunks(reader, region, pos, payload_size, original_size, flags, password, progress_callback, workers=1,
+                    codec_id=None):
+    # Streams payload bytes [pos, pos + payload_size) of region through decrypt -> decompress
+    # and yields the plaintext. codec_id: from the header / TOC entry (None: zlib if the flags say compressed)
+    stream = measure("extract", read_payload(reader, region, payload_size, CHUNK_SIZE * max(workers, 1), pos))
+    decrypted = None
+    if flags & FLAG_ENCRYPTED:
+        progress_callback("Decrypting (Auto-AES)...", 0.4)
+        stream = decrypted = measure_stage("decrypt", decrypt_stage, stream, Decryptor(password, workers))
+    if codec_id is None: codec_id = CODEC_ZLIB if flags & FLAG_COMPRESSED else CODEC_STORE
+    if codec_id != CODEC_STORE:
+        stream = measure_stage("decompress", decompress_stage, stream, codec_id)
+
+    # Reported per chunk, so callers can also use the callback to cancel between chunks
+    done = 0
     try:
-        progress_callback("Reading stego audio...", 0.1)
-        with wave.open(stego_path, 'rb') as stego_audio:
-            stego_frames = bytearray(stego_audio.readframes(stego_audio.getnframes()))
+        for chunk in limit_stage(stream, original_size):
+            done += len(chunk)
+            progress_callback(f"Extracting... {int(done / original_size * 100)}%", 0.4 + 0.55 * done / original_size)
+            yield chunk
+    except DECOMPRESS_ERRORS:
+        # Tampered ciphertext usually breaks the decompressor before the tag is reached; let the tag speak
+        if decrypted is not None:
+            for _ in decrypted: pass
+        raise ValueError("Decompression failed (Data corrupted).")
+
+def _decode_payload(reader, region, pos, payload_size, original_size, flags, password, progress_callback, workers=1,
+                    codec_id=None):
+    secret_data = bytearray()
+    for chunk in _payload_chunks(reader, region, pos, payload_size, original_size, flags, password, progress_callback,
+                                 workers, codec_id):
+        secret_data += chunk
+    return bytes(secret_data)
 
+def extract_data(stego_path, password, progress_callback, workers=1, metrics=None):
+    progress_callback("Reading stego audio...", 0.1)
+    # Only the header span and the payload span of the mapped file are touched
+    with collect(metrics, "extract"), _shard_pool(workers) as shards, LSBReader(stego_path) as reader:
         progress_callback("Parsing header...", 0.25)
-        filename, original_size, final_payload_size, is_compressed, is_encrypted = parse_header(stego_frames)
-        
-        header_size_bytes = 264
+        # v2 carriers are recognised (and non-carriers rejected) from the first 32 frame bytes
+        with timed("read_header"):
+            header = read_header(reader.read, reader.capacity, reader.info.sampwidth)
+        if header.flags & FLAG_CONTAINER:
+            raise ValueError("This file holds several files; extract them to a folder.")
+        reader.shards = None if header.payload_size < SHARD_MIN_PAYLOAD else shards
+
         progress_callback("Extracting bits...", 0.4)
-        
-        bits_to_extract = final_payload_size * 8
-        if (header_size_bytes * 8 + bits_to_extract) > len(stego_frames):
-             raise ValueError("File corrupted.")
-
-        start_idx = header_size_bytes * 8
-        end_idx = start_idx + bits_to_extract
-        extracted_bits = ''.join(str(stego_frames[i] & 1) for i in range(start_idx, end_idx))
-
-        progress_callback("Reconstructing payload...", 0.7)
-        extracted_payload = bytearray(int(extracted_bits[i:i+8], 2) for i in range(0, len(extracted_bits), 8))
-
-        with tempfile.NamedTemporaryFile(delete=False) as temp_in_file:
-            temp_in_path = temp_in_file.name
-            temp_in_file.write(extracted_payload)
-
-        if is_encrypted:
-            progress_callback("Decrypting (Auto-AES)...", 0.8)
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.dec') as temp_out_file:
-                temp_out_path = temp_out_file.name
-            
-            decrypt_file(temp_in_path, temp_out_path, password)
-            processed_file_path = temp_out_path
-        else:
-            processed_file_path = temp_in_path
+        secret_data = _decode_payload(reader, header.region, 0, header.payload_size, header.original_size, header.flags,
+                                      password, progress_callback, workers, header.codec)
+
+    progress_callback("Done!", 1.0)
+    return secret_data, header.filename
+
+# --- Multi-file containers ---
+# The payload region holds a table of contents followed by the entries back to back.
+# Each entry is compressed/encrypted on its own, so one can be read without the others.
+def collect_files(directory):
+    # (archive name, path) for every file below directory, with '/' separators
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            files.append((os.path.relpath(path, directory).replace(os.sep, '/'), path))
+    return files
 
-        with open(processed_file_path, 'rb') as f:
-            secret_data = f.read()
+def hide_files(cover_path, files, output_path, password, compress, use_encryption, progress_callback, archive_name="",
+               block_frames=DEFAULT_BLOCK_FRAMES, kdf=None, workers=1, bits_per_sample=None, metrics=None):
+    # files: a directory, or a list of paths / (name, source) pairs (source: path, bytes or file object)
+    if isinstance(files, (str, os.PathLike)):
+        archive_name = archive_name or os.path.basename(os.path.normpath(files))
+        files = collect_files(files)
+    files = [(os.path.basename(f), f) if isinstance(f, (str, os.PathLike)) else f for f in files]
+    if not files: raise ValueError("No files to hide.")
+    flags = sample_flags(bits_per_sample) | FLAG_CONTAINER
+    with collect(metrics, "hide_files"):
+        # One salt for the whole archive: the key is derived once, every entry still has its own nonce
+        salt = os.urandom(SALT_SIZE)
 
-        if os.path.exists(temp_in_path): os.remove(temp_in_path)
-        if is_encrypted and temp_out_path and os.path.exists(temp_out_path): os.remove(temp_out_path)
+        # Codecs are chosen up front: the codec byte is part of the reserved table's size
+        with timed("analyze"):
+            choices = [select_codec(source, compress) for _, source in files]
 
-        if is_compressed:
-            progress_callback("Decompressing...", 0.9)
-            secret_data = zlib.decompress(secret_data)
-        
-        secret_data = secret_data[:original_size]
+        progress_callback("Hiding files...", 0.1)
+        entries = []
+        with _carrier_writer(cover_path, output_path, archive_name, flags, progress_callback, block_frames,
+                             workers) as (writer, region):
+            # Offsets and sizes are only known afterwards: reserve the table, back-patch it below
+            toc_size = len(create_toc([Entry(name, 0, 0, 0, 0, codec.codec_id)
+                                       for (name, _), (codec, _) in zip(files, choices)]))
+            writer.write(bytes(toc_size))
+            offset = toc_size
+            for (name, source), choice in zip(files, choices):
+                counter, stream, entry_flags, report = _payload_stream(source, password, compress, use_encryption, kdf,
+                                                                       lambda *a: None, salt=salt, choice=choice)
+                size = _embed(stream, writer)
+                entries.append(Entry(name, entry_flags, offset, counter.count, size, report.codec.codec_id))
+                offset += size
+
+        progress_callback("Finalizing header...", 0.95)
+        header = create_header_v2(archive_name, sum(e.original_size for e in entries), offset, flags, SIZE_FIELD_WIDTH)
+        _back_patch(output_path, [(create_toc(entries), 0, region),
+                                  (header, 0, header_region(flags, writer.params.sampwidth))])
         progress_callback("Done!", 1.0)
-        return secret_data, filename
+    return entries
+
+def _read_container(reader):
+    with timed("read_header"):
+        header = read_header(reader.read, reader.capacity, reader.info.sampwidth)
+        if not header.flags & FLAG_CONTAINER:
+            return header, None
+        return header, read_toc(lambda n, pos: reader.read(n, pos, header.region), header.payload_size)
+
+def list_entries(stego_path):
+    # Reads only the header and the table of contents
+    with LSBReader(stego_path) as reader:
+        header, entries = _read_container(reader)
+    if entries is None:
+        raise ValueError("This file holds a single hidden file, not a container.")
+    return entries
+
+def _find_entry(entries, entry):
+    if isinstance(entry, int):
+        if not 0 <= entry < len(entries): raise ValueError(f"No entry #{entry}.")
+        return entries[entry]
+    for candidate in entries:
+        if candidate.name == entry: return candidate
+    raise ValueError(f"No entry named '{entry}'.")
+
+def extract_entry(stego_path, entry, password, progress_callback, workers=1, metrics=None):
+    # entry: name or index. Only that entry's bit range is read and decrypted.
+    progress_callback("Reading stego audio...", 0.1)
+    with collect(metrics, "extract"), _shard_pool(workers) as shards, LSBReader(stego_path) as reader:
+        header, entries = _read_container(reader)
+        if entries is None:
+            raise ValueError("This file holds a single hidden file, not a container.")
+        entry = _find_entry(entries, entry)
+        reader.shards = None if entry.payload_size < SHARD_MIN_PAYLOAD else shards
+
+        progress_callback(f"Extracting {entry.name}...", 0.4)
+        data = _decode_payload(reader, header.region, entry.offset, entry.payload_size, entry.original_size,
+                               entry.flags, password, progress_callback, workers, entry.codec)
+    progress_callback("Done!", 1.0)
+    return data, entry.name
+
+def _output_path(root, name):
+    # Entry names come from the carrier: never let them escape the output folder
+    path = os.path.abspath(os.path.join(root, *name.split('/')))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"Unsafe entry name '{name}'.")
+    return path
+
+def _write_output(path, chunks):
+    # Streams chunks to path through a temporary file next to it: a failed or tampered payload
+    # (detected at its end) leaves no partial file behind
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp = os.path.join(directory, f".{os.urandom(6).hex()}.part")
+    try:
+        # open() rather than mkstemp(): the published file gets the usual umask-based mode, not 0600
+        with timed("write") as span, open(temp, 'xb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                span.bytes_in += len(chunk)
+        os.replace(temp, path)
+    finally:
+        if os.path.exists(temp): os.remove(temp)
+    return path
+
+def extract_all(stego_path, output_dir, password, progress_callback, workers=1, metrics=None):
+    # Writes every hidden file below output_dir (a single-file carrier gives one file); returns the paths
+    root = os.path.abspath(output_dir)
+    with collect(metrics, "extract"):
+        return _extract_all(stego_path, root, password, progress_callback, workers)
 
-    except Exception as e:
-        if temp_in_path and os.path.exists(temp_in_path): os.remove(temp_in_path)
-        if temp_out_path and os.path.exists(temp_out_path): os.remove(temp_out_path)
-        raise e
\ No newline at end of file
+def _extract_all(stego_path, root, password, progress_callback, workers):
+    with _shard_pool(workers) as shards, LSBReader(stego_path) as reader:
+        header, entries = _read_container(reader)
+        if entries is not None:
+            paths = []
+            for n, entry in enumerate(entries):
+                path = _output_path(root, entry.name)
+                message, value = f"Extracting {entry.name}...", 0.1 + 0.85 * n / len(entries)
+                progress_callback(message, value)
+                # Per-chunk ticks keep the entry's message (and cancellation points) without moving the bar
+                entry_progress = lambda *_, message=message, value=value: progress_callback(message, value)
+                reader.shards = None if entry.payload_size < SHARD_MIN_PAYLOAD else shards
+                chunks = _payload_chunks(reader, header.region, entry.offset, entry.payload_size, entry.original_size,
+                                         entry.flags, password, entry_progress, workers, entry.codec)
+                paths.append(_write_output(path, chunks))
+            progress_callback("Done!", 1.0)
+            return paths
+
+        progress_callback("Extracting bits...", 0.4)
+        reader.shards = None if header.payload_size < SHARD_MIN_PAYLOAD else shards
+        path = _output_path(root, os.path.basename(header.filename) or "extracted.bin")
+        _write_output(path, _payload_chunks(reader, header.region, 0, header.payload_size, header.original_size,
+                                            header.flags, password, progress_callback, workers, header.codec))
+    progress_callback("Done!", 1.0)
+    return [path]
+
+# --- Streaming extraction ---
+class StegoReader(io.RawIOBase):
+    """Read-only file object over a hidden file, decoded from the carrier as it is read.
+
+    Sequential reads stream through decrypt -> decompress once, so the payload is never held
+    in memory. Seeking forward decodes and drops the bytes in between; seeking back restarts
+    the stream, except for unencrypted uncompressed payloads, which are read in place.
+    Encrypted payloads are authenticated by the read that reaches the end (see extract_to).
+    entry: name or index of a container entry (required for containers).
+    """
+    def __init__(self, stego_path, password, entry=None, progress_callback=None, workers=1):
+        super().__init__()
+        self._progress = progress_callback or (lambda *a: None)
+        self._stack = ExitStack()
+        try:
+            shards = self._stack.enter_context(_shard_pool(workers))
+            reader = self._stack.enter_context(LSBReader(stego_path))
+            header, entries = _read_container(reader)
+            if entries is None:
+                if entry is not None: raise ValueError("This file holds a single hidden file, not a container.")
+                item = Entry(header.filename, header.flags, 0, header.original_size, header.payload_size, header.codec)
+            else:
+                if entry is None: raise ValueError("This file holds several files; extract them to a folder.")
+                item = _find_entry(entries, entry)
+            reader.shards = None if item.payload_size < SHARD_MIN_PAYLOAD else shards
+        except BaseException:
+            self._stack.close()
+            raise
+        self.filename = item.name
+        self.size = item.original_size
+        self._open_stream = lambda: _payload_chunks(reader, header.region, item.offset, item.payload_size, item.original_size,
+                                                    item.flags, password, self._progress, workers, item.codec)
+        self._direct = None
+        if not item.flags & (FLAG_COMPRESSED | FLAG_ENCRYPTED):
+            self._direct = lambda n, pos: reader.read(n, item.offset + pos, header.region)
+        self._pos = 0
+        self._stream = None      # plaintext chunks, positioned at _stream_pos + len(_chunk)
+        self._stream_pos = 0
+        self._chunk = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._checkClosed()
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self.size}[whence]
+        if base + offset < 0: raise ValueError("Negative seek position.")
+        self._pos = base + offset
+        return self._pos
+
+    def readinto(self, b):
+        self._checkClosed()
+        view = memoryview(b).cast('B')
+        n = min(len(view), self.size - self._pos)
+        if n <= 0: return 0
+        if self._direct:
+            with timed("extract") as span:
+                view[:n] = self._direct(n, self._pos)
+                span.bytes_out += n
+            self._pos += n
+            return n
+        if self._stream is None or self._stream_pos > self._pos:
+            if self._stream is not None: self._stream.close()
+            self._stream, self._stream_pos, self._chunk = self._open_stream(), 0, memoryview(b"")
+        # Fills the whole buffer (up to the end), unlike most raw streams
+        done = 0
+        while done < n:
+            skip = self._pos - self._stream_pos
+            if skip >= len(self._chunk):
+                self._stream_pos += len(self._chunk)
+                chunk = next(self._stream, None)
+                if chunk is None: raise ValueError("File corrupted.")  # shorter than its header says
+                self._chunk = memoryview(chunk)
+                continue
+            take = min(n - done, len(self._chunk) - skip)
+            view[done:done + take] = self._chunk[skip:skip + take]
+            self._stream_pos, self._chunk = self._pos + take, self._chunk[skip + take:]
+            self._pos += take
+            done += take
+        if self._stream_pos == self.size:
+            # Drain the stream: the decryptor checks the final tag when it runs dry
+            for _ in self._stream: pass
+        return n
+
+    def readall(self):
+        # Whole-chunk reads instead of io's small default buffer
+        chunks = []
+        while True:
+            chunk = self.read(CHUNK_SIZE)
+            if not chunk: return b"".join(chunks)
+            chunks.append(chunk)
+
+    def close(self):
+        if not self.closed:
+            if self._stream is not None: self._stream.close()
+            self._stack.close()
+        super().close()
+
+def extract_to(stego_path, output_path, password, progress_callback, entry=None, workers=1, metrics=None):
+    # Streams the hidden file (or a container entry) to output_path; returns its stored name.
+    # Nothing is left at output_path if extraction fails or the payload does not authenticate.
+    progress_callback("Reading stego audio...", 0.1)
+    with collect(metrics, "extract"), StegoReader(stego_path, password, entry, progress_callback, workers) as source:
+        progress_callback(f"Extracting {source.filename}..." if entry is not None else "Extracting bits...", 0.4)
+        _write_output(output_path, iter(lambda: source.read(CHUNK_SIZE), b""))
+    progress_callback("Done!", 1.0)
+    return source.filename
+
+# --- Partial extraction ---
+def extract_range(stego_path, start, length, password, entry=None):
+    # Plaintext bytes [start, start + length) of the payload (or of a container entry). Only
+    # the bits of the touched segments are read; compressed payloads have no random access.
+    with LSBReader(stego_path) as reader:
+        header, entries = _read_container(reader)
+        if entries is None:
+            if entry is not None: raise ValueError("This file holds a single hidden file, not a container.")
+            pos, size, flags = 0, header.payload_size, header.flags
+        else:
+            if entry is None: raise ValueError("Choose an entry of the container.")
+            found = _find_entry(entries, entry)
+            pos, size, flags = found.offset, found.payload_size, found.flags
+        if flags & FLAG_COMPRESSED:
+            raise ValueError("Random access is not possible for compressed payloads.")
+        read = lambda n, offset: reader.read(n, pos + offset, header.region)
+        if flags & FLAG_ENCRYPTED:
+            return SegmentedReader(read, size, password).read(start, length)
+        length = max(min(length, size - start), 0)
+        return bytes(read(length, start)) if length else b""
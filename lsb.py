@@ -0,0 +1,326 @@
+# lsb.py
+import os
+import math
+import mmap
+import wave
+from collections import namedtuple
+import numpy as np
+from utils.riff import read_wav_info
+from metrics import timed
+
+# Payload bytes handled per vectorized step (bounds the unpacked bit array to 8x this)
+EMBED_CHUNK = 4 * 1024 * 1024
+# Cover frames read/written per block by the streaming writer
+DEFAULT_BLOCK_FRAMES = 256 * 1024
+
+# --- Layout ---
+# A region says where a run of payload bytes lives in the frame data: slot i is
+# frame byte start + i * stride and carries `bits` low bits of the stream, MSB first.
+# Byte mode (1 bit, stride 1) is the original layout. Sample mode uses
+# stride = sampwidth, i.e. the least significant byte of each little-endian sample,
+# so the upper bytes of a sample are never touched and up to 8 bits fit per sample.
+Region = namedtuple("Region", "start bits stride")
+BYTE_REGION = Region(0, 1, 1)
+
+def group_size(bits):
+    # Smallest run of whole bytes that fills whole slots: (bytes, slots)
+    common = 8 * bits // math.gcd(8, bits)
+    return common // 8, common // bits
+
+def slot_offset(region, pos):
+    # Frame byte holding the first bit of payload byte pos (pos must be group aligned)
+    gbytes, gslots = group_size(region.bits)
+    return region.start + pos // gbytes * gslots * region.stride
+
+def region_end(region, nbytes):
+    # One past the last frame byte used by nbytes (rounded up to whole groups)
+    if nbytes <= 0: return region.start
+    gbytes, gslots = group_size(region.bits)
+    slots = -(-nbytes // gbytes) * gslots
+    return region.start + (slots - 1) * region.stride + 1
+
+def sample_region(min_start, sampwidth, bits):
+    # Payload region in sample mode, starting on an 8-sample boundary at or after min_start.
+    # The alignment keeps slot groups from straddling the writer's blocks.
+    if not 1 <= bits <= min(8, sampwidth * 4):
+        raise ValueError(f"{bits} bits per sample is not supported for {sampwidth * 8}-bit audio.")
+    align = 8 * sampwidth
+    return Region(-(-min_start // align) * align, bits, sampwidth)
+
+def _to_slots(chunk, bits):
+    if bits == 1: return np.unpackbits(chunk)
+    if bits == 8: return chunk
+    return np.packbits(np.unpackbits(chunk).reshape(-1, bits), axis=1).ravel() >> (8 - bits)
+
+def _from_slots(values, bits):
+    if bits == 1: return np.packbits(values & 1)
+    if bits == 8: return values
+    shifted = (values << (8 - bits)).astype(np.uint8)
+    return np.packbits(np.unpackbits(shifted[:, None], axis=1)[:, :bits].ravel())
+
+def embed_lsb(cover_frames, data, offset=0, progress_callback=None, bits=1, stride=1):
+    # cover_frames must be a writable buffer (bytearray / mmap). With the defaults, bit i
+    # of data goes into the LSB of byte offset + i, MSB first, exactly like the original loop.
+    # A trailing partial group is zero padded.
+    frames = np.frombuffer(cover_frames, dtype=np.uint8)
+    payload = np.frombuffer(data, dtype=np.uint8)
+    if region_end(Region(offset, bits, stride), payload.size) > frames.size:
+        raise ValueError("Cover audio is too small.")
+
+    gbytes, _ = group_size(bits)
+    mask = np.uint8((1 << bits) - 1)
+    step = EMBED_CHUNK - EMBED_CHUNK % gbytes
+    for start in range(0, payload.size, step):
+        chunk = payload[start:start + step]
+        if chunk.size % gbytes:
+            chunk = np.concatenate([chunk, np.zeros(-chunk.size % gbytes, dtype=np.uint8)])
+        values = _to_slots(chunk, bits)
+        pos = offset + start * 8 // bits * stride
+        target = frames[pos:pos + (values.size - 1) * stride + 1:stride]
+        np.bitwise_and(target, ~mask, out=target)
+        np.bitwise_or(target, values, out=target)
+        if progress_callback:
+            done = min(start + step, payload.size) / payload.size
+            progress_callback(f"Hiding... {int(done * 100)}%", done)
+
+def extract_lsb(stego_frames, nbytes, offset=0, bits=1, stride=1):
+    # Inverse of embed_lsb: gather the low bits of the slots and pack them MSB first.
+    frames = np.frombuffer(stego_frames, dtype=np.uint8)
+    if region_end(Region(offset, bits, stride), nbytes) > frames.size:
+        raise ValueError("File corrupted.")
+    gbytes, _ = group_size(bits)
+    padded = -(-nbytes // gbytes) * gbytes
+    out = bytearray(padded)
+    dst = np.frombuffer(out, dtype=np.uint8)
+    step = EMBED_CHUNK - EMBED_CHUNK % gbytes
+    for start in range(0, padded, step):
+        n = min(step, padded - start)
+        pos = offset + start * 8 // bits * stride
+        values = frames[pos:pos + (n * 8 // bits - 1) * stride + 1:stride]
+        dst[start:start + n] = _from_slots(values, bits)
+    del dst
+    del out[nbytes:]
+    return out
+
+# --- Streaming (constant-memory) embedding ---
+class LSBWriter:
+    """Copies a cover WAV to output_path block by block, embedding written bytes on the way.
+
+    Only one block of frames is held in memory at a time; frames past the end of the
+    payload are copied through untouched. Bytes go into the current region
+    (BYTE_REGION until set_region() moves on to a later one).
+    """
+    def __init__(self, cover_path, output_path, block_frames=DEFAULT_BLOCK_FRAMES, progress_callback=None, shards=None):
+        self.output_path = output_path
+        self.progress_callback = progress_callback
+        self.shards = shards  # optional sharding.ShardPool: blocks live in shared memory
+        self.cover = wave.open(cover_path, 'rb')
+        try:
+            self.params = self.cover.getparams()
+            self.out = wave.open(output_path, 'wb')
+        except Exception:
+            self.cover.close()
+            raise
+        self.out.setparams(self.params)
+        # Multiple of 8 so blocks hold whole slot groups in both byte and sample mode
+        self.block_frames = max(8, block_frames - block_frames % 8)
+        self.capacity = self.params.nframes * self.params.nchannels * self.params.sampwidth
+        self.block = bytearray()
+        self.block_start = 0
+        self.region = BYTE_REGION
+        self.pos = 0          # payload bytes written into the current region
+        self.pending = b""    # tail bytes that do not fill a whole slot group yet
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None: self.close()
+        else: self.abort()
+
+    def set_region(self, region):
+        self._flush_pending()
+        if region.start < region_end(self.region, self.pos):
+            raise ValueError("Regions must not overlap.")
+        self.region, self.pos = region, 0
+
+    def write(self, data):
+        data = memoryview(data).cast('B')
+        gbytes, _ = group_size(self.region.bits)
+        if self.pending:
+            take = gbytes - len(self.pending)
+            self.pending += bytes(data[:take])
+            data = data[take:]
+            if len(self.pending) < gbytes: return
+            self._embed(self.pending)
+            self.pending = b""
+        whole = len(data) - len(data) % gbytes
+        if whole: self._embed(data[:whole])
+        self.pending = bytes(data[whole:])
+
+    def _flush_pending(self):
+        if self.pending:
+            gbytes, _ = group_size(self.region.bits)
+            self._embed(self.pending.ljust(gbytes, b'\0'))
+            self.pending = b""
+
+    def _embed(self, data):
+        # len(data) is a whole number of slot groups
+        region = self.region
+        if region_end(region, self.pos + len(data)) > self.capacity:
+            raise ValueError("Cover audio is too small.")
+        gbytes, gslots = group_size(region.bits)
+        done = 0
+        while done < len(data):
+            frame_pos = slot_offset(region, self.pos)
+            while frame_pos >= self.block_start + len(self.block):
+                self._next_block()
+            offset = frame_pos - self.block_start
+            fit = ((len(self.block) - offset - 1) // region.stride + 1) // gslots
+            n = min(len(data) - done, fit * gbytes)
+            if n <= 0:
+                raise ValueError("Region is not aligned to the cover blocks.")
+            if self.shards:
+                self.shards.embed(data[done:done + n], offset, region.bits, region.stride)
+            else:
+                embed_lsb(memoryview(self.block)[offset:], data[done:done + n],
+                          bits=region.bits, stride=region.stride)
+            done += n
+            self.pos += n
+
+    def _next_block(self):
+        if self.block:
+            self._write(self.block)
+            self.block_start += len(self.block)
+        raw = self._read()
+        if not raw:
+            raise ValueError("Cover audio is too small.")
+        if self.shards:
+            self.block = self.shards.frames(len(raw))
+            self.block[:] = raw
+        else:
+            self.block = bytearray(raw)
+        self._report(self.block_start)
+
+    # Cover reads and output writes are their own stages in metrics.py
+    def _read(self):
+        with timed("read_cover") as span:
+            raw = self.cover.readframes(self.block_frames)
+            span.bytes_out += len(raw)
+        return raw
+
+    def _write(self, frames):
+        with timed("write") as span:
+            self.out.writeframesraw(frames)
+            span.bytes_in += len(frames)
+
+    def _report(self, processed):
+        # Progress is measured over the whole cover, tail copy included
+        if self.progress_callback and self.capacity:
+            done = processed / self.capacity
+            self.progress_callback(f"Hiding... {int(done * 100)}%", done)
+
+    def close(self):
+        # The last partial group can still overflow the cover here; any failure removes the output
+        try:
+            self._flush_pending()
+            processed = self.block_start + len(self.block)
+            if self.block:
+                self._write(self.block)
+            self._release_block()
+            # Tail: raw copy, no bit work
+            while True:
+                chunk = self._read()
+                if not chunk: break
+                self._write(chunk)
+                processed += len(chunk)
+                self._report(processed)
+            self.out.close()
+        except BaseException:
+            self.abort()
+            raise
+        self.cover.close()
+
+    def _release_block(self):
+        if isinstance(self.block, memoryview): self.block.release()
+        self.block = bytearray()
+
+    def abort(self):
+        self._release_block()
+        for f in (self.out, self.cover):
+            try: f.close()
+            except Exception: pass
+        if os.path.exists(self.output_path): os.remove(self.output_path)
+
+# --- Range-limited extraction ---
+class LSBReader:
+    """Memory-maps a stego WAV and decodes LSBs only from the frame ranges asked for.
+
+    I/O is proportional to what is read (header + payload), not to the carrier size.
+    """
+    def __init__(self, stego_path, shards=None):
+        self.path = stego_path
+        self.shards = shards  # optional sharding.ShardPool for large reads
+        self.info = read_wav_info(stego_path)
+        self.capacity = self.info.data_size
+        self.file = open(stego_path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def read(self, nbytes, pos=0, region=BYTE_REGION):
+        # Payload bytes [pos, pos + nbytes) of region; unaligned starts read from the group start
+        gbytes, _ = group_size(region.bits)
+        skip = pos % gbytes
+        span = nbytes + skip
+        start = slot_offset(region, pos - skip)
+        end = region_end(Region(start, region.bits, region.stride), span)
+        if end > self.capacity:
+            raise ValueError("File corrupted.")
+        if self.shards:
+            data = self.shards.extract(span, start, region.bits, region.stride,
+                                       path=self.path, data_offset=self.info.data_offset)
+        else:
+            frames = np.frombuffer(self.map, dtype=np.uint8, count=end - start,
+                                   offset=self.info.data_offset + start)
+            data = extract_lsb(frames, span, bits=region.bits, stride=region.stride)
+            del frames
+        if skip: del data[:skip]
+        return data
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+def patch_lsb(stego_path, data, pos=0, region=BYTE_REGION):
+    # Rewrites payload bytes [pos, pos + len(data)) of region in an already written WAV, in place
+    # (used to back-patch headers). Partial slot groups keep their neighbouring bytes.
+    info = read_wav_info(stego_path)
+    gbytes, _ = group_size(region.bits)
+    first = pos - pos % gbytes
+    last = -(-(pos + len(data)) // gbytes) * gbytes
+    start = slot_offset(region, first)
+    end = region_end(Region(start, region.bits, region.stride), last - first)
+    if end > info.data_size:
+        raise ValueError("Cover audio is too small.")
+    with open(stego_path, 'r+b') as f:
+        mapped = mmap.mmap(f.fileno(), 0)
+        try:
+            frames = np.frombuffer(mapped, dtype=np.uint8, count=end - start, offset=info.data_offset + start)
+            if first != pos or last != pos + len(data):
+                merged = extract_lsb(frames, last - first, bits=region.bits, stride=region.stride)
+                merged[pos - first:pos - first + len(data)] = data
+                data = merged
+            embed_lsb(frames, data, bits=region.bits, stride=region.stride)
+            del frames
+            mapped.flush()
+        finally:
+            mapped.close()
@@ -0,0 +1,213 @@
+# metrics.py
+# Per-stage wall time and byte counts for hide/extract runs. A Metrics object is made
+# active for the duration of a run (see collect()); the pipeline stages, the LSB writer and
+# the KDF report into whichever one is active, so nothing has to be threaded through every
+# call. Times are exclusive: a stage's seconds do not include the upstream stages it pulls
+# from, so the spans of one run add up to (about) its total.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_active = ContextVar("prostego_metrics", default=None)
+_clock = time.perf_counter
+
+class Span:
+    """Totals for one stage: exclusive seconds, bytes consumed/produced and how often it ran."""
+    __slots__ = ("name", "seconds", "bytes_in", "bytes_out", "calls")
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.calls = 0
+
+    @property
+    def throughput(self):
+        # MB/s of whichever side of the stage moved more bytes
+        moved = max(self.bytes_in, self.bytes_out)
+        return moved / (1 << 20) / self.seconds if self.seconds and moved else None
+
+    def as_dict(self):
+        return {"stage": self.name, "seconds": round(self.seconds, 6), "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out, "calls": self.calls}
+
+class _Discard:
+    # Stand-in for a Span when no Metrics is active
+    bytes_in = bytes_out = 0
+
+class Metrics:
+    """Stage spans of one operation ("hide", "extract", ...); pass to logic.hide_data(metrics=...)."""
+    def __init__(self, operation="", sinks=(), labels=None):
+        self.operation = operation
+        self.sinks = list(sinks)
+        self.labels = dict(labels or {})
+        self.spans = {}
+        self.started = None
+        self.seconds = 0.0
+        self.error = None
+        self._stack = []  # child seconds of the spans currently being timed
+
+    def span(self, name):
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = Span(name)
+        return span
+
+    def _enter(self):
+        self._stack.append(0.0)
+        return _clock()
+
+    def _leave(self, span, start):
+        elapsed = _clock() - start
+        span.seconds += elapsed - self._stack.pop()
+        span.calls += 1
+        if self._stack: self._stack[-1] += elapsed
+
+    def as_dict(self):
+        return {"operation": self.operation, "started": self.started, "seconds": round(self.seconds, 6),
+                "error": self.error, "labels": self.labels, "spans": [s.as_dict() for s in self.spans.values()]}
+
+    def emit(self):
+        record = self.as_dict()
+        for sink in self.sinks: sink.write(record)
+
+    def __str__(self):
+        lines = [f"{self.operation or 'run'}: {self.seconds:.3f} s"]
+        for s in sorted(self.spans.values(), key=lambda s: -s.seconds):
+            share = s.seconds / self.seconds * 100 if self.seconds else 0.0
+            rate = f"{s.throughput:9.1f} MB/s" if s.throughput else ""
+            lines.append(f"  {s.name:<12} {s.seconds:9.4f} s {share:5.1f}%  {s.bytes_in:>13,} -> {s.bytes_out:<13,} {rate}")
+        return "\n".join(lines)
+
+# --- Recording into the active Metrics ---
+@contextmanager
+def collect(metrics, operation):
+    """Makes metrics (or a fresh one) active for an operation, times it and feeds its sinks.
+
+    Nested operations (e.g. extract_all falling back to extract_data) with metrics=None
+    report into the enclosing run instead of starting their own.
+    """
+    if metrics is None and _active.get() is not None:
+        yield _active.get()
+        return
+    metrics = metrics if metrics is not None else Metrics(operation)
+    if not metrics.operation: metrics.operation = operation
+    token = _active.set(metrics)
+    metrics.started = time.time()
+    start = _clock()
+    try:
+        yield metrics
+    except BaseException as e:
+        metrics.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        metrics.seconds = _clock() - start
+        _active.reset(token)
+        metrics.emit()
+
+@contextmanager
+def timed(name):
+    # Times the block as stage name; set .bytes_in / .bytes_out on the yielded span
+    metrics = _active.get()
+    if metrics is None:
+        yield _Discard()
+        return
+    span = metrics.span(name)
+    start = metrics._enter()
+    try:
+        yield span
+    finally:
+        metrics._leave(span, start)
+
+def measure(name, chunks):
+    # Times every pull from an iterable of byte chunks and counts the bytes it yields
+    metrics = _active.get()
+    if metrics is None: return chunks
+    return _measured(metrics, metrics.span(name), iter(chunks))
+
+def measure_stage(name, stage, chunks, *args):
+    # measure() for a pipeline stage that is also told how many bytes went in
+    metrics = _active.get()
+    if metrics is None: return stage(chunks, *args)
+    span = metrics.span(name)
+    return _measured(metrics, span, iter(stage(_counted(span, chunks), *args)))
+
+def _counted(span, chunks):
+    for chunk in chunks:
+        span.bytes_in += len(chunk)
+        yield chunk
+
+def _measured(metrics, span, it):
+    while True:
+        start = metrics._enter()
+        try:
+            chunk = next(it)
+        except StopIteration:
+            return
+        finally:
+            metrics._leave(span, start)
+        span.bytes_out += len(chunk)
+        yield chunk
+
+# --- Sinks (take Metrics.as_dict() records, so worker processes can ship them to the parent) ---
+class JsonLinesSink:
+    """Appends one JSON object per run to a file."""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+class PrometheusTextfileSink:
+    """Keeps running totals per operation and stage and rewrites a node_exporter textfile.
+
+    The file is replaced atomically, so the collector never reads a half-written file.
+    """
+    def __init__(self, path, prefix="prostego"):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._runs = {}    # (operation, status) -> count
+        self._last = {}    # operation -> seconds of the last run
+        self._stages = {}  # (operation, stage) -> [seconds, bytes_in, bytes_out]
+
+    def write(self, record):
+        operation = record["operation"]
+        with self._lock:
+            status = "error" if record.get("error") else "ok"
+            self._runs[operation, status] = self._runs.get((operation, status), 0) + 1
+            self._last[operation] = record["seconds"]
+            for span in record["spans"]:
+                totals = self._stages.setdefault((operation, span["stage"]), [0.0, 0, 0])
+                totals[0] += span["seconds"]
+                totals[1] += span["bytes_in"]
+                totals[2] += span["bytes_out"]
+            self._flush()
+
+    def _flush(self):
+        p = self.prefix
+        lines = [f"# HELP {p}_runs_total Completed operations.", f"# TYPE {p}_runs_total counter"]
+        lines += [f'{p}_runs_total{{operation="{op}",status="{status}"}} {count}'
+                  for (op, status), count in sorted(self._runs.items())]
+        lines += [f"# HELP {p}_last_run_seconds Wall time of the last run.", f"# TYPE {p}_last_run_seconds gauge"]
+        lines += [f'{p}_last_run_seconds{{operation="{op}"}} {_number(seconds)}' for op, seconds in sorted(self._last.items())]
+        for index, (metric, help_text) in enumerate((("stage_seconds_total", "Exclusive time spent per stage."),
+                                                     ("stage_bytes_in_total", "Bytes consumed per stage."),
+                                                     ("stage_bytes_out_total", "Bytes produced per stage."))):
+            lines += [f"# HELP {p}_{metric} {help_text}", f"# TYPE {p}_{metric} counter"]
+            lines += [f'{p}_{metric}{{operation="{op}",stage="{stage}"}} {_number(totals[index])}'
+                      for (op, stage), totals in sorted(self._stages.items())]
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
+
+def _number(value):
+    return f"{value:.6f}" if isinstance(value, float) else str(value)
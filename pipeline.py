@@ -0,0 +1,118 @@
+# pipeline.py
+# Chained generator stages for the hide/extract paths. Each stage consumes an
+# iterable of byte chunks and yields byte chunks, so no stage ever needs the
+# whole secret, the whole compressed stream or the whole ciphertext in memory.
+import os
+import time
+from lsb import group_size
+from compression import CODECS, CODEC_ZLIB, LEGACY_CODEC, compressor, decompressor
+
+CHUNK_SIZE = 1024 * 1024
+
+# --- Hide direction: source -> compress -> encrypt -> embed ---
+def read_source(source, chunk_size=CHUNK_SIZE):
+    # source: bytes-like, a binary file object, or a path
+    if hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk: break
+            yield chunk
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from read_source(f, chunk_size)
+    else:
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+
+class ByteCounter:
+    """Pass-through stage that records how many bytes went by (e.g. the original size)."""
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.count = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.count += len(chunk)
+            yield chunk
+
+def compress_stage(chunks, codec=CODECS[LEGACY_CODEC], report=None):
+    # report: optional compression.CompressionReport, updated with sizes and time spent
+    comp = compressor(codec)
+    clock = time.perf_counter
+    for chunk in chunks:
+        start = clock()
+        out = comp.compress(chunk)
+        if report:
+            report.seconds += clock() - start
+            report.input_size += len(chunk)
+            report.output_size += len(out)
+        if out: yield out
+    start = clock()
+    out = comp.flush()
+    if report:
+        report.seconds += clock() - start
+        report.output_size += len(out)
+    yield out
+
+def encrypt_stage(chunks, encryptor):
+    for chunk in chunks:
+        out = encryptor.update(chunk)
+        if out: yield out
+    yield encryptor.finalize()
+
+def embed_stage(chunks, writer):
+    written = 0
+    for chunk in chunks:
+        writer.write(chunk)
+        written += len(chunk)
+    return written
+
+# --- Extract direction: carrier -> decrypt -> decompress -> sink ---
+def read_payload(reader, region, nbytes, chunk_size=CHUNK_SIZE, pos=0):
+    # Chunks are whole slot groups, so no group is decoded twice
+    chunk_size -= chunk_size % group_size(region.bits)[0]
+    done = 0
+    while done < nbytes:
+        n = min(chunk_size, nbytes - done)
+        yield reader.read(n, pos + done, region)
+        done += n
+
+def decrypt_stage(chunks, decryptor):
+    for chunk in chunks:
+        out = decryptor.update(chunk)
+        if out: yield out
+    # Raises on a bad tag; segmented payloads also release their last segment here
+    out = decryptor.finalize()
+    if out: yield out
+
+def _more_output(decomp):
+    # zlib hands back the input it had no room to inflate; lzma and bz2 buffer it internally
+    if hasattr(decomp, 'needs_input'): return not decomp.needs_input
+    return bool(decomp.unconsumed_tail)
+
+def decompress_stage(chunks, codec_id=CODEC_ZLIB):
+    # At most CHUNK_SIZE bytes are inflated per step, so a highly compressible payload (or a
+    # decompression bomb) is never expanded into memory at once
+    decomp = decompressor(codec_id)
+    for chunk in chunks:
+        data = chunk
+        while not decomp.eof:  # trailing bytes after the end of the stream are ignored
+            out = decomp.decompress(data, CHUNK_SIZE)
+            if out: yield out
+            if not _more_output(decomp): break
+            data = getattr(decomp, 'unconsumed_tail', b"")
+    if hasattr(decomp, 'flush'):
+        out = decomp.flush()
+        if out: yield out
+    if not decomp.eof:
+        raise ValueError("Decompression failed (Data corrupted).")
+
+def limit_stage(chunks, nbytes):
+    # Keeps draining upstream past the limit so a decrypt stage still checks its tag
+    remaining = nbytes
+    for chunk in chunks:
+        if remaining <= 0: continue
+        if len(chunk) > remaining: chunk = chunk[:remaining]
+        remaining -= len(chunk)
+        yield chunk
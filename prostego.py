@@ -0,0 +1,205 @@
+# prostego.py
+# Headless batch front-end: runs hide/extract jobs from a manifest on a process pool.
+# Deliberately imports only the core modules (no customtkinter, matplotlib or pygame).
+#
+#   python prostego.py batch jobs.csv --workers 8 --retries 2 --report results.jsonl
+#
+# Manifest: CSV with a header row, or JSONL (one object per line). Columns:
+#   op        hide (default) | extract
+#   cover     cover WAV (hide) or stego WAV (extract)
+#   payload   secret file or directory to hide (hide only; a directory becomes a multi-file container)
+#   output    output WAV (hide) or output file / directory (extract; containers need a directory)
+#   name      filename stored in the header (default: basename of payload)
+#   compress  true/false, auto or a codec name: store, zlib-1, zlib-6, zlib-9, lzma, bz2
+#             (default true, i.e. zlib-9)
+#   encrypt   true/false (default false)
+#   bits      low bits used per sample, 1-8 (default: 1 bit in every frame byte)
+#   password  per-job password (default: --password or $PROSTEGO_PASSWORD)
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+import logic
+from compression import parse_compress_arg, parse_flag
+from metrics import JsonLinesSink, Metrics, PrometheusTextfileSink
+
+def _bits(value, index):
+    if not str(value or "").strip(): return None
+    try:
+        bits = int(str(value).strip())
+    except ValueError:
+        bits = 0
+    if not 1 <= bits <= 8:
+        raise ValueError(f"Manifest row {index}: bits must be a number from 1 to 8, not '{value}'.")
+    return bits
+
+def load_manifest(path, default_password=""):
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    jobs = []
+    for index, row in enumerate(rows, 1):
+        op = (row.get("op") or "hide").strip().lower()
+        if op not in ("hide", "extract"):
+            raise ValueError(f"Manifest row {index}: unknown op '{op}'.")
+        job = {
+            "id": index,
+            "op": op,
+            "cover": row.get("cover") or "",
+            "payload": row.get("payload") or "",
+            "output": row.get("output") or "",
+            "compress": parse_compress_arg(row.get("compress")),
+            "encrypt": parse_flag(row.get("encrypt"), False),
+            "password": row.get("password") or default_password,
+            "bits": _bits(row.get("bits"), index),
+        }
+        job["name"] = row.get("name") or os.path.basename(job["payload"])
+        if not job["cover"] or not job["output"] or (op == "hide" and not job["payload"]):
+            raise ValueError(f"Manifest row {index}: cover, output and (for hide) payload are required.")
+        if job["encrypt"] and not job["password"]:
+            raise ValueError(f"Manifest row {index}: encryption requested but no password given.")
+        jobs.append(job)
+    return jobs
+
+def _fanout_key(job):
+    return (os.path.abspath(job["payload"]), job["compress"], job["encrypt"], job["password"], job["bits"])
+
+# --- Worker-side entry points (must be top-level to be picklable) ---
+def _silent(*args): pass
+
+def prepare_job(payload_path, spool_path, password, compress, encrypt, bits=None):
+    with open(payload_path, 'rb') as f:
+        return logic.prepare_payload(f, spool_path, password, compress, encrypt, bits_per_sample=bits)
+
+def run_job(job, prepared=None):
+    # Stage metrics travel back with the result; the parent feeds the sinks
+    start = time.perf_counter()
+    metrics = Metrics(labels={"job": job["id"]})
+    if job["op"] == "hide":
+        if prepared is not None:
+            logic.hide_prepared(job["cover"], prepared, job["name"], job["output"], _silent, metrics=metrics)
+        elif os.path.isdir(job["payload"]):
+            logic.hide_files(job["cover"], job["payload"], job["output"], job["password"], job["compress"],
+                             job["encrypt"], _silent, archive_name=job["name"], bits_per_sample=job["bits"],
+                             metrics=metrics)
+        else:
+            with open(job["payload"], 'rb') as f:
+                logic.hide_data(job["cover"], f, job["name"], job["output"], job["password"],
+                                job["compress"], job["encrypt"], _silent, bits_per_sample=job["bits"],
+                                metrics=metrics)
+        output = job["output"]
+    else:
+        output = job["output"]
+        if os.path.isdir(output) or output.endswith(os.sep):
+            logic.extract_all(job["cover"], output, job["password"], _silent, metrics=metrics)
+        else:
+            logic.extract_to(job["cover"], output, job["password"], _silent, metrics=metrics)
+    return {"output": output, "seconds": round(time.perf_counter() - start, 4), "metrics": metrics.as_dict()}
+
+# --- Batch driver ---
+def run_batch(jobs, workers=None, retries=1, on_result=None):
+    results = {}
+    spool_dir = tempfile.mkdtemp(prefix="prostego-")
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # 1. Compress/encrypt once per payload that fans out to several covers
+            groups = {}
+            for job in jobs:
+                if job["op"] == "hide" and not os.path.isdir(job["payload"]):
+                    groups.setdefault(_fanout_key(job), []).append(job)
+            prepared = {}
+            pending = {}
+            for n, (key, members) in enumerate(groups.items()):
+                if len(members) < 2: continue
+                job = members[0]
+                spool = os.path.join(spool_dir, f"payload-{n}.bin")
+                pending[pool.submit(prepare_job, job["payload"], spool, job["password"],
+                                    job["compress"], job["encrypt"], job["bits"])] = key
+            for future in as_completed(pending):
+                try:
+                    prepared[pending[future]] = future.result()
+                except Exception:
+                    pass  # fall back to per-job processing; the job itself reports the error
+
+            # 2. Run every job, resubmitting failures up to `retries` more times
+            attempts = {job["id"]: 0 for job in jobs}
+            def submit(job):
+                attempts[job["id"]] += 1
+                share = prepared.get(_fanout_key(job)) if job["op"] == "hide" else None
+                return pool.submit(run_job, job, share)
+
+            running = {submit(job): job for job in jobs}
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        result = dict(future.result(), status="ok")
+                    except Exception as e:
+                        if attempts[job["id"]] <= retries:
+                            running[submit(job)] = job
+                            continue
+                        result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+                    result.update(id=job["id"], op=job["op"], cover=job["cover"], attempts=attempts[job["id"]])
+                    results[job["id"]] = result
+                    if on_result: on_result(result)
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+    return [results[job["id"]] for job in jobs]
+
+def _print_result(result):
+    if result["status"] == "ok":
+        print(f"[ok]     #{result['id']} {result['op']} {result['cover']} -> {result['output']} "
+              f"({result['seconds']}s, attempt {result['attempts']})", flush=True)
+    else:
+        print(f"[failed] #{result['id']} {result['op']} {result['cover']}: {result['error']} "
+              f"(after {result['attempts']} attempts)", flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="prostego", description="ProStego headless batch tool")
+    sub = parser.add_subparsers(dest="command", required=True)
+    batch = sub.add_parser("batch", help="run hide/extract jobs from a CSV or JSONL manifest")
+    batch.add_argument("manifest")
+    batch.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    batch.add_argument("--retries", type=int, default=1, help="extra attempts for a failed job")
+    batch.add_argument("--password", default=os.environ.get("PROSTEGO_PASSWORD", ""),
+                       help="default password for rows without one (or $PROSTEGO_PASSWORD)")
+    batch.add_argument("--report", help="write per-job results as JSON lines to this file")
+    batch.add_argument("--metrics", help="append per-job stage metrics as JSON lines to this file")
+    batch.add_argument("--prometheus", help="keep stage totals in this node_exporter textfile (*.prom)")
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = load_manifest(args.manifest, args.password)
+    except (OSError, ValueError) as e:
+        print(f"prostego: {e}", file=sys.stderr)
+        return 2
+
+    sinks = []
+    if args.metrics: sinks.append(JsonLinesSink(args.metrics))
+    if args.prometheus: sinks.append(PrometheusTextfileSink(args.prometheus))
+    def on_result(result):
+        _print_result(result)
+        if "metrics" in result:
+            for sink in sinks: sink.write(result["metrics"])
+
+    results = run_batch(jobs, args.workers, args.retries, on_result)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            for result in results: f.write(json.dumps(result) + "\n")
+
+    failed = sum(1 for r in results if r["status"] != "ok")
+    print(f"{len(results) - failed}/{len(results)} jobs succeeded.")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
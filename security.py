@@ -1,71 +1,477 @@
 # security.py
 import os
-from Crypto.Protocol.KDF import PBKDF2
+import hmac
+import hashlib
+import struct
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from Crypto.Protocol.KDF import PBKDF2, scrypt
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
 from Crypto.Hash import SHA256
+from metrics import timed
 
-MAGIC = b"AESGCMv1"
+try:
+    from argon2.low_level import hash_secret_raw, Type as Argon2Type
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
+MAGIC = b"AESGCMv1"      # PBKDF2-SHA256, 100k iterations, implied by the magic
+MAGIC_KDF = b"AESGCMv2"  # KDF algorithm + parameters recorded after the magic
+MAGIC_SEG = b"AESGCMS1"  # Segmented: fixed-size segments, each with its own tag
 SALT_SIZE = 16
 NONCE_SIZE = 12
 TAG_SIZE = 16
 KEY_SIZE = 32
 PBKDF2_ITERS = 100_000
 CHUNK_SIZE = 64 * 1024
+HEADER_LEN = len(MAGIC) + SALT_SIZE + NONCE_SIZE
+OVERHEAD = HEADER_LEN + TAG_SIZE
+SEGMENT_SIZE = 64 * 1024   # plaintext bytes per segment
+NONCE_PREFIX_SIZE = 7      # nonce = prefix(7) || segment index(4) || last flag(1)
+
+# --- Key derivation ---
+# Field meaning per algorithm:
+#   algorithm   cost          memory            parallelism
+#   pbkdf2      iterations    -                 -
+#   scrypt      log2(N)       r (block size)    p
+#   argon2id    time_cost     memory_cost KiB   lanes
+KdfParams = namedtuple("KdfParams", "algorithm cost memory parallelism")
+
+KDF_IDS = {"pbkdf2": 1, "scrypt": 2, "argon2id": 3}
+KDF_NAMES = {v: k for k, v in KDF_IDS.items()}
+KDF_STRUCT = struct.Struct(">BIII")
+
+LEGACY_KDF = KdfParams("pbkdf2", PBKDF2_ITERS, 0, 0)
+DEFAULT_KDFS = {
+    "pbkdf2": LEGACY_KDF,
+    "scrypt": KdfParams("scrypt", 15, 8, 1),
+    "argon2id": KdfParams("argon2id", 3, 64 * 1024, 4),
+}
+
+# Parameters are read from the carrier before anything is authenticated, so a crafted header
+# must not be able to make the reader spend minutes or gigabytes deriving a key
+KDF_MAX_MEMORY = 1 << 30      # bytes
+PBKDF2_MAX_ITERS = 10_000_000
+SCRYPT_MAX_LOG2N = 20
+SCRYPT_MAX_RP = 64            # r * p
+ARGON2_MAX_TIME = 10
+ARGON2_MAX_LANES = 16
+MAX_SEGMENT_SIZE = 16 << 20
+
+def _kdf_in_range(kdf: KdfParams) -> bool:
+    if kdf.algorithm == "pbkdf2":
+        return 1 <= kdf.cost <= PBKDF2_MAX_ITERS
+    if kdf.algorithm == "scrypt":
+        # scrypt needs 128 * r * N bytes
+        return (1 <= kdf.cost <= SCRYPT_MAX_LOG2N and kdf.memory >= 1 and kdf.parallelism >= 1
+                and kdf.memory * kdf.parallelism <= SCRYPT_MAX_RP
+                and (128 * kdf.memory) << kdf.cost <= KDF_MAX_MEMORY)
+    if kdf.algorithm == "argon2id":
+        return (1 <= kdf.cost <= ARGON2_MAX_TIME and 1 <= kdf.parallelism <= ARGON2_MAX_LANES
+                and 8 * kdf.parallelism <= kdf.memory <= KDF_MAX_MEMORY // 1024)
+    return False
+
+def encode_kdf(kdf: KdfParams) -> bytes:
+    if kdf.algorithm not in KDF_IDS: raise ValueError(f"Unknown KDF: {kdf.algorithm}")
+    # Anything decode_kdf() would refuse could never be decrypted again
+    if not _kdf_in_range(kdf): raise ValueError(f"KDF parameters out of range: {kdf}")
+    return KDF_STRUCT.pack(KDF_IDS[kdf.algorithm], kdf.cost, kdf.memory, kdf.parallelism)
+
+def decode_kdf(data: bytes) -> KdfParams:
+    kdf_id, cost, memory, parallelism = KDF_STRUCT.unpack(data)
+    if kdf_id not in KDF_NAMES: raise ValueError("Invalid file format.")
+    kdf = KdfParams(KDF_NAMES[kdf_id], cost, memory, parallelism)
+    if not _kdf_in_range(kdf): raise ValueError("Invalid KDF parameters (Data corrupted).")
+    return kdf
+
+def _run_kdf(secret: bytes, salt: bytes, kdf: KdfParams) -> bytes:
+    if kdf.algorithm == "pbkdf2":
+        return PBKDF2(secret, salt, dkLen=KEY_SIZE, count=kdf.cost, hmac_hash_module=SHA256)
+    if kdf.algorithm == "scrypt":
+        return scrypt(secret, salt, key_len=KEY_SIZE, N=1 << kdf.cost, r=kdf.memory, p=kdf.parallelism)
+    if kdf.algorithm == "argon2id":
+        if not ARGON2_AVAILABLE: raise ValueError("argon2-cffi is not installed.")
+        return hash_secret_raw(secret, salt, time_cost=kdf.cost, memory_cost=kdf.memory,
+                               parallelism=kdf.parallelism, hash_len=KEY_SIZE, type=Argon2Type.ID)
+    raise ValueError(f"Unknown KDF: {kdf.algorithm}")
+
+class KeyCache:
+    """In-process LRU of derived keys, keyed by (passphrase digest, salt, KDF params).
+
+    Entries expire after ttl seconds; evicted keys are overwritten with zeros.
+    The passphrase digest is an HMAC under a per-process random key, so the
+    cache never holds a value that can be brute-forced offline faster than the KDF.
+    """
+    def __init__(self, max_entries=32, ttl=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._digest_key = os.urandom(32)
+
+    def _cache_key(self, secret: bytes, salt: bytes, kdf: KdfParams):
+        return hmac.new(self._digest_key, secret, hashlib.sha256).digest(), bytes(salt), kdf
+
+    def get(self, secret: bytes, salt: bytes, kdf: KdfParams):
+        key = self._cache_key(secret, salt, kdf)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None: return None
+            derived, expires = entry
+            if expires < time.monotonic():
+                self._evict(key)
+                return None
+            self._entries.move_to_end(key)
+            return bytes(derived)
+
+    def put(self, secret: bytes, salt: bytes, kdf: KdfParams, derived: bytes):
+        if self.max_entries <= 0: return
+        key = self._cache_key(secret, salt, kdf)
+        with self._lock:
+            if key in self._entries: self._evict(key)
+            self._entries[key] = (bytearray(derived), time.monotonic() + self.ttl)
+            now = time.monotonic()
+            for stale in [k for k, (_, exp) in self._entries.items() if exp < now]:
+                self._evict(stale)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._evict(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, key):
+        derived, _ = self._entries.pop(key)
+        derived[:] = bytes(len(derived))
+
+key_cache = KeyCache()
+
+def derive_key(passphrase: str, salt: bytes, kdf: KdfParams = LEGACY_KDF) -> bytes:
+    secret = passphrase.encode('utf-8')
+    key = key_cache.get(secret, salt, kdf)
+    if key is None:
+        with timed("kdf"):
+            key = _run_kdf(secret, salt, kdf)
+        key_cache.put(secret, salt, kdf, key)
+    return key
+
+def calibrate_kdf(algorithm: str = "pbkdf2", target_seconds: float = 0.25) -> KdfParams:
+    # Scales the algorithm's cost parameter until one derivation takes about target_seconds here.
+    base = DEFAULT_KDFS[algorithm]
+    probe_salt = os.urandom(SALT_SIZE)
+
+    def _elapsed(kdf):
+        start = time.perf_counter()
+        _run_kdf(b"calibration", probe_salt, kdf)
+        return time.perf_counter() - start
+
+    if algorithm == "pbkdf2":
+        probe = base._replace(cost=20_000)
+        iters = int(probe.cost * target_seconds / max(_elapsed(probe), 1e-6))
+        return base._replace(cost=min(max(iters, PBKDF2_ITERS), PBKDF2_MAX_ITERS))
+    if algorithm == "scrypt":
+        # N doubles per step; stop before exceeding the target
+        kdf = base._replace(cost=12)
+        while kdf.cost < SCRYPT_MAX_LOG2N and _elapsed(kdf._replace(cost=kdf.cost + 1)) <= target_seconds:
+            kdf = kdf._replace(cost=kdf.cost + 1)
+        return kdf
+    if algorithm == "argon2id":
+        probe = base._replace(cost=1)
+        per_pass = max(_elapsed(probe), 1e-6)
+        return base._replace(cost=min(max(int(target_seconds / per_pass), 1), ARGON2_MAX_TIME))
+    raise ValueError(f"Unknown KDF: {algorithm}")
+
+# --- In-memory / incremental API (same layout as the file functions) ---
+class Encryptor:
+    """Feed plaintext chunks to update(); the concatenated outputs plus finalize() form an encrypted blob.
+
+    The legacy KDF keeps the AESGCMv1 layout; any other KDF writes AESGCMv2, which
+    records the algorithm and its parameters so decryption needs no extra input.
+    """
+    def __init__(self, passphrase: str, kdf: KdfParams = None, salt: bytes = None):
+        # A shared salt (e.g. across the entries of one archive) lets the key cache derive once;
+        # every Encryptor still draws its own nonce
+        kdf = kdf or LEGACY_KDF
+        salt = salt or get_random_bytes(SALT_SIZE)
+        nonce = get_random_bytes(NONCE_SIZE)
+        self._cipher = AES.new(derive_key(passphrase, salt, kdf), AES.MODE_GCM, nonce=nonce)
+        if kdf == LEGACY_KDF:
+            self._prefix = MAGIC + salt + nonce
+        else:
+            self._prefix = MAGIC_KDF + encode_kdf(kdf) + salt + nonce
+
+    def update(self, chunk) -> bytes:
+        ct = self._cipher.encrypt(chunk)
+        if self._prefix:
+            ct, self._prefix = self._prefix + ct, b""
+        return ct
+
+    def finalize(self) -> bytes:
+        out, self._prefix = self._prefix + self._cipher.digest(), b""
+        return out
+
+# --- Segmented format (AESGCMS1) ---
+# MAGIC_SEG + KDF block + segment size(4) + salt + nonce prefix, then segments of
+# ciphertext + tag. Segment i is sealed with nonce prefix || i || last flag and the
+# whole header as associated data, so every segment verifies on its own, reordering
+# is detected and a stream cut at a segment boundary fails on the missing last flag.
+SEG_HEADER_LEN = len(MAGIC_SEG) + KDF_STRUCT.size + 4 + SALT_SIZE + NONCE_PREFIX_SIZE
+
+class _SegmentCipher:
+    def __init__(self, header: bytes, key: bytes):
+        self.header = bytes(header)
+        self.segment_size = int.from_bytes(header[len(MAGIC_SEG) + KDF_STRUCT.size:][:4], 'big')
+        self._prefix = self.header[-NONCE_PREFIX_SIZE:]
+        self._key = key
 
-def derive_key(passphrase: str, salt: bytes) -> bytes:
-    return PBKDF2(passphrase.encode('utf-8'), salt, dkLen=KEY_SIZE, count=PBKDF2_ITERS, hmac_hash_module=SHA256)
+    @classmethod
+    def from_header(cls, header, passphrase: str):
+        pos = len(MAGIC_SEG)
+        kdf = decode_kdf(header[pos:pos + KDF_STRUCT.size])
+        pos += KDF_STRUCT.size
+        segment_size = int.from_bytes(header[pos:pos + 4], 'big')
+        if not 0 < segment_size <= MAX_SEGMENT_SIZE: raise ValueError("Invalid file format.")
+        pos += 4
+        return cls(header, derive_key(passphrase, header[pos:pos + SALT_SIZE], kdf))
 
-def encrypt_file(in_path: str, out_path: str, passphrase: str):
-    salt = get_random_bytes(SALT_SIZE)
-    key = derive_key(passphrase, salt)
-    nonce = get_random_bytes(NONCE_SIZE)
-    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
+    def _aes(self, index, last):
+        cipher = AES.new(self._key, AES.MODE_GCM, nonce=self._prefix + index.to_bytes(4, 'big') + bytes([last]))
+        cipher.update(self.header)
+        return cipher
 
+    def seal(self, index, data, last=False) -> bytes:
+        ct, tag = self._aes(index, last).encrypt_and_digest(data)
+        return ct + tag
+
+    def open(self, index, data, last=False) -> bytes:
+        data = memoryview(data)
+        if len(data) < TAG_SIZE: raise ValueError("Input file too small.")
+        try:
+            return self._aes(index, last).decrypt_and_verify(data[:-TAG_SIZE], data[-TAG_SIZE:])
+        except ValueError:
+            raise ValueError("Authentication failed (Data corrupted).")
+
+def _run_segments(fn, pool, index, segments, last=False):
+    # Seals/opens consecutive segments, on the thread pool when there is one (AES-GCM releases the GIL)
+    indices = range(index, index + len(segments))
+    if pool is None or len(segments) < 2:
+        return [fn(i, seg, last) for i, seg in zip(indices, segments)]
+    return list(pool.map(fn, indices, segments, [last] * len(segments)))
+
+class SegmentedEncryptor:
+    """Same update()/finalize() contract as Encryptor, producing the AESGCMS1 layout.
+
+    The last segment is only known at finalize(), so up to one segment is held back.
+    With workers > 1, the full segments of a large update() are sealed on a thread pool.
+    """
+    def __init__(self, passphrase: str, kdf: KdfParams = None, salt: bytes = None, segment_size: int = SEGMENT_SIZE,
+                 workers: int = 1):
+        kdf = kdf or LEGACY_KDF
+        if not 0 < segment_size <= MAX_SEGMENT_SIZE: raise ValueError(f"Segment size out of range: {segment_size}")
+        salt = salt or get_random_bytes(SALT_SIZE)
+        header = MAGIC_SEG + encode_kdf(kdf) + segment_size.to_bytes(4, 'big') + salt + get_random_bytes(NONCE_PREFIX_SIZE)
+        self._cipher = _SegmentCipher(header, derive_key(passphrase, salt, kdf))
+        self._pool = ThreadPoolExecutor(workers) if workers > 1 else None
+        self._prefix = header
+        self._buffer = bytearray()
+        self._index = 0
+
+    def update(self, chunk) -> bytes:
+        self._buffer += chunk
+        size = self._cipher.segment_size
+        count = (len(self._buffer) - 1) // size if self._buffer else 0
+        segments = [bytes(self._buffer[i * size:(i + 1) * size]) for i in range(count)]
+        del self._buffer[:count * size]
+        out = b"".join(_run_segments(self._cipher.seal, self._pool, self._index, segments))
+        self._index += count
+        if self._prefix:
+            out, self._prefix = self._prefix + out, b""
+        return out
+
+    def finalize(self) -> bytes:
+        out = self._prefix + self._cipher.seal(self._index, bytes(self._buffer), last=True)
+        self._prefix, self._buffer = b"", bytearray()
+        if self._pool: self._pool.shutdown()
+        return out
+
+def encrypted_size(plain_size: int, kdf: KdfParams = None) -> int:
+    # Size of a SegmentedEncryptor blob for plain_size bytes (kdf does not change it)
+    segments = max(-(-plain_size // SEGMENT_SIZE), 1)
+    return SEG_HEADER_LEN + plain_size + segments * TAG_SIZE
+
+class SegmentedReader:
+    """Random access to the plaintext of an AESGCMS1 blob without decrypting the rest.
+
+    read(nbytes, pos) returns blob bytes and size is the blob length; only the segments
+    overlapping a requested range are fetched and verified.
+    """
+    def __init__(self, read, size: int, passphrase: str):
+        if size < SEG_HEADER_LEN + TAG_SIZE or bytes(read(len(MAGIC_SEG), 0)) != MAGIC_SEG:
+            raise ValueError("Random access needs a segmented (AESGCMS1) payload.")
+        self._read = read
+        self._cipher = _SegmentCipher.from_header(bytes(read(SEG_HEADER_LEN, 0)), passphrase)
+        self._stride = self._cipher.segment_size + TAG_SIZE
+        body = size - SEG_HEADER_LEN
+        self.segments = -(-body // self._stride)
+        last = body - (self.segments - 1) * self._stride
+        if last < TAG_SIZE: raise ValueError("Input file too small.")
+        self.size = body - self.segments * TAG_SIZE
+
+    def read_segment(self, index: int) -> bytes:
+        last = index == self.segments - 1
+        length = self.size - index * self._cipher.segment_size + TAG_SIZE if last else self._stride
+        return self._cipher.open(index, self._read(length, SEG_HEADER_LEN + index * self._stride), last)
+
+    def read(self, pos: int, nbytes: int) -> bytes:
+        end = min(pos + nbytes, self.size)
+        if pos >= end: return b""
+        size = self._cipher.segment_size
+        out = b"".join(self.read_segment(i) for i in range(pos // size, (end - 1) // size + 1))
+        start = pos - pos // size * size
+        return out[start:start + end - pos]
+
+def _header_len(magic: bytes) -> int:
+    if magic == MAGIC: return HEADER_LEN
+    if magic == MAGIC_KDF: return HEADER_LEN + KDF_STRUCT.size
+    if magic == MAGIC_SEG: return SEG_HEADER_LEN
+    raise ValueError("Invalid file format.")
+
+class Decryptor:
+    """Feed encrypted chunks to update(); finalize() verifies the tag and raises on tampering.
+
+    Reads every layout. For AESGCMv1/v2, plaintext is released before the single tag is
+    checked, so callers must discard it if finalize() fails. For AESGCMS1, each segment
+    is verified before its plaintext is released (on a thread pool with workers > 1),
+    and finalize() returns the last segment.
+    """
+    def __init__(self, passphrase: str, workers: int = 1):
+        self._passphrase = passphrase
+        self._workers = workers
+        self._cipher = None
+        self._segments = None  # _SegmentCipher for AESGCMS1
+        self._pending = b""  # header bytes, then the trailing bytes that may be the tag
+
+    def _take_header(self, chunk):
+        # Consumes header bytes from chunk; returns the rest once the cipher is ready
+        need = len(MAGIC) if len(self._pending) < len(MAGIC) else _header_len(self._pending[:len(MAGIC)])
+        while len(self._pending) < need:
+            take = need - len(self._pending)
+            self._pending += bytes(chunk[:take])
+            chunk = chunk[take:]
+            if len(self._pending) < need: return None
+            need = _header_len(self._pending[:len(MAGIC)])
+
+        header, pos = self._pending, len(MAGIC)
+        self._pending = b""
+        if header[:pos] == MAGIC_SEG:
+            self._segments = self._cipher = _SegmentCipher.from_header(header, self._passphrase)
+            self._pool = ThreadPoolExecutor(self._workers) if self._workers > 1 else None
+            self._index = 0
+            self._pending = bytearray()
+            return chunk
+        kdf = LEGACY_KDF
+        if header[:pos] == MAGIC_KDF:
+            kdf = decode_kdf(header[pos:pos + KDF_STRUCT.size])
+            pos += KDF_STRUCT.size
+        salt, nonce = header[pos:pos + SALT_SIZE], header[pos + SALT_SIZE:pos + SALT_SIZE + NONCE_SIZE]
+        self._cipher = AES.new(derive_key(self._passphrase, salt, kdf), AES.MODE_GCM, nonce=nonce)
+        return chunk
+
+    def update(self, chunk) -> bytes:
+        chunk = memoryview(chunk)
+        if self._cipher is None:
+            chunk = self._take_header(chunk)
+            if chunk is None: return b""
+        if self._segments:
+            return self._update_segments(chunk)
+
+        if len(chunk) >= TAG_SIZE:
+            # The held-back bytes were not the tag after all
+            out = self._cipher.decrypt(self._pending) if self._pending else b""
+            body = self._cipher.decrypt(chunk[:-TAG_SIZE])
+            self._pending = bytes(chunk[-TAG_SIZE:])
+            return out + body if out else body
+        held = self._pending + bytes(chunk)
+        release = len(held) - TAG_SIZE
+        self._pending = held[max(release, 0):]
+        return self._cipher.decrypt(held[:release]) if release > 0 else b""
+
+    def _update_segments(self, chunk):
+        # A segment is opened once more data follows it; the rest may still be the last one
+        self._pending += chunk
+        stride = self._segments.segment_size + TAG_SIZE
+        count = (len(self._pending) - 1) // stride if self._pending else 0
+        segments = [bytes(self._pending[i * stride:(i + 1) * stride]) for i in range(count)]
+        del self._pending[:count * stride]
+        try:
+            out = b"".join(_run_segments(self._segments.open, self._pool, self._index, segments))
+        except ValueError:
+            self._close_pool()
+            raise
+        self._index += count
+        return out
+
+    def _close_pool(self):
+        if self._pool: self._pool.shutdown()
+        self._pool = None
+
+    def finalize(self) -> bytes:
+        if self._segments:
+            self._close_pool()
+            return self._segments.open(self._index, self._pending, last=True)
+        if self._cipher is None or len(self._pending) != TAG_SIZE:
+            raise ValueError("Input file too small.")
+        try:
+            self._cipher.verify(self._pending)
+        except ValueError:
+            raise ValueError("Authentication failed (Data corrupted).")
+        return b""
+
+def _encryptor(passphrase, kdf, segmented):
+    return SegmentedEncryptor(passphrase, kdf) if segmented else Encryptor(passphrase, kdf)
+
+def encrypt_bytes(data, passphrase: str, kdf: KdfParams = None, segmented: bool = True) -> bytes:
+    enc = _encryptor(passphrase, kdf, segmented)
+    return enc.update(data) + enc.finalize()
+
+def decrypt_bytes(blob, passphrase: str, workers: int = 1) -> bytes:
+    blob = memoryview(blob)
+    if len(blob) < OVERHEAD:
+        raise ValueError("Input file too small.")
+    dec = Decryptor(passphrase, workers)
+    plaintext = dec.update(blob)
+    return plaintext + dec.finalize()
+
+def encrypt_file(in_path: str, out_path: str, passphrase: str, kdf: KdfParams = None, segmented: bool = True):
+    enc = _encryptor(passphrase, kdf, segmented)
     with open(in_path, 'rb') as fin, open(out_path, 'wb') as fout:
-        fout.write(MAGIC)
-        fout.write(salt)
-        fout.write(nonce)
         while True:
             chunk = fin.read(CHUNK_SIZE)
             if not chunk: break
-            ct = cipher.encrypt(chunk)
-            fout.write(ct)
-        tag = cipher.digest()
-        fout.write(tag)
-
-def decrypt_file(in_path: str, out_path: str, passphrase: str):
-    filesize = os.path.getsize(in_path)
-    header_len = len(MAGIC) + SALT_SIZE + NONCE_SIZE
-    if filesize < header_len + TAG_SIZE:
+            fout.write(enc.update(chunk))
+        fout.write(enc.finalize())
+
+def decrypt_file(in_path: str, out_path: str, passphrase: str, workers: int = 1):
+    if os.path.getsize(in_path) < OVERHEAD:
         raise ValueError("Input file too small.")
 
-    with open(in_path, 'rb') as fin:
-        magic = fin.read(len(MAGIC))
-        if magic != MAGIC: raise ValueError("Invalid file format.")
-        
-        salt = fin.read(SALT_SIZE)
-        nonce = fin.read(NONCE_SIZE)
-        key = derive_key(passphrase, salt)
-        cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
-        
-        ciphertext_len = filesize - header_len - TAG_SIZE
-        bytes_left = ciphertext_len
-        
-        with open(out_path, 'wb') as fout:
-            while bytes_left > 0:
-                to_read = min(CHUNK_SIZE, bytes_left)
-                chunk = fin.read(to_read)
-                if not chunk: raise ValueError("Unexpected EOF.")
-                pt = cipher.decrypt(chunk)
-                fout.write(pt)
-                bytes_left -= len(chunk)
-            
-            tag = fin.read(TAG_SIZE)
-            if len(tag) != TAG_SIZE: raise ValueError("Missing tag.")
-            try:
-                cipher.verify(tag)
-            except ValueError:
-                fout.close()
-                os.remove(out_path)
-                raise ValueError("Authentication failed (Data corrupted).")
\ No newline at end of file
+    dec = Decryptor(passphrase, workers)
+    with open(in_path, 'rb') as fin, open(out_path, 'wb') as fout:
+        try:
+            while True:
+                chunk = fin.read(CHUNK_SIZE)
+                if not chunk: break
+                fout.write(dec.update(chunk))
+            fout.write(dec.finalize())
+        except ValueError:
+            fout.close()
+            os.remove(out_path)
+            raise
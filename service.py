@@ -0,0 +1,366 @@
+# service.py
+# Local HTTP front-end for other tools: submit a hide/extract job, follow its progress,
+# download the result. Like prostego.py it imports only the core modules (plus Flask).
+#
+#   python service.py --port 8765 --workers 2
+#
+#   curl -F cover=@cover.wav -F payload=@secret.pdf -F encrypt=true -F password=pw localhost:8765/jobs/hide
+#   curl localhost:8765/jobs/<id>             # status as JSON
+#   curl -N localhost:8765/jobs/<id>/events   # progress as server-sent events
+#   curl -OJ localhost:8765/jobs/<id>/result  # the stego WAV / extracted file
+#   curl -X DELETE localhost:8765/jobs/<id>   # cancel, or forget a finished job
+#
+# Uploaded files are streamed straight into the job's spool folder, never held in memory.
+# Jobs run on a bounded thread pool; at most max_queued wait for a worker and further
+# submissions are refused with 503. Finished jobs and their files are dropped after ttl seconds.
+#
+# Hide form:    cover (file), payload (one file, or several for a multi-file container), name,
+#               compress (true/false, auto or a codec name), encrypt, bits, password
+# Extract form: stego (file), password, entry (container entry name; default: all files,
+#               returned as a .zip when there is more than one)
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, Request, Response, current_app, g, jsonify, request, send_file
+
+import logic
+from async_api import JobCancelled
+from compression import parse_compress_arg, parse_flag
+from metrics import JsonLinesSink, Metrics, PrometheusTextfileSink
+
+FINISHED = ("done", "failed", "cancelled")
+KEEPALIVE_SECONDS = 15  # comment line on idle event streams, so proxies keep them open
+
+class ServiceBusy(Exception):
+    """Raised by submit() when max_queued jobs are already waiting for a worker."""
+
+class Job:
+    """State of one submitted job; changes wake up whoever waits on .changed (the event streams)."""
+    def __init__(self, op, directory):
+        self.id = uuid.uuid4().hex
+        self.op = op
+        self.directory = directory
+        self.state = "queued"
+        self.message = "Queued"
+        self.progress = 0.0
+        self.error = None
+        self.result_path = None
+        self.result_name = None
+        self.metrics = None
+        self.created = time.time()
+        self.finished = None
+        self.future = None
+        self.cancelled = threading.Event()
+        self.changed = threading.Condition()
+        self.version = 0
+
+    def update(self, **fields):
+        with self.changed:
+            for name, value in fields.items(): setattr(self, name, value)
+            if self.state in FINISHED and self.finished is None: self.finished = time.time()
+            self.version += 1
+            self.changed.notify_all()
+
+    def as_dict(self):
+        return {"id": self.id, "op": self.op, "state": self.state, "message": self.message,
+                "progress": round(self.progress, 4), "error": self.error, "result": self.result_name,
+                "created": self.created, "finished": self.finished, "metrics": self.metrics}
+
+class StegoService:
+    """Job registry and worker pool behind the HTTP app (usable without Flask, too)."""
+    def __init__(self, spool_dir=None, workers=None, max_queued=16, ttl=3600, sinks=()):
+        self.spool_dir = os.path.abspath(spool_dir or tempfile.mkdtemp(prefix="prostego-service-"))
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.sinks = list(sinks)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prostego-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def new_job(self, op):
+        # The job's folder exists before its upload is parsed, so the files are spooled right into it
+        self.expire()
+        if self.busy(): raise ServiceBusy()
+        return Job(op, tempfile.mkdtemp(prefix=f"{op}-", dir=self.spool_dir))
+
+    def busy(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.state == "queued") >= self.max_queued
+
+    def submit(self, job, params):
+        with self._lock:
+            if sum(1 for j in self._jobs.values() if j.state == "queued") >= self.max_queued:
+                raise ServiceBusy()
+            self._jobs[job.id] = job
+            job.future = self._pool.submit(self._run, job, params)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        self.expire()
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        # Stops a queued or running job (at its next block or chunk) and forgets it with its files
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None: return None
+            job.cancelled.set()
+            running = job.state == "running"
+        if job.future.cancel() or not running:
+            if job.state not in FINISHED: job.update(state="cancelled", message="Cancelled")
+            shutil.rmtree(job.directory, ignore_errors=True)
+        return job  # a running job removes its folder itself once it has stopped
+
+    def expire(self):
+        now = time.time()
+        with self._lock:
+            old = [job for job in self._jobs.values() if job.finished and now - job.finished > self.ttl]
+            for job in old: del self._jobs[job.id]
+        for job in old: shutil.rmtree(job.directory, ignore_errors=True)
+
+    def close(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs: job.cancelled.set()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    # --- Worker side ---
+    def _run(self, job, params):
+        with self._lock:
+            if job.cancelled.is_set(): return
+            job.update(state="running", message="Starting...")
+
+        def progress(message, value):
+            if job.cancelled.is_set(): raise JobCancelled()
+            job.update(message=message, progress=value)
+
+        metrics = Metrics(sinks=self.sinks, labels={"job": job.id})
+        try:
+            if job.op == "hide":
+                path, name = self._hide(job, params, progress, metrics)
+            else:
+                path, name = self._extract(job, params, progress, metrics)
+        except Exception as e:
+            if job.cancelled.is_set():
+                job.update(state="cancelled", message="Cancelled")
+                return
+            job.update(state="failed", message="Failed", error=f"{type(e).__name__}: {e}", metrics=metrics.as_dict())
+        else:
+            job.update(state="done", message="Done!", progress=1.0, result_path=path, result_name=name,
+                       metrics=metrics.as_dict())
+        finally:
+            # Uploads are not needed any more; a cancelled job leaves nothing behind
+            for upload in params["uploads"]:
+                if os.path.exists(upload): os.remove(upload)
+            if job.cancelled.is_set(): shutil.rmtree(job.directory, ignore_errors=True)
+
+    def _hide(self, job, params, progress, metrics):
+        output = os.path.join(job.directory, "stego.wav")
+        payloads = params["payloads"]
+        if len(payloads) > 1:
+            logic.hide_files(params["cover"], payloads, output, params["password"], params["compress"], params["encrypt"],
+                             progress, archive_name=params["name"], bits_per_sample=params["bits"], metrics=metrics)
+        else:
+            name, path = payloads[0]
+            with open(path, 'rb') as f:
+                logic.hide_data(params["cover"], f, params["name"] or name, output, params["password"],
+                                params["compress"], params["encrypt"], progress, bits_per_sample=params["bits"],
+                                metrics=metrics)
+        return output, params["output_name"]
+
+    def _extract(self, job, params, progress, metrics):
+        if params["entry"]:
+            path = os.path.join(job.directory, "result.bin")
+            name = logic.extract_to(params["stego"], path, params["password"], progress, params["entry"], metrics=metrics)
+            return path, os.path.basename(name) or "extracted.bin"
+        root = os.path.join(job.directory, "files")
+        paths = logic.extract_all(params["stego"], root, params["password"], progress, metrics=metrics)
+        if len(paths) == 1:
+            return paths[0], os.path.basename(paths[0])
+        progress("Packing files...", 1.0)
+        archive = shutil.make_archive(os.path.join(job.directory, "files"), "zip", root)
+        return archive, f"{params['output_name']}.zip"
+
+# --- Form parsing ---
+def _client_name(storage, default):
+    # Browsers may send a full path (C:\...\file.txt); only the last part is kept
+    name = (storage.filename or "").replace("\\", "/").rsplit("/", 1)[-1]
+    return name or default
+
+def _upload(files, field):
+    storage = files.get(field)
+    if storage is None or not storage.filename:
+        raise ValueError(f"Missing file field '{field}'.")
+    return storage
+
+def _bits(value):
+    # Checked here so a bad value is a 400, not a failed job
+    if not value.strip(): return None
+    try:
+        bits = int(value)
+    except ValueError:
+        bits = 0
+    if not 1 <= bits <= 8: raise ValueError(f"'bits' must be a number from 1 to 8, not '{value}'.")
+    return bits
+
+def _hide_params(form, files):
+    cover = _upload(files, "cover")
+    payloads = [storage for storage in files.getlist("payload") if storage.filename]
+    if not payloads: raise ValueError("Missing file field 'payload'.")
+    params = {
+        "cover": cover.stream.name,
+        "payloads": [(_client_name(s, f"file-{n}"), s.stream.name) for n, s in enumerate(payloads, 1)],
+        "name": form.get("name", ""),
+        "compress": parse_compress_arg(form.get("compress")),
+        "encrypt": parse_flag(form.get("encrypt"), False),
+        "bits": _bits(form.get("bits", "")),
+        "password": form.get("password", ""),
+    }
+    if params["encrypt"] and not params["password"]:
+        raise ValueError("Encryption requested but no password given.")
+    stem = os.path.splitext(_client_name(cover, "cover.wav"))[0]
+    params["output_name"] = f"{stem}_stego.wav"
+    return params
+
+def _extract_params(form, files):
+    stego = _upload(files, "stego")
+    return {"stego": stego.stream.name, "password": form.get("password", ""), "entry": form.get("entry") or None,
+            "output_name": os.path.splitext(_client_name(stego, "extracted"))[0]}
+
+PARSERS = {"hide": _hide_params, "extract": _extract_params}
+
+class SpoolingRequest(Request):
+    """Writes uploaded file parts to disk as they arrive (into the job's folder when one is set)."""
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        directory = g.get("upload_dir") or current_app.extensions["prostego"].spool_dir
+        return tempfile.NamedTemporaryFile(prefix="upload-", dir=directory, delete=False)
+
+# --- HTTP app ---
+def _error(status, message, headers=None):
+    return jsonify({"error": message}), status, headers or {}
+
+def create_app(service=None, max_upload=None):
+    # max_upload: largest request body in bytes (None: unlimited)
+    service = service or StegoService()
+    app = Flask(__name__)
+    app.request_class = SpoolingRequest
+    app.config["MAX_CONTENT_LENGTH"] = max_upload
+    app.extensions["prostego"] = service
+
+    def find(job_id):
+        job = service.get(job_id)
+        if job is None: return None, _error(404, "No such job.")
+        return job, None
+
+    @app.post("/jobs/<op>")
+    def submit(op):
+        if op not in PARSERS: return _error(404, f"Unknown operation '{op}'.")
+        try:
+            job = service.new_job(op)
+        except ServiceBusy:
+            return _error(503, "Too many queued jobs, retry later.", {"Retry-After": "5"})
+        g.upload_dir = job.directory
+        try:
+            files = request.files  # parses (and spools) the whole body
+            params = PARSERS[op](request.form, files)
+            params["uploads"] = [storage.stream.name for storage in files.values()]
+            for storage in files.values(): storage.close()
+            service.submit(job, params)
+        except ValueError as e:
+            shutil.rmtree(job.directory, ignore_errors=True)
+            return _error(400, str(e))
+        except ServiceBusy:
+            shutil.rmtree(job.directory, ignore_errors=True)
+            return _error(503, "Too many queued jobs, retry later.", {"Retry-After": "5"})
+        except BaseException:
+            shutil.rmtree(job.directory, ignore_errors=True)  # e.g. body over max_upload, client went away
+            raise
+        return jsonify(job.as_dict()), 202, {"Location": f"/jobs/{job.id}"}
+
+    @app.get("/jobs")
+    def list_jobs():
+        return jsonify([job.as_dict() for job in service.jobs()])
+
+    @app.get("/jobs/<job_id>")
+    def status(job_id):
+        job, error = find(job_id)
+        return error or jsonify(job.as_dict())
+
+    @app.get("/jobs/<job_id>/events")
+    def events(job_id):
+        job, error = find(job_id)
+        if error: return error
+        return Response(_event_stream(job), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @app.get("/jobs/<job_id>/result")
+    def result(job_id):
+        job, error = find(job_id)
+        if error: return error
+        if job.state != "done": return _error(409, f"Job is {job.state}.")
+        return send_file(job.result_path, as_attachment=True, download_name=job.result_name)
+
+    @app.delete("/jobs/<job_id>")
+    def cancel(job_id):
+        job = service.cancel(job_id)
+        if job is None: return _error(404, "No such job.")
+        return jsonify(job.as_dict())
+
+    return app
+
+def _event_stream(job):
+    # One "progress" event per change (ticks that arrive faster than the client reads are
+    # coalesced into the latest state), then a final event named after the end state
+    version = -1
+    while True:
+        with job.changed:
+            job.changed.wait_for(lambda: job.version != version, timeout=KEEPALIVE_SECONDS)
+            changed, version = job.version != version, job.version
+            state = job.as_dict()
+        if not changed:
+            yield ": keep-alive\n\n"
+            continue
+        finished = state["state"] in FINISHED
+        yield f"event: {state['state'] if finished else 'progress'}\ndata: {json.dumps(state)}\n\n"
+        if finished: return
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="service", description="ProStego local HTTP service")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="jobs running at once (default: CPU count)")
+    parser.add_argument("--max-queued", type=int, default=16, help="jobs waiting for a worker before 503s")
+    parser.add_argument("--max-upload", type=int, default=None, help="largest request body in MiB")
+    parser.add_argument("--spool", help="folder for uploads and results (default: a temporary folder)")
+    parser.add_argument("--ttl", type=int, default=3600, help="seconds finished jobs are kept")
+    parser.add_argument("--metrics", help="append per-job stage metrics as JSON lines to this file")
+    parser.add_argument("--prometheus", help="keep stage totals in this node_exporter textfile (*.prom)")
+    args = parser.parse_args(argv)
+
+    sinks = []
+    if args.metrics: sinks.append(JsonLinesSink(args.metrics))
+    if args.prometheus: sinks.append(PrometheusTextfileSink(args.prometheus))
+    service = StegoService(args.spool, args.workers, args.max_queued, args.ttl, sinks)
+    app = create_app(service, args.max_upload and args.max_upload << 20)
+    try:
+        app.run(args.host, args.port, threaded=True)
+    finally:
+        service.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# sharding.py
+# Multi-core LSB embedding/extraction. The frame buffer lives in
+# multiprocessing.shared_memory and is split into contiguous shards; every worker
+# embeds (or gathers) its own slice of the bitstream in place, so nothing but
+# segment names and shard bounds crosses the process boundary.
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from lsb import embed_lsb, extract_lsb, group_size
+
+# Shards smaller than this are not worth a round trip to a worker
+MIN_SHARD_BYTES = 64 * 1024
+
+def _attach(name):
+    # Pool workers share the owner's resource tracker, so attaching never leads to an unlink
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+def _embed_shard(frames_name, payload_name, offset, start, stop, bits, stride):
+    frames_shm, payload_shm = _attach(frames_name), _attach(payload_name)
+    try:
+        target = frames_shm.buf[offset + start * 8 // bits * stride:]
+        source = payload_shm.buf[start:stop]
+        embed_lsb(target, source, bits=bits, stride=stride)
+        target.release(); source.release()
+    finally:
+        frames_shm.close(); payload_shm.close()
+
+def _extract_shard(source, out_name, offset, start, stop, bits, stride):
+    out_shm = _attach(out_name)
+    first = offset + start * 8 // bits * stride
+    try:
+        if source[0] == "shm":
+            frames_shm = _attach(source[1])
+            try:
+                view = frames_shm.buf[first:]
+                out_shm.buf[start:stop] = extract_lsb(view, stop - start, bits=bits, stride=stride)
+                view.release()
+            finally:
+                frames_shm.close()
+        else:
+            # ("file", path, data_offset): map the carrier directly, the page cache is shared anyway
+            _, path, data_offset = source
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)[data_offset + first:]
+                out_shm.buf[start:stop] = extract_lsb(view, stop - start, bits=bits, stride=stride)
+                view.release()
+    finally:
+        out_shm.close()
+
+def shard_bounds(nbytes, workers, bits=1):
+    # Contiguous payload-byte ranges cut on slot-group boundaries, so every shard
+    # maps to its own run of frame bytes
+    if nbytes <= 0: return []
+    gbytes, _ = group_size(bits)
+    count = max(1, min(workers, nbytes // MIN_SHARD_BYTES))
+    step = -(-nbytes // count)
+    step += -step % gbytes
+    return [(start, min(start + step, nbytes)) for start in range(0, nbytes, step)]
+
+class ShardPool:
+    """A process pool plus the shared-memory segments it works on (reused across calls)."""
+    def __init__(self, workers):
+        self.workers = workers
+        # Start the tracker first so workers inherit it instead of spawning their own
+        # (a private tracker would unlink our segments when the worker exits)
+        resource_tracker.ensure_running()
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self._segments = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _segment(self, role, size):
+        shm = self._segments.get(role)
+        if shm is None or shm.size < size:
+            if shm is not None:
+                shm.close(); shm.unlink()
+            shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            self._segments[role] = shm
+        return shm
+
+    def frames(self, size):
+        # Shared frame buffer that embed()/extract() operate on
+        return self._segment("frames", size).buf[:size]
+
+    def embed(self, data, offset=0, bits=1, stride=1):
+        payload = self._segment("payload", len(data))
+        payload.buf[:len(data)] = data
+        frames = self._segments["frames"]
+        futures = [self.pool.submit(_embed_shard, frames.name, payload.name, offset, start, stop, bits, stride)
+                   for start, stop in shard_bounds(len(data), self.workers, bits)]
+        for future in futures: future.result()
+
+    def extract(self, nbytes, offset=0, bits=1, stride=1, path=None, data_offset=0):
+        # From the shared frame buffer, or straight from a WAV file when path is given
+        out = self._segment("out", nbytes)
+        source = ("file", path, data_offset) if path else ("shm", self._segments["frames"].name)
+        futures = [self.pool.submit(_extract_shard, source, out.name, offset, start, stop, bits, stride)
+                   for start, stop in shard_bounds(nbytes, self.workers, bits)]
+        for future in futures: future.result()
+        return bytearray(out.buf[:nbytes])
+
+    def close(self):
+        self.pool.shutdown()
+        for shm in self._segments.values():
+            shm.close(); shm.unlink()
+        self._segments.clear()
@@ -0,0 +1,34 @@
+# tests/conftest.py
+# The modules live at the top level of the repository, next to main.py
+import os
+import sys
+import wave
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def write_cover(path, frames, channels=1, sampwidth=2, framerate=44100):
+    # Noise cover: the low bits are overwritten anyway
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(sampwidth)
+        w.setframerate(framerate)
+        w.writeframes(os.urandom(frames * channels * sampwidth))
+    return str(path)
+
+@pytest.fixture
+def cover(tmp_path):
+    return write_cover(tmp_path / "cover.wav", 1 << 20)
+
+def silent(message, value):
+    pass
+
+def flip_bit(path, frame_byte):
+    # Inverts the LSB of one byte of the frame data (header bit frame_byte in the classic layout)
+    from utils.riff import read_wav_info
+    offset = read_wav_info(path).data_offset + frame_byte
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        value = f.read(1)[0]
+        f.seek(offset)
+        f.write(bytes([value ^ 1]))
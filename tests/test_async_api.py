@@ -0,0 +1,73 @@
+# tests/test_async_api.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from conftest import write_cover
+import logic
+from async_api import JobLimiter, extract_data_async, hide_data_async
+
+def _leftovers(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".part")]
+
+def test_hide_and_extract(cover, tmp_path):
+    output = str(tmp_path / "stego.wav")
+    secret = os.urandom(10_000)
+    messages = []
+
+    async def main():
+        await hide_data_async(cover, secret, "secret.bin", output, "pw", "auto", True,
+                              progress=lambda message, value: messages.append(message))
+        return await extract_data_async(output, "pw")
+    assert asyncio.run(main()) == (secret, "secret.bin")
+    assert messages and not _leftovers(tmp_path)
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(output).st_mode & 0o777 == 0o666 & ~umask
+
+def test_cancelled_hide_leaves_nothing(tmp_path):
+    big = write_cover(tmp_path / "big.wav", 1 << 22, channels=2)
+    output = str(tmp_path / "stego.wav")
+    started = threading.Event()
+
+    def progress(message, value):
+        if message.startswith("Hiding..."): started.set()
+
+    async def main():
+        task = asyncio.create_task(hide_data_async(big, os.urandom(100_000), "secret.bin", output, "", False, False,
+                                                   progress=progress, block_frames=4096))
+        while not started.is_set():
+            assert not task.done()
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    asyncio.run(main())
+    assert not os.path.exists(output)
+    assert not _leftovers(tmp_path)
+
+@pytest.mark.parametrize("max_jobs", [1, 2])
+def test_job_limiter(monkeypatch, tmp_path, max_jobs):
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def hide_data(*args, **kwargs):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.1)
+        with lock:
+            running -= 1
+    monkeypatch.setattr(logic, "hide_data", hide_data)
+
+    async def main():
+        limiter = JobLimiter(max_jobs)
+        with ThreadPoolExecutor(4) as executor:
+            await asyncio.gather(*(hide_data_async("cover.wav", b"x", "x", str(tmp_path / f"out{n}.wav"), "", False,
+                                                   False, executor=executor, limiter=limiter) for n in range(4)))
+    asyncio.run(main())
+    assert peak == max_jobs
+    assert sorted(os.listdir(tmp_path)) == [f"out{n}.wav" for n in range(4)]
@@ -0,0 +1,80 @@
+# tests/test_container.py
+import os
+import pytest
+from conftest import flip_bit, silent
+from compression import CODEC_LZMA, CODEC_STORE, CODEC_ZLIB
+from header import FLAG_CODEC, FLAG_COMPRESSED, FLAG_ENCRYPTED, Entry, create_toc, read_header, read_toc
+from lsb import LSBReader
+import logic
+
+ENTRIES = [
+    Entry("a.txt", FLAG_COMPRESSED, 0, 1000, 300),
+    Entry("ordner/b.bin", FLAG_COMPRESSED | FLAG_ENCRYPTED, 300, 5000, 2048, CODEC_LZMA),
+    Entry("c.jpg", 0, 2348, 70000, 70000),
+]
+
+def _toc_reader(data):
+    return lambda n, pos: data[pos:pos + n]
+
+def test_toc_round_trip():
+    toc = create_toc(ENTRIES)
+    entries = read_toc(_toc_reader(toc + bytes(80000)), len(toc) + 80000)
+    # Read back flags carry the codec-byte bit where one was written
+    assert [e._replace(flags=e.flags & ~FLAG_CODEC, codec=None) for e in entries] == [e._replace(codec=None) for e in ENTRIES]
+    assert [e.codec for e in entries] == [CODEC_ZLIB, CODEC_LZMA, CODEC_STORE]
+
+def test_toc_truncated():
+    toc = create_toc(ENTRIES) + bytes(80000)
+    size = len(create_toc(ENTRIES))
+    for cut in range(size):
+        # The region ends early, or the bytes run out before the size the header claims
+        with pytest.raises(ValueError):
+            read_toc(_toc_reader(toc[:cut]), cut)
+        with pytest.raises(ValueError):
+            read_toc(_toc_reader(toc[:cut]), len(toc))
+
+def test_toc_corrupted():
+    toc = create_toc(ENTRIES)
+    for pos in range(4, len(toc)):
+        tampered = bytearray(toc)
+        tampered[pos] ^= 0x10
+        with pytest.raises(ValueError, match="Table of contents checksum mismatch"):
+            read_toc(_toc_reader(bytes(tampered) + bytes(80000)), len(toc) + 80000)
+
+def test_entry_beyond_payload():
+    toc = create_toc(ENTRIES)
+    with pytest.raises(ValueError, match="File corrupted"):
+        read_toc(_toc_reader(toc + bytes(1000)), len(toc) + 1000)
+
+@pytest.fixture
+def container(cover, tmp_path):
+    files = [("a.txt", b"hello " * 500), ("b.bin", os.urandom(3000)), ("c.txt", b"")]
+    stego = str(tmp_path / "stego.wav")
+    logic.hide_files(cover, files, stego, "pw", "auto", True, silent, archive_name="box")
+    return stego, dict(files)
+
+def test_container_round_trip(container):
+    stego, files = container
+    assert [entry.name for entry in logic.list_entries(stego)] == list(files)
+    for name, data in files.items():
+        assert logic.extract_entry(stego, name, "pw", silent) == (data, name)
+
+def test_container_tampered_toc(container):
+    stego, _ = container
+    with LSBReader(stego) as reader:
+        header = read_header(reader.read, reader.capacity)
+    # One bit of the first entry's name, just past the TOC length and entry count
+    flip_bit(stego, (header.size + 6) * 8 + 2)
+    with pytest.raises(ValueError, match="Table of contents checksum mismatch"):
+        logic.list_entries(stego)
+
+def test_container_truncated_carrier(container, tmp_path):
+    stego, _ = container
+    with LSBReader(stego) as reader:
+        header = read_header(reader.read, reader.capacity)
+        offset = reader.info.data_offset
+    # Cut the file inside the table of contents
+    with open(stego, 'r+b') as f:
+        f.truncate(offset + (header.size + 10) * 8)
+    with pytest.raises(ValueError):
+        logic.list_entries(stego)
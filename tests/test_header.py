@@ -0,0 +1,73 @@
+# tests/test_header.py
+import os
+import pytest
+from conftest import flip_bit, silent
+from compression import CODEC_LZMA, CODEC_STORE, CODEC_ZLIB
+from header import (MAGIC_V2, SIZE_FIELD_WIDTH, FLAG_COMPRESSED, FLAG_ENCRYPTED, create_header_v2, decode_varint,
+                    encode_varint, payload_region, read_header, sample_flags)
+from lsb import BYTE_REGION, LSBWriter
+import logic
+
+def _read(data):
+    return read_header(lambda n, pos: data[pos:pos + n])
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2**32 + 5])
+def test_padded_varint_round_trip(value):
+    encoded = encode_varint(value, SIZE_FIELD_WIDTH)
+    assert len(encoded) == SIZE_FIELD_WIDTH
+    assert decode_varint(encoded, 0) == (value, SIZE_FIELD_WIDTH)
+    assert decode_varint(encode_varint(value), 0)[0] == value
+
+def test_padded_varint_overflow():
+    with pytest.raises(ValueError):
+        encode_varint(1 << 42, SIZE_FIELD_WIDTH)
+
+@pytest.mark.parametrize("codec", [CODEC_STORE, CODEC_ZLIB, CODEC_LZMA])
+def test_v2_header_round_trip(codec):
+    flags = sample_flags(3) | FLAG_ENCRYPTED | (FLAG_COMPRESSED if codec != CODEC_STORE else 0)
+    data = create_header_v2("dokumänt.pdf", 123456, 7890, flags, SIZE_FIELD_WIDTH, codec)
+    assert data.startswith(MAGIC_V2)
+    header = _read(data)
+    assert (header.filename, header.original_size, header.payload_size) == ("dokumänt.pdf", 123456, 7890)
+    assert (header.codec, header.size) == (codec, len(data))
+    assert header.region.bits == 3
+    # The codec byte is only written for codecs other than zlib
+    assert len(data) == len(create_header_v2("dokumänt.pdf", 0, 0, 0, SIZE_FIELD_WIDTH)) + (codec == CODEC_LZMA)
+
+def test_v2_header_tampered():
+    data = create_header_v2("message.txt", 100, 50, FLAG_COMPRESSED, SIZE_FIELD_WIDTH, CODEC_LZMA)
+    for pos in (6, 8, len(data) - 6, len(data) - 1):  # codec byte, a size, the name, the CRC
+        tampered = bytearray(data)
+        tampered[pos] ^= 0x01
+        with pytest.raises(ValueError, match="Header checksum mismatch"):
+            _read(bytes(tampered))
+
+def test_v2_header_truncated():
+    data = create_header_v2("message.txt", 100, 50, 0, SIZE_FIELD_WIDTH)
+    with pytest.raises(ValueError):
+        _read(data[:-2])
+
+def test_tampered_carrier_header(cover, tmp_path):
+    stego = str(tmp_path / "stego.wav")
+    logic.hide_data(cover, os.urandom(5000), "secret.bin", stego, "", "lzma", False, silent, bits_per_sample=2)
+    assert logic.extract_data(stego, "", silent)[1] == "secret.bin"
+    # One bit of the stored filename; in sample mode the header uses one bit per (16-bit) sample
+    flip_bit(stego, ((len(MAGIC_V2) + 3 + 2 * SIZE_FIELD_WIDTH + 2) * 8 + 5) * 2)
+    with pytest.raises(ValueError, match="Header checksum mismatch"):
+        logic.extract_data(stego, "", silent)
+
+def test_cover_is_not_a_carrier(cover):
+    with pytest.raises(ValueError):
+        logic.extract_data(cover, "", silent)
+
+def test_byte_layout_sample_mode_header(cover, tmp_path):
+    # Sample-mode carriers used to keep the header one bit per frame byte; they still read
+    secret = os.urandom(3000)
+    flags = sample_flags(3)
+    stego = str(tmp_path / "stego.wav")
+    with LSBWriter(cover, stego) as writer:
+        header = create_header_v2("old.bin", len(secret), len(secret), flags, SIZE_FIELD_WIDTH)
+        writer.write(header)
+        writer.set_region(payload_region(flags, writer.params.sampwidth, len(header), BYTE_REGION))
+        writer.write(secret)
+    assert logic.extract_data(stego, "", silent) == (secret, "old.bin")
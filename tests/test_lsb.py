@@ -0,0 +1,51 @@
+# tests/test_lsb.py
+import os
+import pytest
+from conftest import silent, write_cover
+import logic
+from utils.riff import read_wav_info
+
+@pytest.mark.parametrize("extra", [1, 2])
+def test_overflowing_tail_leaves_no_output(tmp_path, extra):
+    # With 3 bits per sample the last bytes only overflow when the partial group is flushed on close
+    cover = write_cover(tmp_path / "cover.wav", 1 << 14)
+    capacity = logic.cover_capacity(cover, 3, "secret.bin")
+    stego = str(tmp_path / "stego.wav")
+    with pytest.raises(ValueError, match="too small"):
+        logic.hide_data(cover, os.urandom(capacity + extra), "secret.bin", stego, "", False, False, silent,
+                        bits_per_sample=3)
+    assert not os.path.exists(stego)
+
+def test_full_cover_round_trip(tmp_path):
+    cover = write_cover(tmp_path / "cover.wav", 1 << 14)
+    capacity = logic.cover_capacity(cover, 3, "secret.bin")
+    secret = os.urandom(capacity)
+    stego = str(tmp_path / "stego.wav")
+    logic.hide_data(cover, secret, "secret.bin", stego, "", False, False, silent, bits_per_sample=3)
+    assert logic.extract_data(stego, "", silent) == (secret, "secret.bin")
+
+@pytest.mark.parametrize("bits", [0, 9, 12, 17])
+def test_bits_per_sample_out_of_range(tmp_path, bits):
+    # Would otherwise overflow the 3-bit flag field into the sample-mode/container bits
+    cover = write_cover(tmp_path / "cover.wav", 1 << 14)
+    stego = str(tmp_path / "stego.wav")
+    with pytest.raises(ValueError, match="between 1 and 8"):
+        logic.hide_data(cover, b"secret", "secret.bin", stego, "", False, False, silent, bits_per_sample=bits)
+    with pytest.raises(ValueError, match="between 1 and 8"):
+        logic.hide_files(cover, [("a.txt", b"secret")], stego, "", False, False, silent, bits_per_sample=bits)
+    assert not os.path.exists(stego)
+
+@pytest.mark.parametrize("sampwidth", [2, 3])
+def test_sample_mode_keeps_upper_bytes(tmp_path, sampwidth):
+    # Header and payload only touch the low byte of each sample
+    cover = write_cover(tmp_path / "cover.wav", 1 << 14, channels=2, sampwidth=sampwidth)
+    stego = str(tmp_path / "stego.wav")
+    secret = os.urandom(4000)
+    logic.hide_data(cover, secret, "secret.bin", stego, "", False, False, silent, bits_per_sample=4)
+    assert logic.extract_data(stego, "", silent) == (secret, "secret.bin")
+    with open(cover, 'rb') as a, open(stego, 'rb') as b:
+        before, after = a.read(), b.read()
+    offset = read_wav_info(cover).data_offset
+    for byte in range(1, sampwidth):
+        assert before[offset + byte::sampwidth] == after[offset + byte::sampwidth]
+    assert before[offset::sampwidth] != after[offset::sampwidth]
@@ -0,0 +1,56 @@
+# tests/test_pipeline.py
+import os
+import tracemalloc
+import pytest
+from conftest import silent
+from compression import CODECS, compressor
+from pipeline import CHUNK_SIZE, decompress_stage
+import logic
+
+@pytest.mark.parametrize("name", ["zlib-9", "lzma", "bz2"])
+def test_decompress_chunks_are_bounded(name):
+    codec = CODECS[name]
+    comp = compressor(codec)
+    packed = comp.compress(bytes(20 * CHUNK_SIZE + 123)) + comp.flush()
+    # One input chunk carrying the whole stream still comes out CHUNK_SIZE at a time
+    chunks = list(decompress_stage([packed], codec.codec_id))
+    assert max(len(chunk) for chunk in chunks) <= CHUNK_SIZE
+    assert sum(len(chunk) for chunk in chunks) == 20 * CHUNK_SIZE + 123
+    assert not any(chunks[-1])
+
+def test_decompress_truncated_stream():
+    comp = compressor(CODECS["zlib-9"])
+    packed = comp.compress(os.urandom(4096)) + comp.flush()
+    with pytest.raises(ValueError, match="Data corrupted"):
+        list(decompress_stage([packed[:-10]], CODECS["zlib-9"].codec_id))
+
+def test_extract_to_peak_memory(cover, tmp_path):
+    # 64 MiB of zeros compresses to a few dozen KiB, so it fits the cover; extracting it must
+    # not expand the payload in memory
+    size = 64 << 20
+    secret = tmp_path / "zeros.bin"
+    with open(secret, 'wb') as f:
+        f.truncate(size)
+    stego = str(tmp_path / "stego.wav")
+    logic.hide_data(cover, str(secret), "zeros.bin", stego, "", "zlib-9", False, silent, bits_per_sample=2)
+
+    output = str(tmp_path / "out.bin")
+    tracemalloc.start()
+    try:
+        assert logic.extract_to(stego, output, "", silent) == "zeros.bin"
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert os.path.getsize(output) == size
+    assert peak < 16 << 20
+
+def test_extracted_file_mode(cover, tmp_path):
+    # Published through a temporary file, but with the mode a plain open() would give
+    stego = str(tmp_path / "stego.wav")
+    logic.hide_data(cover, b"hello", "hello.txt", stego, "", False, False, silent)
+    output = str(tmp_path / "hello.txt")
+    logic.extract_to(stego, output, "", silent)
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(output).st_mode & 0o777 == 0o666 & ~umask
+    assert os.stat(output).st_mode & 0o777 == os.stat(stego).st_mode & 0o777
@@ -0,0 +1,31 @@
+# tests/test_prostego.py
+import json
+import pytest
+from prostego import load_manifest
+
+def _manifest(tmp_path, *rows):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding='utf-8')
+    return str(path)
+
+def test_manifest_bits(tmp_path):
+    jobs = load_manifest(_manifest(tmp_path, {"cover": "c.wav", "payload": "p.bin", "output": "o.wav", "bits": "3"},
+                                   {"cover": "c.wav", "payload": "p.bin", "output": "o.wav", "bits": 8},
+                                   {"cover": "c.wav", "payload": "p.bin", "output": "o.wav", "bits": ""}))
+    assert [job["bits"] for job in jobs] == [3, 8, None]
+
+@pytest.mark.parametrize("bits", ["four", "0", "9", "2.5"])
+def test_manifest_bad_bits(tmp_path, bits):
+    path = _manifest(tmp_path, {"cover": "c.wav", "payload": "p.bin", "output": "o.wav"},
+                     {"cover": "c.wav", "payload": "p.bin", "output": "o.wav", "bits": bits})
+    with pytest.raises(ValueError, match="Manifest row 2: bits must be a number from 1 to 8"):
+        load_manifest(path)
+
+def test_manifest_csv(tmp_path):
+    path = tmp_path / "jobs.csv"
+    path.write_text("op,cover,payload,output,compress,encrypt,bits,password\n"
+                    "hide,c.wav,p.bin,o.wav,lzma,yes,2,pw\n"
+                    "extract,o.wav,,out,,,,pw\n", encoding='utf-8')
+    hide, extract = load_manifest(str(path))
+    assert (hide["compress"], hide["encrypt"], hide["bits"], hide["name"]) == ("lzma", True, 2, "p.bin")
+    assert (extract["op"], extract["bits"], extract["compress"]) == ("extract", None, True)
@@ -0,0 +1,103 @@
+# tests/test_security.py
+import os
+import pytest
+import security
+from security import (MAGIC_KDF, MAGIC_SEG, KDF_STRUCT, KDF_IDS, DEFAULT_KDFS, SEG_HEADER_LEN, TAG_SIZE, KdfParams,
+                      SegmentedEncryptor, SegmentedReader, encrypt_bytes, decrypt_bytes, encode_kdf)
+
+# --- KDF parameters from the carrier ---
+def _with_kdf(blob, kdf_id, cost, memory, parallelism):
+    pos = len(MAGIC_KDF)
+    return blob[:pos] + KDF_STRUCT.pack(kdf_id, cost, memory, parallelism) + blob[pos + KDF_STRUCT.size:]
+
+HOSTILE_KDFS = [
+    (KDF_IDS["pbkdf2"], 2**32 - 1, 0, 0),
+    (KDF_IDS["pbkdf2"], 0, 0, 0),
+    (KDF_IDS["scrypt"], 30, 8, 1),
+    (KDF_IDS["scrypt"], 20, 16, 1),     # 2 GiB
+    (KDF_IDS["scrypt"], 14, 8, 2**20),
+    (KDF_IDS["argon2id"], 3, 2**32 - 1, 4),
+    (KDF_IDS["argon2id"], 2**31, 64 * 1024, 4),
+    (KDF_IDS["argon2id"], 3, 64 * 1024, 2**24),
+]
+
+@pytest.mark.parametrize("segmented", [False, True])
+@pytest.mark.parametrize("params", HOSTILE_KDFS)
+def test_out_of_range_kdf_is_rejected_before_derivation(monkeypatch, segmented, params):
+    blob = encrypt_bytes(b"secret", "pw", DEFAULT_KDFS["scrypt"], segmented=segmented)
+    assert blob[:len(MAGIC_KDF)] == (MAGIC_SEG if segmented else MAGIC_KDF)
+
+    def run_kdf(*args):
+        raise AssertionError("key derived from out-of-range parameters")
+    monkeypatch.setattr(security, "_run_kdf", run_kdf)
+    with pytest.raises(ValueError, match="Data corrupted"):
+        decrypt_bytes(_with_kdf(blob, *params), "pw")
+
+def test_encode_refuses_unreadable_parameters():
+    with pytest.raises(ValueError):
+        encode_kdf(KdfParams("scrypt", 21, 8, 1))
+    for kdf in DEFAULT_KDFS.values():
+        assert security.decode_kdf(encode_kdf(kdf)) == kdf
+
+def test_oversized_segment_is_rejected(monkeypatch):
+    blob = encrypt_bytes(b"secret", "pw")
+    pos = len(MAGIC_SEG) + KDF_STRUCT.size
+    monkeypatch.setattr(security, "_run_kdf", None)
+    with pytest.raises(ValueError, match="Invalid file format"):
+        decrypt_bytes(blob[:pos] + (2**32 - 1).to_bytes(4, 'big') + blob[pos + 4:], "pw")
+
+# --- Segmented AES-GCM ---
+SEGMENT = 1024
+
+def _segmented(data, workers=1):
+    enc = SegmentedEncryptor("pw", segment_size=SEGMENT, workers=workers)
+    return enc.update(data) + enc.finalize()
+
+def _segments(blob):
+    body = blob[SEG_HEADER_LEN:]
+    stride = SEGMENT + TAG_SIZE
+    return blob[:SEG_HEADER_LEN], [body[i:i + stride] for i in range(0, len(body), stride)]
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("size", [0, 1, SEGMENT - 1, SEGMENT, SEGMENT + 1, 5 * SEGMENT])
+def test_segmented_round_trip(size, workers):
+    data = os.urandom(size)
+    blob = _segmented(data, workers)
+    assert blob.startswith(MAGIC_SEG)
+    assert decrypt_bytes(blob, "pw", workers) == data
+
+def test_segmented_swapped_segments():
+    header, segments = _segments(_segmented(os.urandom(4 * SEGMENT + 10)))
+    segments[1], segments[2] = segments[2], segments[1]
+    with pytest.raises(ValueError, match="Authentication failed"):
+        decrypt_bytes(header + b"".join(segments), "pw")
+
+@pytest.mark.parametrize("size", [3 * SEGMENT, 3 * SEGMENT + 10])
+def test_segmented_last_flag(size):
+    header, segments = _segments(_segmented(os.urandom(size)))
+    # Dropping trailing segments leaves one that was not sealed as the last
+    for keep in range(1, len(segments)):
+        with pytest.raises(ValueError, match="Authentication failed"):
+            decrypt_bytes(header + b"".join(segments[:keep]), "pw")
+    # Nothing may follow the last segment either
+    with pytest.raises(ValueError, match="Authentication failed"):
+        decrypt_bytes(header + b"".join(segments + segments[-1:]), "pw")
+
+def test_segmented_header_is_authenticated():
+    blob = bytearray(_segmented(os.urandom(2 * SEGMENT)))
+    blob[SEG_HEADER_LEN - 1] ^= 0x01  # nonce prefix
+    with pytest.raises(ValueError, match="Authentication failed"):
+        decrypt_bytes(bytes(blob), "pw")
+
+def test_segmented_reader_partial():
+    data = os.urandom(5 * SEGMENT + 100)
+    header, segments = _segments(_segmented(data))
+    segments[3] = segments[3][:-1] + bytes([segments[3][-1] ^ 1])
+    blob = header + b"".join(segments)
+    reader = SegmentedReader(lambda n, pos: blob[pos:pos + n], len(blob), "pw")
+    assert reader.size == len(data)
+    # Ranges that do not touch the damaged segment still decrypt
+    assert reader.read(SEGMENT - 5, 2 * SEGMENT) == data[SEGMENT - 5:3 * SEGMENT - 5]
+    assert reader.read(4 * SEGMENT, 10_000) == data[4 * SEGMENT:]
+    with pytest.raises(ValueError, match="Authentication failed"):
+        reader.read(3 * SEGMENT + 1, 1)
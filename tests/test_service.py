@@ -0,0 +1,124 @@
+# tests/test_service.py
+# The HTTP app through Flask's test client, on a small noise cover
+import io
+import os
+import threading
+import time
+import pytest
+from conftest import write_cover
+import logic
+from service import StegoService, create_app
+
+@pytest.fixture
+def service(tmp_path):
+    service = StegoService(spool_dir=str(tmp_path / "spool"), workers=1, max_queued=1)
+    yield service
+    service.close()
+
+@pytest.fixture
+def client(service):
+    return create_app(service).test_client()
+
+@pytest.fixture
+def cover_bytes(tmp_path):
+    with open(write_cover(tmp_path / "cover.wav", 1 << 15), 'rb') as f:
+        return f.read()
+
+def _hide(client, cover_bytes, payload=b"secret message", **fields):
+    data = {"cover": (io.BytesIO(cover_bytes), "cover.wav"), "payload": (io.BytesIO(payload), "secret.txt")}
+    data.update(fields)
+    return client.post("/jobs/hide", data=data, content_type="multipart/form-data")
+
+def _wait(client, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/jobs/{job_id}").get_json()
+        if status["state"] in ("done", "failed", "cancelled"): return status
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_hide_poll_download_and_extract(client, cover_bytes):
+    payload = os.urandom(5000)
+    response = _hide(client, cover_bytes, payload, encrypt="true", password="pw", bits="2")
+    assert response.status_code == 202
+    job = response.get_json()
+    assert response.headers["Location"] == f"/jobs/{job['id']}"
+    status = _wait(client, job["id"])
+    assert status["state"] == "done", status["error"]
+    assert status["result"] == "cover_stego.wav"
+    stego = client.get(f"/jobs/{job['id']}/result").data
+    assert stego[:4] == b"RIFF" and len(stego) == len(cover_bytes)
+
+    response = client.post("/jobs/extract", data={"stego": (io.BytesIO(stego), "cover_stego.wav"), "password": "pw"},
+                           content_type="multipart/form-data")
+    assert response.status_code == 202
+    status = _wait(client, response.get_json()["id"])
+    assert status["state"] == "done", status["error"]
+    assert status["result"] == "secret.txt"
+    assert client.get(f"/jobs/{status['id']}/result").data == payload
+
+def test_extract_with_wrong_password_fails(client, cover_bytes):
+    job = _hide(client, cover_bytes, encrypt="true", password="pw").get_json()
+    stego = client.get(f"/jobs/{_wait(client, job['id'])['id']}/result").data
+    response = client.post("/jobs/extract", data={"stego": (io.BytesIO(stego), "s.wav"), "password": "nope"},
+                           content_type="multipart/form-data")
+    status = _wait(client, response.get_json()["id"])
+    assert status["state"] == "failed" and "Authentication failed" in status["error"]
+    assert client.get(f"/jobs/{status['id']}/result").status_code == 409
+
+@pytest.mark.parametrize("bits", ["abc", "0", "9", "17"])
+def test_bad_bits_is_rejected(client, cover_bytes, bits):
+    response = _hide(client, cover_bytes, bits=bits)
+    assert response.status_code == 400
+    assert "bits" in response.get_json()["error"]
+
+def test_missing_file_is_rejected(client, service):
+    response = client.post("/jobs/hide", data={"payload": (io.BytesIO(b"x"), "x.txt")},
+                           content_type="multipart/form-data")
+    assert response.status_code == 400
+    assert "cover" in response.get_json()["error"]
+    # The job's spool folder is removed again
+    assert os.listdir(service.spool_dir) == []
+
+def test_unknown_job_and_operation(client):
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.post("/jobs/shred").status_code == 404
+
+@pytest.fixture
+def blocked(monkeypatch):
+    # Hides wait for the event, so jobs pile up behind the single worker
+    release = threading.Event()
+    hide_data = logic.hide_data
+
+    def slow_hide(*args, **kwargs):
+        release.wait(30)
+        return hide_data(*args, **kwargs)
+    monkeypatch.setattr(logic, "hide_data", slow_hide)
+    yield release
+    release.set()
+
+def test_cancel_queued_job_and_busy(client, service, cover_bytes, blocked):
+    running = _hide(client, cover_bytes).get_json()
+    deadline = time.monotonic() + 10
+    while client.get(f"/jobs/{running['id']}").get_json()["state"] != "running":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    queued = _hide(client, cover_bytes).get_json()
+    assert queued["state"] == "queued"
+
+    # max_queued=1: the next submission is refused
+    response = _hide(client, cover_bytes)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+
+    response = client.delete(f"/jobs/{queued['id']}")
+    assert response.status_code == 200
+    assert response.get_json()["state"] == "cancelled"
+    assert client.get(f"/jobs/{queued['id']}").status_code == 404
+    # Only the running job's folder is left
+    assert os.listdir(service.spool_dir) == [os.path.basename(service.get(running["id"]).directory)]
+    # With the queue free again a new job is accepted
+    assert _hide(client, cover_bytes).status_code == 202
+
+    blocked.set()
+    assert _wait(client, running["id"])["state"] == "done"
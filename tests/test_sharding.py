@@ -0,0 +1,34 @@
+# tests/test_sharding.py
+# Sharded embedding/extraction must produce exactly what the single-process path does
+import os
+import pytest
+from conftest import silent, write_cover
+import logic
+import sharding
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    # Small covers and payloads still get split across the workers, and read through them
+    monkeypatch.setattr(sharding, "MIN_SHARD_BYTES", 1024)
+    monkeypatch.setattr(logic, "SHARD_MIN_PAYLOAD", 0)
+
+@pytest.mark.parametrize("bits", [None, 3, 5, 8])
+def test_sharded_hide_matches_single_process(tmp_path, small_shards, bits):
+    cover = write_cover(tmp_path / "cover.wav", 1 << 17, channels=2)
+    secret = os.urandom(60_000)
+    outputs = []
+    for workers in (1, 2):
+        stego = str(tmp_path / f"stego{workers}.wav")
+        logic.hide_data(cover, secret, "secret.bin", stego, "", False, False, silent, block_frames=4096,
+                        workers=workers, bits_per_sample=bits)
+        with open(stego, 'rb') as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
+    assert logic.extract_data(stego, "", silent, workers=2) == (secret, "secret.bin")
+
+def test_shard_bounds_follow_slot_groups(monkeypatch):
+    monkeypatch.setattr(sharding, "MIN_SHARD_BYTES", 10)
+    bounds = sharding.shard_bounds(1000, 4, bits=3)
+    assert bounds[0][0] == 0 and bounds[-1][1] == 1000
+    assert all(start % 3 == 0 for start, _ in bounds)
+    assert all(stop == start for (_, stop), (start, _) in zip(bounds, bounds[1:]))
@@ -0,0 +1,74 @@
+# ui/event_bus.py
+# Worker threads never touch widgets: they publish log lines, progress updates and
+# callables here, and MainWindow drains the queue on the Tk thread every FRAME_MS.
+# Progress is coalesced to one draw per frame and log lines are inserted in one batch.
+import queue
+import re
+import traceback
+
+FRAME_MS = 50                 # ~20 UI updates per second
+MAX_EVENTS_PER_FRAME = 10000  # whatever is left is handled in the next frame
+
+_TICKER = re.compile(r"[\s\d.%]*$")
+
+def _phase(message):
+    # "Hiding... 42%" and "Hiding... 43%" are the same phase; "Decrypting..." is a new one
+    return _TICKER.sub("", message)
+
+class EventBus:
+    """Thread-safe: any thread may publish; only the Tk thread calls drain()."""
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._last_ticker = None  # drain() side only: last progress message written to the log
+
+    def log(self, message):
+        self._queue.put(("log", message))
+
+    def progress(self, message, value):
+        self._queue.put(("progress", message, value))
+
+    def call(self, fn, *args, **kwargs):
+        # Widget updates, messageboxes, ...: run on the Tk thread, in publishing order
+        self._queue.put(("call", fn, args, kwargs))
+
+    def drain(self, write_logs, set_progress):
+        # write_logs(lines) and set_progress(value) run at most once per batch. Of a run of
+        # progress updates in the same phase only the last is logged and drawn.
+        lines, value, ticker = [], None, None
+
+        def log_ticker():
+            nonlocal ticker
+            if ticker is not None and ticker != self._last_ticker:
+                lines.append(ticker)
+                self._last_ticker = ticker
+            ticker = None
+
+        def flush():
+            nonlocal lines, value
+            log_ticker()
+            if lines: write_logs(lines)
+            if value is not None: set_progress(value)
+            lines, value = [], None
+
+        for _ in range(MAX_EVENTS_PER_FRAME):
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            kind = event[0]
+            if kind == "log":
+                log_ticker()
+                lines.append(event[1])
+            elif kind == "progress":
+                if ticker is not None and _phase(ticker) != _phase(event[1]): log_ticker()
+                ticker, value = event[1], event[2]
+            else:
+                flush()
+                _, fn, args, kwargs = event
+                try:
+                    fn(*args, **kwargs)
+                except Exception:
+                    traceback.print_exc()  # what Tk does with a failing callback; keep draining
+        flush()
+
+bus = EventBus()
@@ -3,6 +3,9 @@ import customtkinter as ctk
 from ui.tabs.hide_tab import HideTab
 from ui.tabs.extract_tab import ExtractTab
 from ui.styles import Theme
+from ui.event_bus import bus, FRAME_MS
+
+MAX_CONSOLE_LINES = 2000
 
 class MainWindow(ctk.CTk):
     def __init__(self):
@@ -14,6 +17,7 @@ class MainWindow(ctk.CTk):
         
         self.configure(fg_color=Theme.COLOR_BG)
         self._setup_layout()
+        self._pump_events()
 
     def _setup_layout(self):
         self.grid_columnconfigure(0, weight=1)
@@ -61,20 +65,25 @@ class MainWindow(ctk.CTk):
                                           text_color=Theme.COLOR_LOG_TEXT)
         self.log_console.grid(row=1, column=0, padx=15, pady=5, sticky="nsew")
 
-        # Init Tabs
-        self.hide_tab = HideTab(self.tab_view.tab(" Hide Data "), self._log, self._update_progress)
+        # Init Tabs (log/progress go through the event bus, so worker threads may call them)
+        self.hide_tab = HideTab(self.tab_view.tab(" Hide Data "), bus.log, bus.progress)
         self.hide_tab.pack(fill="both", expand=True)
         
-        self.extract_tab = ExtractTab(self.tab_view.tab(" Extract Data "), self._log, self._update_progress)
+        self.extract_tab = ExtractTab(self.tab_view.tab(" Extract Data "), bus.log, bus.progress)
         self.extract_tab.pack(fill="both", expand=True)
 
-    def _log(self, message):
+    # --- Event bus (the only place widgets are updated on behalf of workers) ---
+    def _pump_events(self):
+        try:
+            bus.drain(self._write_logs, self.progress_bar.set)
+        finally:
+            self.after(FRAME_MS, self._pump_events)
+
+    def _write_logs(self, lines):
         self.log_console.configure(state="normal")
-        self.log_console.insert("end", f"[SYSTEM] >> {message}\n")
+        self.log_console.insert("end", "".join(f"[SYSTEM] >> {line}\n" for line in lines))
+        # Keep the console bounded on long runs
+        excess = int(self.log_console.index("end-1c").split(".")[0]) - MAX_CONSOLE_LINES
+        if excess > 0: self.log_console.delete("1.0", f"{excess + 1}.0")
         self.log_console.see("end")
-        self.log_console.configure(state="disabled")
-
-    def _update_progress(self, message, value):
-        self._log(message)
-        self.progress_bar.set(value)
-        self.update_idletasks()
\ No newline at end of file
+        self.log_console.configure(state="disabled")
\ No newline at end of file
@@ -3,11 +3,13 @@ import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import threading
 import os
+import shutil
+import atexit
 import tempfile
-from logic import extract_data
 from ui.widgets import FileInputFrame
 from utils import preview_handler
 from ui.styles import Theme
+from ui.event_bus import bus
 
 INTERNAL_APP_KEY = "ProStegoInternalSecretKey#2024"
 
@@ -17,8 +19,11 @@ class ExtractTab(ctk.CTkFrame):
         self.log = log_callback
         self.update_progress = progress_callback
         self.fonts = Theme.get_fonts()
-        self.extracted_data = None
+        self.extracted_path = None
         self.extracted_filename = None
+        # Extracted files are streamed here; previews and "Save" read them back from disk
+        self._temp_dir = tempfile.mkdtemp(prefix="prostego-extract-")
+        atexit.register(shutil.rmtree, self._temp_dir, True)
         
         self.grid_columnconfigure(0, weight=1)
         self.grid_columnconfigure(1, weight=1)
@@ -51,31 +56,63 @@ class ExtractTab(ctk.CTkFrame):
         self.btn_save.grid(row=1, column=1, padx=10, pady=10, sticky="ew")
 
     def _start_extracting(self):
+        # logic (NumPy, the crypto backends) is imported on first use, not at startup
+        from logic import list_entries
         stego = self.stego_file_frame.get()
         if not stego: return messagebox.showerror("Error", "Select stego file!")
         self.btn_save.configure(state="disabled")
-        
-        threading.Thread(target=self._run_extract, args=(stego, INTERNAL_APP_KEY), daemon=True).start()
 
-    def _run_extract(self, stego, password):
+        # Multi-file containers go straight to a folder (only the table of contents is read here)
+        try: entries = list_entries(stego)
+        except (OSError, ValueError): entries = None
+        out_dir = None
+        if entries is not None:
+            out_dir = filedialog.askdirectory(title=f"Extract {len(entries)} files to...")
+            if not out_dir: return
+
+        self.btn_extract.configure(state="disabled")
+        threading.Thread(target=self._run_extract, args=(stego, INTERNAL_APP_KEY, out_dir), daemon=True).start()
+
+    def _run_extract(self, stego, password, out_dir=None):
+        # Worker thread: widgets and dialogs only through the event bus
+        from logic import extract_to, extract_all
         try:
-            self.btn_extract.configure(state="disabled")
-            self.extracted_data, self.extracted_filename = extract_data(stego, password, self.update_progress)
-            self._update_extract_view()
-            messagebox.showinfo("Success", "Extraction Complete!")
+            if out_dir:
+                for path in extract_all(stego, out_dir, password, self.update_progress):
+                    self.log(f"Extracted: {path}")
+                bus.call(messagebox.showinfo, "Success", f"Files extracted to {out_dir}")
+                return
+            folder = tempfile.mkdtemp(dir=self._temp_dir)
+            target = os.path.join(folder, "payload.part")
+            try:
+                filename = extract_to(stego, target, password, self.update_progress)
+            except BaseException:
+                shutil.rmtree(folder, ignore_errors=True)
+                raise
+            # Previews (and pygame) go by the extension, so the file gets its stored name
+            path = os.path.join(folder, os.path.basename(filename) or "extracted.bin")
+            os.replace(target, path)
+            bus.call(self._show_extracted, path, filename)
+            bus.call(messagebox.showinfo, "Success", "Extraction Complete!")
         except ValueError as e:
             msg = str(e)
             if "Authentication failed" in msg:
                 self.log(f"❌ Security Error: {msg}")
-                messagebox.showerror("Tamper Detected", "❌ Data corrupted or tampered with!")
+                bus.call(messagebox.showerror, "Tamper Detected", "❌ Data corrupted or tampered with!")
             else:
                 self.log(f"❌ Error: {msg}")
-                messagebox.showerror("Error", msg)
+                bus.call(messagebox.showerror, "Error", msg)
         except Exception as e:
             self.log(f"❌ System Error: {e}")
-            messagebox.showerror("System Error", str(e))
+            bus.call(messagebox.showerror, "System Error", str(e))
         finally:
-            self.btn_extract.configure(state="normal")
+            bus.call(self.btn_extract.configure, state="normal")
+
+    def _show_extracted(self, path, filename):
+        previous = self.extracted_path
+        self.extracted_path, self.extracted_filename = path, filename
+        self._update_extract_view()
+        if previous: shutil.rmtree(os.path.dirname(previous), ignore_errors=True)
 
     def _update_extract_view(self):
         for w in self.extract_preview_area.winfo_children(): w.destroy()
@@ -84,20 +121,18 @@ class ExtractTab(ctk.CTkFrame):
         
         # --- التصحيح هنا: استخدام create_... بدلاً من render_... ---
         if ext in ['.wav', '.mp3']:
-            temp_path = os.path.join(tempfile.gettempdir(), self.extracted_filename)
-            with open(temp_path, 'wb') as f: f.write(self.extracted_data)
-            preview_handler.create_waveform_preview(self.extract_preview_area, temp_path, self.log)
+            preview_handler.create_waveform_preview(self.extract_preview_area, self.extracted_path, self.log)
         elif ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp']:
-            preview_handler.create_image_preview(self.extract_preview_area, self.extracted_data)
+            preview_handler.create_image_preview(self.extract_preview_area, self.extracted_path)
         elif ext in ['.txt', '.md', '.py', '.json']:
-            preview_handler.create_text_preview(self.extract_preview_area, self.extracted_data, from_bytes=True)
+            preview_handler.create_text_preview(self.extract_preview_area, self.extracted_path, from_file=True)
         else:
-            preview_handler.create_info_preview(self.extract_preview_area, filename=self.extracted_filename, data=self.extracted_data)
+            preview_handler.create_info_preview(self.extract_preview_area, file_path=self.extracted_path, filename=self.extracted_filename)
         
         self.btn_save.configure(state="normal")
 
     def _save_file(self):
         path = filedialog.asksaveasfilename(initialfile=self.extracted_filename)
         if path:
-            with open(path, 'wb') as f: f.write(self.extracted_data)
+            shutil.copyfile(self.extracted_path, path)
             self.log(f"Saved to: {path}")
\ No newline at end of file
@@ -3,12 +3,25 @@ import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import threading
 import os
-from logic import hide_data
+from concurrent.futures import ThreadPoolExecutor
+from compression import AUTO, CODECS
 from ui.widgets import FileInputFrame
 from utils import preview_handler
 from ui.styles import Theme
+from ui.event_bus import bus
 
 INTERNAL_APP_KEY = "ProStegoInternalSecretKey#2024"
+# Capacity plans compress a payload sample (hundreds of ms for lzma), so they run here, one at a time
+_plan_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capacity-plan")
+# A long message is planned from this many evenly spaced slices (as logic.plan_capacity samples files)
+TEXT_SAMPLES = 8
+TEXT_SAMPLE_CHARS = 64 * 1024
+
+def _fmt_size(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024: return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
 
 class HideTab(ctk.CTkFrame):
     def __init__(self, parent, log_callback, progress_callback):
@@ -16,6 +29,9 @@ class HideTab(ctk.CTkFrame):
         self.log = log_callback
         self.update_progress = progress_callback
         self.fonts = Theme.get_fonts()
+        self._plan_job = None
+        self._plan_generation = 0  # bumped per request; older plans are dropped when they arrive
+        self._preview_job = None
         
         self.grid_columnconfigure(0, weight=1)
         self.grid_columnconfigure(1, weight=1)
@@ -27,7 +43,8 @@ class HideTab(ctk.CTkFrame):
         left_frame = ctk.CTkScrollableFrame(self, fg_color="transparent", scrollbar_button_color=Theme.COLOR_ACCENT_MAIN)
         left_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
 
-        self.cover_audio_frame = FileInputFrame(left_frame, "1. Cover Audio (.wav)", [("WAV", "*.wav")], self.log)
+        self.cover_audio_frame = FileInputFrame(left_frame, "1. Cover Audio (.wav)", [("WAV", "*.wav")], self.log,
+                                                on_change=self._schedule_plan)
         self.cover_audio_frame.pack(pady=10, fill="x")
 
         # Payload
@@ -44,7 +61,8 @@ class HideTab(ctk.CTkFrame):
         self.payload_container = ctk.CTkFrame(card_payload, fg_color="transparent")
         self.payload_container.pack(fill="x", padx=5, pady=(0, 15))
         
-        self.secret_file_frame = FileInputFrame(self.payload_container, "Select File to Hide", [("All", "*.*")], self.log)
+        self.secret_file_frame = FileInputFrame(self.payload_container, "Select File to Hide", [("All", "*.*")], self.log,
+                                                on_change=self._schedule_plan)
         self.secret_file_frame.pack(fill="x")
         
         self.secret_text_frame = ctk.CTkFrame(self.payload_container, fg_color="transparent")
@@ -59,12 +77,25 @@ class HideTab(ctk.CTkFrame):
         
         self.encryption_var = ctk.StringVar(value="Standard")
         self.encryption_switch = ctk.CTkSwitch(card_opts, text="Secure Mode (AES-Encrypt)", variable=self.encryption_var, onvalue="AES", offvalue="Standard", 
-                                               font=self.fonts["body"], progress_color=Theme.COLOR_ACCENT_GREEN)
+                                               font=self.fonts["body"], progress_color=Theme.COLOR_ACCENT_GREEN, command=self._schedule_plan)
         self.encryption_switch.pack(pady=5, padx=15, anchor="w")
         
-        self.compress_check = ctk.CTkCheckBox(card_opts, text="Enable Compression (zlib)", font=self.fonts["body"], hover_color=Theme.COLOR_ACCENT_MAIN)
-        self.compress_check.pack(pady=(0, 15), padx=15, anchor="w")
-        self.compress_check.select()
+        # Compression codec; auto picks one from the payload's entropy (see compression.choose_codec)
+        codec_row = ctk.CTkFrame(card_opts, fg_color="transparent")
+        codec_row.pack(pady=(0, 10), padx=15, anchor="w")
+        ctk.CTkLabel(codec_row, text="Compression:", font=self.fonts["body"]).pack(side="left", padx=(0, 10))
+        self.codec_var = ctk.StringVar(value=AUTO)
+        self.codec_menu = ctk.CTkOptionMenu(codec_row, values=[AUTO] + list(CODECS), variable=self.codec_var,
+                                            fg_color=Theme.COLOR_INPUT, button_hover_color=Theme.COLOR_ACCENT_MAIN,
+                                            command=self._schedule_plan)
+        self.codec_menu.pack(side="left")
+
+        # Capacity meter (WAV header + payload sample only, see logic.plan_capacity)
+        self.capacity_bar = ctk.CTkProgressBar(card_opts, height=10, progress_color=Theme.COLOR_ACCENT_GREEN)
+        self.capacity_bar.pack(pady=(0, 5), padx=15, fill="x")
+        self.capacity_bar.set(0)
+        self.capacity_label = ctk.CTkLabel(card_opts, text="Capacity: select a cover and a payload", font=self.fonts["mono"], text_color=Theme.COLOR_TEXT_DIM)
+        self.capacity_label.pack(pady=(0, 15), padx=15, anchor="w")
 
         self.btn_hide = ctk.CTkButton(left_frame, text="🚀 START HIDING PROCESS", height=50, font=self.fonts["button"], 
                                       fg_color=Theme.COLOR_ACCENT_GREEN, text_color="black", hover_color="#00CC7D", corner_radius=15, command=self._start_hiding)
@@ -80,8 +111,101 @@ class HideTab(ctk.CTkFrame):
         self.hide_preview_area.pack(fill="both", expand=True, padx=15, pady=(0, 15))
         ctk.CTkLabel(self.hide_preview_area, text="Type or Select to Preview", text_color=Theme.COLOR_TEXT_DIM).pack(expand=True)
         
-        # --- التصحيح هنا: استخدام create_text_preview ---
-        self.secret_text_box.bind("<KeyRelease>", lambda e: preview_handler.create_text_preview(self.hide_preview_area, self.secret_text_box.get("1.0", "end-1c")))
+        self.text_preview = preview_handler.TextPreview(self.hide_preview_area)
+        self.secret_text_box.bind("<<Modified>>", self._on_text_modified)
+
+    # --- Live text preview ---
+    def _on_text_modified(self, *args):
+        # Tk raises <<Modified>> when its modified flag goes up, i.e. on real edits only (typing,
+        # pasting, deleting; not arrow keys or modifiers). Each one only restarts the two timers.
+        if not self.secret_text_box.edit_modified(): return  # the reset below
+        self.secret_text_box.edit_modified(False)
+        self._schedule_preview()
+        self._schedule_plan()
+
+    def _schedule_preview(self, *args):
+        # A burst of keys (or a paste) redraws the preview once, after it stops
+        if self._preview_job: self.after_cancel(self._preview_job)
+        self._preview_job = self.after(100, self._update_preview)
+
+    def _update_preview(self):
+        self._preview_job = None
+        # Only the characters the preview can show are read from the textbox
+        end = f"1.0 + {preview_handler.PREVIEW_CHARS} chars"
+        if self.secret_text_box.compare(end, ">", "end-1c"): end = "end-1c"  # not Tk's trailing newline
+        self.text_preview.update(self.secret_text_box.get("1.0", end))
+
+    # --- Capacity meter ---
+    def _schedule_plan(self, *args):
+        # Debounced so typing does not re-plan on every key
+        if self._plan_job: self.after_cancel(self._plan_job)
+        self._plan_job = self.after(250, self._update_capacity)
+
+    def _update_capacity(self):
+        self._plan_job = None
+        self._plan_generation += 1
+        cover = self.cover_audio_frame.get()
+        if self.mode_var.get() == "File":
+            secret = self.secret_file_frame.get()
+        else:
+            secret = self._text_sample()
+            if not secret[0]: secret = None
+        if not cover or not secret:
+            self.capacity_bar.set(0)
+            self.capacity_label.configure(text="Capacity: select a cover and a payload", text_color=Theme.COLOR_TEXT_DIM)
+            return
+        name = os.path.basename(secret) if isinstance(secret, str) else "message.txt"
+        _plan_pool.submit(self._plan, self._plan_generation, cover, secret, self.codec_var.get(),
+                          self.encryption_var.get() == "AES", name)
+
+    def _text_sample(self):
+        # (characters, text slices) with bounded reads only, so the cost per plan does not grow
+        # with the message: all of a short text, else TEXT_SAMPLES evenly spaced slices.
+        # The full text is only read by _start_hiding.
+        box = self.secret_text_box
+        count = box._textbox.count("1.0", "end-1c", "chars")  # CTkTextbox does not forward count()
+        chars = count[0] if count else 0
+        if chars <= TEXT_SAMPLES * TEXT_SAMPLE_CHARS:
+            return chars, [box.get("1.0", "end-1c")]
+        span = chars - TEXT_SAMPLE_CHARS
+        offsets = [span * i // (TEXT_SAMPLES - 1) for i in range(TEXT_SAMPLES)]
+        return chars, [box.get(f"1.0 + {o} chars", f"1.0 + {o + TEXT_SAMPLE_CHARS} chars") for o in offsets]
+
+    def _plan(self, generation, cover, secret, compress, use_enc, name):
+        # Worker thread: the result goes back through the event bus
+        if generation != self._plan_generation: return  # superseded while queued
+        # logic (NumPy, the crypto backends) is imported on first use, not at startup
+        from logic import plan_capacity, plan_capacity_sampled
+        try:
+            if isinstance(secret, str):
+                plan = plan_capacity(cover, secret, compress, use_enc, secret_filename=name)
+            else:
+                chars, slices = secret
+                samples = [text.encode('utf-8') for text in slices]
+                if len(samples) == 1:
+                    plan = plan_capacity(cover, samples[0], compress, use_enc, secret_filename=name)
+                else:
+                    # UTF-8 size extrapolated from the slices; the plan is marked approximate
+                    size = chars * sum(map(len, samples)) // sum(map(len, slices))
+                    plan = plan_capacity_sampled(cover, size, samples, compress, use_enc, secret_filename=name)
+        except (OSError, ValueError) as e:
+            plan = e
+        bus.call(self._show_plan, generation, plan)
+
+    def _show_plan(self, generation, plan):
+        if generation != self._plan_generation: return  # inputs changed since it was requested
+        if isinstance(plan, Exception):
+            self.capacity_bar.set(0)
+            self.capacity_label.configure(text=f"Capacity: {plan}", text_color=Theme.COLOR_DANGER)
+            return
+        used = plan.estimated_size / plan.capacity if plan.capacity else 1.0
+        color = Theme.COLOR_ACCENT_GREEN if plan.fits else Theme.COLOR_DANGER
+        approx = "" if plan.exact else "~"
+        self.capacity_bar.configure(progress_color=color)
+        self.capacity_bar.set(min(used, 1.0))
+        self.capacity_label.configure(text=f"Capacity: {approx}{_fmt_size(plan.estimated_size)} / {_fmt_size(plan.capacity)} "
+                                           f"({approx}{used * 100:.0f}%, {plan.codec.name}){'' if plan.fits else ' - does not fit!'}",
+                                      text_color=color)
 
     def _switch_mode(self, value):
         self.secret_file_frame.pack_forget(); self.secret_text_frame.pack_forget()
@@ -91,16 +215,18 @@ class HideTab(ctk.CTkFrame):
             if path: self.secret_file_frame.update_preview(path)
         else:
             self.secret_text_frame.pack(fill="x")
-            preview_handler.create_text_preview(self.hide_preview_area, self.secret_text_box.get("1.0", "end-1c"))
+            self._update_preview()
+        self._schedule_plan()
 
     def _start_hiding(self):
+        from logic import plan_capacity
         cover = self.cover_audio_frame.get()
         if not cover: return messagebox.showerror("Error", "Select cover audio!")
         
         if self.mode_var.get() == "File":
             path = self.secret_file_frame.get()
             if not path: return messagebox.showerror("Error", "Select secret file!")
-            with open(path, 'rb') as f: secret = f.read()
+            secret = path  # opened and streamed by the worker thread
             name = os.path.basename(path)
         else:
             secret = self.secret_text_box.get("1.0", "end-1c").encode('utf-8')
@@ -110,17 +236,34 @@ class HideTab(ctk.CTkFrame):
         use_encryption = (self.encryption_var.get() == "AES")
         password = INTERNAL_APP_KEY if use_encryption else ""
 
+        # Reject early instead of after compressing/encrypting the whole payload
+        try:
+            plan = plan_capacity(cover, secret, self.codec_var.get(), use_encryption, secret_filename=name)
+        except (OSError, ValueError) as e:
+            return messagebox.showerror("Error", str(e))
+        if not plan.fits:
+            msg = f"Payload ({_fmt_size(plan.estimated_size)}) is larger than the cover capacity ({_fmt_size(plan.capacity)})."
+            if plan.exact: return messagebox.showerror("Error", msg)
+            if not messagebox.askyesno("Capacity", msg[:-1] + " by estimate.\nTry anyway?"): return
+
         out = filedialog.asksaveasfilename(defaultextension=".wav", filetypes=[("WAV", "*.wav")])
         if out:
-            threading.Thread(target=self._run_hide, args=(cover, secret, name, out, password, self.compress_check.get(), use_encryption), daemon=True).start()
+            self.btn_hide.configure(state="disabled")
+            threading.Thread(target=self._run_hide, args=(cover, secret, name, out, password, self.codec_var.get(), use_encryption), daemon=True).start()
 
     def _run_hide(self, cover, secret, name, out, password, compress, use_enc):
+        # Worker thread: widgets and dialogs only through the event bus
+        from logic import hide_data
         try:
-            self.btn_hide.configure(state="disabled")
-            hide_data(cover, secret, name, out, password, compress, use_enc, self.update_progress)
-            messagebox.showinfo("Success", "Data Hidden Successfully!")
+            if isinstance(secret, str):
+                with open(secret, 'rb') as f:
+                    report = hide_data(cover, f, name, out, password, compress, use_enc, self.update_progress)
+            else:
+                report = hide_data(cover, secret, name, out, password, compress, use_enc, self.update_progress)
+            self.log(str(report))
+            bus.call(messagebox.showinfo, "Success", "Data Hidden Successfully!")
         except Exception as e:
             self.log(f"ERROR: {e}")
-            messagebox.showerror("Error", str(e))
+            bus.call(messagebox.showerror, "Error", str(e))
         finally:
-            self.btn_hide.configure(state="normal")
\ No newline at end of file
+            bus.call(self.btn_hide.configure, state="normal")
\ No newline at end of file
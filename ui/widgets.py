@@ -6,12 +6,13 @@ from utils import preview_handler
 from .styles import Theme
 
 class FileInputFrame(ctk.CTkFrame):
-    def __init__(self, master, label_text, file_types=None, progress_callback=None):
+    def __init__(self, master, label_text, file_types=None, progress_callback=None, on_change=None):
         super().__init__(master, fg_color=Theme.COLOR_CARD, corner_radius=15, 
                          border_width=1, border_color=Theme.COLOR_BORDER)
         self.fonts = Theme.get_fonts()
         self.file_types = file_types
         self.progress_callback = progress_callback
+        self.on_change = on_change
         
         # Header
         header = ctk.CTkFrame(self, fg_color="transparent")
@@ -49,6 +50,7 @@ class FileInputFrame(ctk.CTkFrame):
             self.entry.delete(0, 'end')
             self.entry.insert(0, path)
             self.update_preview(path)
+            if self.on_change: self.on_change(path)
     
     def update_preview(self, path):
         if not path or not os.path.exists(path): return
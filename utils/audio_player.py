@@ -1,12 +1,20 @@
 # utils/audio_player.py
-import pygame
+# pygame is imported, and its mixer initialized, on the first playback rather than at startup
 import os
 
-# تهيئة المحرك الصوتي بصمت
-try:
-    pygame.mixer.init()
-except:
-    pass
+_pygame = None
+
+def _music():
+    global _pygame
+    if _pygame is None:
+        import pygame
+        # تهيئة المحرك الصوتي بصمت
+        try:
+            pygame.mixer.init()
+        except Exception:
+            pass
+        _pygame = pygame
+    return _pygame.mixer.music
 
 class AudioController:
     def __init__(self):
@@ -17,7 +25,7 @@ class AudioController:
     def load(self, path):
         self.current_file = path
         try:
-            pygame.mixer.music.load(path)
+            _music().load(path)
             self.is_paused = False
         except Exception as e:
             print(f"Audio Load Error: {e}")
@@ -25,23 +33,26 @@ class AudioController:
     def play(self):
         if self.current_file:
             if self.is_paused:
-                pygame.mixer.music.unpause()
+                _music().unpause()
             else:
-                pygame.mixer.music.play()
+                _music().play()
             self.is_paused = False
 
     def pause(self):
-        pygame.mixer.music.pause()
+        _music().pause()
         self.is_paused = True
 
     def stop(self):
-        pygame.mixer.music.stop()
+        _music().stop()
         self.is_paused = False
 
+    def is_busy(self):
+        return _pygame is not None and _music().get_busy()
+
     def get_pos(self):
-        if pygame.mixer.music.get_busy() or self.is_paused:
+        if self.is_busy() or self.is_paused:
             # pygame returns milliseconds, convert to seconds
-            return pygame.mixer.music.get_pos() / 1000.0
+            return _music().get_pos() / 1000.0
         return 0
 
 controller = AudioController()
\ No newline at end of file
@@ -1,25 +1,16 @@
 # utils/preview_handler.py
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+# NumPy (waveform) and pygame (playback) are only imported by the first preview that needs them
 import customtkinter as ctk
-from PIL import Image
 import os
-import io
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from .audio_player import controller as audio_ctrl
-import pygame
-
-try:
-    from pydub import AudioSegment
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
+from ui.event_bus import bus
 
 # Style Constants
 P_BG = "#0F0F0F"         # خلفية الرسمة
 P_WAVE = "#00E5FF"       # لون الموجة
 P_TEXT = "#888888"
+WAVE_SIZE = (760, 200)   # drawn at 2x the 380x100 label, so it stays sharp on HiDPI screens
 
 def format_time(seconds):
     mins = int(seconds // 60)
@@ -29,39 +20,14 @@ def format_time(seconds):
 # --- 1. AUDIO VISUALIZER (MOVING TIMELINE) ---
 def create_waveform_preview(frame, audio_path, progress_callback):
     for widget in frame.winfo_children(): widget.destroy()
-    
-    if not PYDUB_AVAILABLE: 
-        ctk.CTkLabel(frame, text="pydub missing").pack()
-        return
 
     try:
-        # Load & Analyze
-        ext = os.path.splitext(audio_path)[1].lower()
-        if ext == '.wav': audio = AudioSegment.from_wav(audio_path)
-        elif ext == '.mp3': audio = AudioSegment.from_mp3(audio_path)
-        else: audio = AudioSegment.from_file(audio_path)
-        
-        duration = len(audio) / 1000.0
-        samples = np.array(audio.get_array_of_samples())
-        
-        # Optimization
-        if audio.channels > 1: samples = samples[::2]
-        if len(samples) > 8000: samples = samples[::len(samples)//8000]
-        
-        # Plotting (Neon Style)
-        fig, ax = plt.subplots(figsize=(8, 3), dpi=80)
-        fig.patch.set_facecolor(P_BG)
-        ax.set_facecolor(P_BG)
-        ax.plot(samples, color=P_WAVE, linewidth=0.6, alpha=0.9) # Neon Line
-        ax.set_axis_off()
-        plt.subplots_adjust(left=0, right=1, top=1, bottom=0)
-        
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', facecolor=P_BG)
-        buf.seek(0)
-        img = Image.open(buf)
-        plt.close(fig)
-        
+        from . import waveform
+        # Peak envelope (min/max per pixel column), cached on disk per file version
+        envelope = waveform.load_envelope(audio_path, WAVE_SIZE[0])
+        duration = envelope.duration
+        img = waveform.render_envelope(envelope, WAVE_SIZE, P_WAVE, P_BG)
+
         # Display Image
         ctk_img = ctk.CTkImage(light_image=img, dark_image=img, size=(380, 100))
         ctk.CTkLabel(frame, image=ctk_img, text="").pack(fill="x", pady=(5,0))
@@ -90,7 +56,7 @@ def create_waveform_preview(frame, audio_path, progress_callback):
         audio_ctrl.load(audio_path)
         
         def update_ui():
-            if pygame.mixer.music.get_busy():
+            if audio_ctrl.is_busy():
                 # Animation Loop
                 pos = audio_ctrl.get_pos()
                 slider.set(pos)
@@ -102,7 +68,7 @@ def create_waveform_preview(frame, audio_path, progress_callback):
                 slider.set(0)
 
         def toggle():
-            if audio_ctrl.is_paused or not pygame.mixer.music.get_busy():
+            if audio_ctrl.is_paused or not audio_ctrl.is_busy():
                 audio_ctrl.play()
                 btn_play.configure(text="⏸", fg_color=P_WAVE, text_color="black")
                 update_ui() # Start Animation
@@ -116,50 +82,93 @@ def create_waveform_preview(frame, audio_path, progress_callback):
         ctk.CTkLabel(frame, text="Audio Error", text_color="gray").pack(expand=True)
 
 # --- 2. IMAGE RENDERER (Centered High Quality) ---
+IMAGE_BOX = (380, 160)
+_thumbnail_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnail")
+
 def create_image_preview(frame, file_path_or_data):
+    # Decoded off the Tk thread at about the size it is drawn at (see utils.thumbnails)
     for widget in frame.winfo_children(): widget.destroy()
-    try:
-        if isinstance(file_path_or_data, str): pil_image = Image.open(file_path_or_data)
-        else: pil_image = Image.open(io.BytesIO(file_path_or_data))
+    status = ctk.CTkLabel(frame, text="Loading...", text_color="gray")
+    status.pack(expand=True)
 
-        # Smart Fit
-        max_h = 160
-        ratio = max_h / pil_image.size[1]
-        new_w = int(pil_image.size[0] * ratio)
-        
-        if new_w > 380: new_w = 380
-            
-        # High Quality Scaling
-        my_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(new_w, max_h))
-        
+    def show(thumb):
+        if not status.winfo_exists(): return  # another preview has replaced this one meanwhile
+        status.destroy()
+        if thumb is None:
+            ctk.CTkLabel(frame, text="Image Error", text_color="gray").pack(expand=True)
+            return
+        # Smart Fit, keeping the aspect ratio; the pixels are 2x for HiDPI screens
+        scale = min(IMAGE_BOX[0] / thumb.image.width, IMAGE_BOX[1] / thumb.image.height)
+        size = (max(1, round(thumb.image.width * scale)), max(1, round(thumb.image.height * scale)))
+        my_image = ctk.CTkImage(light_image=thumb.image, dark_image=thumb.image, size=size)
         ctk.CTkLabel(frame, image=my_image, text="").pack(expand=True, pady=5)
-        
-        dims = f"{pil_image.size[0]}x{pil_image.size[1]} px"
+
+        dims = f"{thumb.original_size[0]}x{thumb.original_size[1]} px"
         ctk.CTkLabel(frame, text=dims, font=("Consolas", 10), text_color="#555").pack(pady=0)
 
-    except Exception:
-        ctk.CTkLabel(frame, text="Image Error", text_color="gray").pack(expand=True)
+    def work():
+        try:
+            from . import thumbnails
+            thumb = thumbnails.thumbnail(file_path_or_data, (IMAGE_BOX[0] * 2, IMAGE_BOX[1] * 2))
+        except Exception:
+            thumb = None
+        bus.call(show, thumb)
+
+    _thumbnail_pool.submit(work)
 
 # --- 3. TEXT & INFO ---
+PREVIEW_CHARS = 1000  # only the start of a text is ever shown
+
+def _text_box(frame):
+    textbox = ctk.CTkTextbox(frame, fg_color="#080808", font=("Consolas", 11),
+                             text_color="#00FF9D", border_width=0, corner_radius=5)
+    textbox.pack(fill="both", expand=True, padx=5, pady=5)
+    return textbox
+
 def create_text_preview(frame, text_content, from_file=False):
+    # text_content: the text, a path (from_file) or extracted bytes
     for widget in frame.winfo_children(): widget.destroy()
     try:
-        textbox = ctk.CTkTextbox(frame, fg_color="#080808", font=("Consolas", 11), 
-                                 text_color="#00FF9D", border_width=0, corner_radius=5)
-        textbox.pack(fill="both", expand=True, padx=5, pady=5)
+        textbox = _text_box(frame)
         text = ""
         if from_file:
-            with open(text_content, 'r', encoding='utf-8', errors='ignore') as f: text = f.read(1000)
-        else: text = text_content[:1000]
+            with open(text_content, 'r', encoding='utf-8', errors='ignore') as f: text = f.read(PREVIEW_CHARS)
+        elif isinstance(text_content, (bytes, bytearray)):
+            # 4 bytes per character at most; a character cut at the end is dropped
+            text = bytes(text_content[:PREVIEW_CHARS * 4]).decode('utf-8', errors='ignore')[:PREVIEW_CHARS]
+        else: text = text_content[:PREVIEW_CHARS]
         textbox.insert("1.0", text)
         textbox.configure(state="disabled")
     except Exception:
         ctk.CTkLabel(frame, text="Text Error").pack(expand=True)
 
+class TextPreview:
+    """Live preview of text being typed: the textbox stays in place and only the part of the
+    first PREVIEW_CHARS characters that changed is rewritten, however long the text gets."""
+    def __init__(self, frame):
+        self.frame = frame
+        self.textbox = None
+        self.shown = ""
+
+    def update(self, text):
+        text = text[:PREVIEW_CHARS]
+        # Other previews clear the frame; the textbox is recreated after them
+        if self.textbox is None or not self.textbox.winfo_exists():
+            for widget in self.frame.winfo_children(): widget.destroy()
+            self.textbox = _text_box(self.frame)
+            self.shown = ""
+        if text == self.shown: return
+        keep = len(os.path.commonprefix([self.shown, text]))
+        self.textbox.configure(state="normal")
+        self.textbox.delete(f"1.0 + {keep} chars", "end")
+        self.textbox.insert("end", text[keep:])
+        self.textbox.configure(state="disabled")
+        self.shown = text
+
 def create_info_preview(frame, file_path=None, filename=None, data=None):
     for widget in frame.winfo_children(): widget.destroy()
     try:
-        name = os.path.basename(file_path) if file_path else filename
+        name = filename or os.path.basename(file_path)
         size = os.path.getsize(file_path) if file_path else len(data)
         ctk.CTkLabel(frame, text="📄 FILE DETECTED", font=("Segoe UI", 12, "bold"), text_color="#00E5FF").pack(pady=(40, 5))
         ctk.CTkLabel(frame, text=f"{name[:25]}...", font=("Segoe UI", 14), text_color="white").pack()
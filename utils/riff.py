@@ -0,0 +1,36 @@
+# utils/riff.py
+import struct
+from collections import namedtuple
+
+WavInfo = namedtuple("WavInfo", "channels sampwidth framerate nframes data_offset data_size")
+
+def read_wav_info(path):
+    # Walks the RIFF chunk list without decoding any audio.
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            raise ValueError("Not a WAV file.")
+        fmt = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError("WAV file has no data chunk.")
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                if chunk_size % 2: f.seek(1, 1)
+            elif chunk_id == b'data':
+                if fmt is None or len(fmt) < 16:
+                    raise ValueError("WAV file has no fmt chunk.")
+                channels, framerate = struct.unpack('<HI', fmt[2:8])
+                bits_per_sample = struct.unpack('<H', fmt[14:16])[0]
+                sampwidth = (bits_per_sample + 7) // 8
+                data_offset = f.tell()
+                # Truncated files: trust what is actually on disk
+                f.seek(0, 2)
+                data_size = min(chunk_size, f.tell() - data_offset)
+                frame_size = channels * sampwidth
+                nframes = data_size // frame_size if frame_size else 0
+                return WavInfo(channels, sampwidth, framerate, nframes, data_offset, data_size)
+            else:
+                f.seek(chunk_size + (chunk_size % 2), 1)
@@ -0,0 +1,84 @@
+# utils/thumbnails.py
+# Image previews decoded at (close to) the size they are drawn at: JPEG decodes straight to
+# 1/2 .. 1/8 scale (Image.draft) and other formats are shrunk with Image.reduce before the
+# final resample, so a 50-megapixel photo is never fully decoded for a 380x160 box.
+# Results are kept in a byte-bounded LRU keyed by a hash of the image bytes, so a file
+# selected again and an extracted (in-memory) image are both served from the cache.
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from PIL import Image
+
+CACHE_BYTES = 64 << 20  # decoded thumbnail pixels kept in memory
+
+# image: RGB/RGBA PIL image that fits the requested box; original_size: (width, height) of the source
+Thumbnail = namedtuple("Thumbnail", "image original_size")
+
+class ThumbnailCache:
+    """Least-recently-used thumbnails, bounded by their decoded size in bytes. Thread-safe."""
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            thumb = self._items.get(key)
+            if thumb is not None: self._items.move_to_end(key)
+            return thumb
+
+    def put(self, key, thumb):
+        nbytes = _nbytes(thumb.image)
+        if nbytes > self.max_bytes: return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None: self.size -= _nbytes(old.image)
+            self._items[key] = thumb
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= _nbytes(evicted.image)
+
+def _nbytes(image):
+    return image.width * image.height * len(image.getbands())
+
+cache = ThumbnailCache()
+_digests = {}  # (path, size, mtime) -> content hash, so an unchanged file is not re-read
+
+def _digest(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.blake2b(source, digest_size=16).hexdigest()
+    stat = os.stat(source)
+    version = (os.path.abspath(source), stat.st_size, stat.st_mtime_ns)
+    digest = _digests.get(version)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=16)
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""): h.update(block)
+        if len(_digests) > 1024: _digests.clear()
+        digest = _digests[version] = h.hexdigest()
+    return digest
+
+def make_thumbnail(source, box):
+    # source: path or image bytes; box: (width, height) the result must fit in
+    image = Image.open(source if isinstance(source, str) else io.BytesIO(source))
+    original_size = image.size
+    # Cheap JPEG decode at the smallest scale that still covers the box (no-op for other formats)
+    image.draft("RGB", box)
+    # thumbnail() reduces by whole factors first while the image is over 2x the box, then resamples
+    image.thumbnail(box, Image.LANCZOS, reducing_gap=2.0)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    return Thumbnail(image, original_size)
+
+def thumbnail(source, box):
+    """Cached make_thumbnail(); may be called from any thread."""
+    key = (_digest(source), tuple(box))
+    thumb = cache.get(key)
+    if thumb is None:
+        thumb = make_thumbnail(source, box)
+        cache.put(key, thumb)
+    return thumb
@@ -0,0 +1,138 @@
+# utils/waveform.py
+# Peak envelopes for waveform previews: the audio is streamed block by block into one
+# (min, max) pair per pixel column, so long files are never decoded into memory at once and
+# short peaks are not lost to striding. Envelopes are cached on disk, keyed by path, size
+# and mtime, so reopening a cover skips the scan.
+import hashlib
+import os
+from collections import namedtuple
+import numpy as np
+from PIL import Image, ImageColor
+from .riff import read_wav_info
+
+BLOCK_FRAMES = 1 << 18   # frames read per block (1 MiB of 16-bit stereo)
+CACHE_VERSION = 1        # bump when the envelope computation changes
+CACHE_LIMIT = 512        # envelopes kept on disk; the oldest are removed first
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                         "prostego", "waveforms")
+
+# mins/maxs: float32 in [-1, 1] per column, over all channels
+Envelope = namedtuple("Envelope", "mins maxs duration")
+
+# --- Scanning ---
+def _decode(raw, sampwidth):
+    # Little-endian PCM bytes -> float32 in [-1, 1)
+    if sampwidth == 1:
+        return (raw.astype(np.float32) - 128) / 128
+    if sampwidth == 2:
+        return raw.view('<i2').astype(np.float32) / (1 << 15)
+    if sampwidth == 3:
+        # Into the upper three bytes of an int32, which keeps the sign
+        wide = np.zeros((len(raw) // 3, 4), np.uint8)
+        wide[:, 1:] = raw.reshape(-1, 3)
+        return wide.view('<i4')[:, 0].astype(np.float32) / (1 << 31)
+    return raw.view('<i4').astype(np.float32) / (1 << 31)
+
+def _wav_blocks(path, info):
+    # (frames, channels) float32 blocks, reading one buffer's worth of the data chunk at a time
+    frame_size = info.channels * info.sampwidth
+    buffer = np.empty(BLOCK_FRAMES * frame_size, np.uint8)
+    with open(path, 'rb') as f:
+        f.seek(info.data_offset)
+        remaining = info.nframes * frame_size
+        while remaining:
+            n = f.readinto(memoryview(buffer)[:min(len(buffer), remaining)])
+            n -= n % frame_size
+            if not n: break
+            remaining -= n
+            yield _decode(buffer[:n], info.sampwidth).reshape(-1, info.channels)
+
+def _decoded(path):
+    # Anything but WAV (e.g. an extracted MP3) goes through pydub/ffmpeg in one piece
+    try:
+        from pydub import AudioSegment
+    except ImportError:
+        raise ValueError("pydub is needed to preview this audio format.")
+    audio = AudioSegment.from_file(path)
+    samples = np.array(audio.get_array_of_samples(), np.float32) / (1 << (8 * audio.sample_width - 1))
+    return samples.reshape(-1, audio.channels), audio.frame_rate
+
+def compute_envelope(path, width):
+    if os.path.splitext(path)[1].lower() == '.wav':
+        info = read_wav_info(path)
+        nframes, framerate, blocks = info.nframes, info.framerate, _wav_blocks(path, info)
+    else:
+        samples, framerate = _decoded(path)
+        nframes, blocks = len(samples), [samples]
+
+    width = max(1, min(width, nframes))
+    # Column c covers frames [edges[c], edges[c + 1]); a block may span several columns and a
+    # column several blocks, so each block's partial peaks are merged into its columns
+    edges = np.arange(width + 1, dtype=np.int64) * nframes // width
+    mins = np.full(width, np.inf, np.float32)
+    maxs = np.full(width, -np.inf, np.float32)
+    start = 0
+    for block in blocks:
+        if not len(block): continue
+        lo, hi = block.min(axis=1), block.max(axis=1)
+        end = start + len(block)
+        first = np.searchsorted(edges, start, 'right') - 1
+        last = np.searchsorted(edges, end - 1, 'right') - 1
+        offsets = np.concatenate(([0], edges[first + 1:last + 1] - start))
+        np.minimum(mins[first:last + 1], np.minimum.reduceat(lo, offsets), out=mins[first:last + 1])
+        np.maximum(maxs[first:last + 1], np.maximum.reduceat(hi, offsets), out=maxs[first:last + 1])
+        start = end
+    empty = mins > maxs  # silent remainder of a truncated file
+    mins[empty] = maxs[empty] = 0
+    return Envelope(mins, maxs, nframes / framerate if framerate else 0.0)
+
+# --- Disk cache ---
+def _cache_path(path, width):
+    stat = os.stat(path)
+    key = f"{CACHE_VERSION}|{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{width}"
+    return os.path.join(CACHE_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".npz")
+
+def load_envelope(path, width):
+    """Envelope of path with (at most) width columns, from the cache when the file is unchanged."""
+    cache = _cache_path(path, width)
+    try:
+        with np.load(cache) as saved:
+            return Envelope(saved["mins"], saved["maxs"], float(saved["duration"]))
+    except (OSError, KeyError, ValueError):
+        pass
+    envelope = compute_envelope(path, width)
+    _store(cache, envelope)
+    return envelope
+
+def _store(cache, envelope):
+    # Best effort: a read-only or full disk only costs the next scan
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{cache}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, mins=envelope.mins, maxs=envelope.maxs, duration=envelope.duration)
+        os.replace(tmp, cache)
+        _prune()
+    except OSError:
+        pass
+
+def _prune():
+    entries = [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR) if name.endswith(".npz")]
+    if len(entries) <= CACHE_LIMIT: return
+    entries.sort(key=os.path.getmtime)
+    for old in entries[:len(entries) - CACHE_LIMIT]:
+        os.remove(old)
+
+# --- Drawing ---
+def render_envelope(envelope, size, color, background):
+    # One vertical line per column, from its max down to its min, centred on the zero line
+    width, height = size
+    columns = np.linspace(0, len(envelope.mins), width, endpoint=False).astype(np.intp)
+    mid = (height - 1) / 2
+    top = np.rint(mid - envelope.maxs[columns] * mid)
+    bottom = np.rint(mid - envelope.mins[columns] * mid)
+    rows = np.arange(height)[:, None]
+    pixels = np.empty((height, width, 3), np.uint8)
+    pixels[:] = ImageColor.getrgb(background)
+    pixels[(rows >= top) & (rows <= bottom)] = ImageColor.getrgb(color)
+    return Image.fromarray(pixels)